@@ -0,0 +1,67 @@
+# Benchmark: compare the JSON decoder backends on data/raw.
+# For every available backend, times decoding of the files' bytes already in
+# memory, reading + decoding every file, a cold scan_dataset and a serial
+# load_all_from_dir (no caches involved).
+# Usage: python scripts/bench_json_decoder.py [data_dir]
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+
+import decoder
+from organizer import Organizer
+from utils import walk_data_files
+
+BASE = sys.argv[1] if len(sys.argv) > 1 else str(ROOT / 'data' / 'raw')
+files = [f for f, suffix in walk_data_files(BASE) if suffix == '.json']
+print(f'{len(files)} JSON files under {BASE}; backends: {decoder.available_backends()}')
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def decode_all():
+    for f in files:
+        decoder.load_file(f)
+
+
+blobs = [decoder.read_bytes(f) for f in files]
+
+
+def decode_bytes():
+    for b in blobs:
+        decoder.loads(b)
+
+
+results = {}
+default = decoder.backend
+# warm the OS page cache, and import pandas outside the timings, so the
+# first backend is not penalized
+decode_all()
+import pandas  # noqa: E402,F401
+for name in decoder.available_backends():
+    decoder.set_backend(name)
+    results[name] = {
+        'bytes': min(timed(decode_bytes) for _ in range(3)),
+        'decode': min(timed(decode_all) for _ in range(3)),
+        'scan_dataset': timed(lambda: Organizer().scan_dataset(BASE)),
+        'load_all_from_dir': timed(lambda: Organizer().load_all_from_dir(BASE)),
+    }
+decoder.set_backend(default)
+
+print(f"{'backend':<10} {'bytes':>9} {'read+dec':>9} {'scan':>9} {'load_all':>9}")
+for name, r in results.items():
+    print(f"{name:<10} {r['bytes']:>8.3f}s {r['decode']:>8.3f}s "
+          f"{r['scan_dataset']:>8.3f}s {r['load_all_from_dir']:>8.3f}s")
+if 'json' in results and len(results) > 1:
+    for name, r in results.items():
+        if name != 'json':
+            base = results['json']
+            print(f"{name} speedup vs json: decode x{base['bytes'] / r['bytes']:.1f}, "
+                  f"read+decode x{base['decode'] / r['decode']:.1f}, "
+                  f"load_all x{base['load_all_from_dir'] / r['load_all_from_dir']:.2f}")
@@ -0,0 +1,243 @@
+# Benchmark suite: time the organizer pipeline on synthetic ChirpStack trees.
+# For every size, generates (or reuses) a tree with gen_chirpstack_dataset.py
+# and times scan_dataset (cold and with a warm index), load_device_full of the
+# largest device, load_all_from_dir, clean_data, organize_by_device,
+# display_spreadsheet and building the plot series of the loaded device.
+# Each stage also records process_peak_rss_mb, the process's peak RSS so far
+# (a running high-water mark, not per stage).
+# Results are written as JSON (stdout or --out); --compare checks them against
+# an earlier result file and exits 1 when a stage got slower than --tolerance.
+# Usage: python scripts/bench_suite.py [--sizes 1k,10k,100k,1M] [--workdir DIR]
+#            [--repeat N] [--max-load-files N] [--out results.json]
+#            [--compare baseline.json] [--tolerance 1.25]
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+sys.path.insert(0, str(ROOT / 'scripts'))
+
+import numpy
+import pandas
+import decoder
+from gen_chirpstack_dataset import generate
+from organizer import Organizer
+from store import extract_series, record_schema
+from visualizer import Visualizer
+
+_SUFFIXES = {'k': 1000, 'm': 1000000}
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    if text[-1:] in _SUFFIXES:
+        return int(float(text[:-1]) * _SUFFIXES[text[-1]])
+    return int(text)
+
+
+def peak_rss_mb():
+    """Peak resident memory of the whole process so far, in MB (None when
+    it cannot be read: Windows without psutil)."""
+    if resource is not None:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    peak = getattr(psutil.Process().memory_info(), 'peak_wset', None)
+    return peak / (1024 * 1024) if peak else None
+
+
+def timed(fn, repeat=1):
+    """Run fn repeat times; return (best seconds, last result)."""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def stage(seconds, items=None):
+    # a high-water mark of the process, not the stage's own use: a stage
+    # only shows up here when it raises the peak of the stages before it
+    peak = peak_rss_mb()
+    out = {'seconds': round(seconds, 6), 'process_peak_rss_mb': round(peak, 1) if peak is not None else None}
+    if items is not None:
+        out['items'] = items
+        out['per_second'] = round(items / seconds, 1) if seconds > 0 else None
+    return out
+
+
+def plot_series(records):
+    """Extract (times, values) for every numeric measurement, as do_plot does."""
+    points = 0
+    n = 0
+    for m, info in record_schema(records).items():
+        if info.get('type') not in ('int', 'float'):
+            continue
+        times, _values = extract_series(records, m)
+        points += len(times)
+        n += 1
+    return n, points
+
+
+def bench_size(n_files, workdir, args):
+    tree = os.path.join(workdir, f'chirpstack-{n_files}')
+    start = time.perf_counter()
+    manifest = generate(tree, n_files, args.files_per_device, args.seed)
+    result = {'files': n_files, 'devices': len(manifest['devices']),
+              'generate_seconds': round(time.perf_counter() - start, 3), 'stages': {}}
+    stages = result['stages']
+
+    seconds, _ = timed(lambda: Organizer().scan_dataset(tree), args.repeat)
+    stages['scan_dataset'] = stage(seconds, n_files)
+
+    cache_dir = os.path.join(workdir, f'cache-{n_files}')
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    Organizer(cache_dir=cache_dir).scan_dataset(tree)
+    seconds, _ = timed(lambda: Organizer(cache_dir=cache_dir).scan_dataset(tree), args.repeat)
+    stages['scan_dataset_warm'] = stage(seconds, n_files)
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+    organizer = Organizer()
+    organizer.scan_dataset(tree)
+    device = max(manifest['devices'], key=manifest['devices'].get)
+    seconds, records = timed(lambda: organizer.load_device_full(device), args.repeat)
+    stages['load_device_full'] = stage(seconds, manifest['devices'][device])
+
+    seconds, (n_series, points) = timed(lambda: plot_series(records), args.repeat)
+    stages['plot_series'] = stage(seconds, points)
+    stages['plot_series']['series'] = n_series
+    del records, organizer
+
+    if n_files > args.max_load_files:
+        reason = f'more than --max-load-files={args.max_load_files} files'
+        for name in ('load_all_from_dir', 'clean_data', 'organize_by_device', 'display_spreadsheet'):
+            stages[name] = {'skipped': reason}
+        return result
+
+    organizer = Organizer()
+    seconds, df = timed(lambda: organizer.load_all_from_dir(tree), args.repeat)
+    stages['load_all_from_dir'] = stage(seconds, n_files)
+    rows = len(df)
+
+    # cleaning and grouping replace organizer.data, so each run starts from a copy
+    seconds, _ = timed(lambda: organizer.clean_data(df.copy()), args.repeat)
+    stages['clean_data'] = stage(seconds, rows)
+    del df
+
+    seconds, organized = timed(organizer.organize_by_device, args.repeat)
+    stages['organize_by_device'] = stage(seconds, rows)
+
+    csv_path = os.path.join(workdir, f'export-{n_files}.csv')
+    with contextlib.redirect_stdout(io.StringIO()):
+        seconds, _ = timed(lambda: Visualizer().display_spreadsheet(organized, csv_path), args.repeat)
+    stages['display_spreadsheet'] = stage(seconds, rows)
+    os.remove(csv_path)
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Return 'size stage: old -> new' lines for stages slower than tolerance x."""
+    old = {r['files']: r['stages'] for r in baseline.get('results', [])}
+    slower = []
+    for r in results['results']:
+        for name, s in r['stages'].items():
+            before = old.get(r['files'], {}).get(name, {})
+            if 'seconds' in s and before.get('seconds') and s['seconds'] > before['seconds'] * tolerance:
+                slower.append(f"{r['files']} files {name}: {before['seconds']:.3f}s -> {s['seconds']:.3f}s")
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the organizer pipeline on synthetic data.')
+    parser.add_argument('--sizes', default='1k,10k', help='comma separated file counts (k/M suffixes)')
+    parser.add_argument('--workdir', help='where generated trees are kept and reused (default: a temp dir)')
+    parser.add_argument('--files-per-device', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=1, help='runs per stage; the fastest is reported')
+    parser.add_argument('--max-load-files', type=int, default=200000,
+                        help='skip the whole-tree stages (load_all_from_dir onwards) above this size')
+    parser.add_argument('--out', help='write the JSON results here instead of stdout')
+    parser.add_argument('--compare', help='earlier results to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='bench-')
+    os.makedirs(workdir, exist_ok=True)
+    results = {
+        'meta': {
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'pandas': pandas.__version__,
+            'numpy': numpy.__version__,
+            'json_backend': decoder.backend,
+            'files_per_device': args.files_per_device,
+            'seed': args.seed,
+            'repeat': args.repeat,
+        },
+        'results': [],
+    }
+    try:
+        for size in args.sizes.split(','):
+            n_files = parse_size(size)
+            print(f'benchmarking {n_files} files...', file=sys.stderr)
+            results['results'].append(bench_size(n_files, workdir, args))
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as fh:
+            fh.write(text + '\n')
+    else:
+        print(text)
+
+    for r in results['results']:
+        print(f"{r['files']} files / {r['devices']} devices:", file=sys.stderr)
+        for name, s in r['stages'].items():
+            value = f"{s['seconds']:.3f}s" if 'seconds' in s else 'skipped'
+            print(f'  {name:<20} {value:>10}', file=sys.stderr)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as fh:
+            slower = compare(results, json.load(fh), args.tolerance)
+        for line in slower:
+            print('slower:', line, file=sys.stderr)
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,158 @@
+# Generate a synthetic ChirpStack uplink tree for benchmarks.
+# Writes <out_dir>/<deviceProfileName>/<devEui>/<uuid>.json, one uplink per
+# file, mixing the device profiles found in data/raw (payload fields, uplink
+# period, one or two gateways). Output is deterministic for a given seed, and
+# a manifest (.generated.json) lets callers reuse an existing tree.
+# Usage: python scripts/gen_chirpstack_dataset.py OUT_DIR --files N
+#            [--files-per-device 500] [--seed 0]
+import argparse
+import json
+import os
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+MANIFEST = '.generated.json'
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+TENANT = '52f14cd4-c6f1-4fbd-8f87-4025e1d49242'
+GATEWAYS = [
+    ('008000000002aa4b', {'latitude': 61.35229, 'longitude': -117.64852, 'altitude': 166}),
+    ('00800000a000e250', {'latitude': 45.34019, 'longitude': -75.89888, 'altitude': 97}),
+    ('0016c001f17adc38', {}),
+]
+
+
+def _dds75(rng, i):
+    return {'eventType': 'PERIODIC_REPORT', 'Bat': round(rng.uniform(3.2, 3.4), 3),
+            'distance': rng.randint(0, 3000)}
+
+
+def _em500(rng, i):
+    return {'battery': rng.randint(80, 100), 'distance': rng.randint(200, 4000)}
+
+
+def _makerfabs(rng, i):
+    return {'soil_val': rng.randint(900, 1500), 'temp': round(rng.uniform(-5, 30), 1),
+            'hum': round(rng.uniform(20, 90), 1), 'battery_v': 3, 'serial': i % 256}
+
+
+def _rbs301_temp(rng, i):
+    return {'eventType': 'PERIODIC_REPORT', 'humidity': round(rng.uniform(5, 95), 1),
+            'temperature': round(rng.uniform(-30, 35), 1)}
+
+
+def _rbs301_dws(rng, i):
+    return {'eventType': 'DOOR', 'open': rng.random() < 0.2, 'count': i}
+
+
+def _rbs305_ath(rng, i):
+    return {'Protocol': 1, 'temperature': rng.randint(-30, 30), 'humidity': rng.randint(10, 95),
+            'Counter': i % 256, 'Type': 'ATH', 'Event': 'Periodic Report'}
+
+
+def _sw3l(rng, i):
+    return {'BAT': round(rng.uniform(3.5, 3.7), 3), 'TDC': 1200, 'Water_flow_value': round(rng.uniform(0, 50), 2)}
+
+
+# deviceProfileName, devEui prefix, fPort, seconds between uplinks, object
+# builder, relative share of the devices
+PROFILES = [
+    ('Dragino DDS75-LB Ultrasonic Distance Sensor', 'a84041bb', 2, 1200, _dds75, 1),
+    ('EM500-UDL', '24e12471', 85, 600, _em500, 1),
+    ('Makerfabs Soil Moisture Sensor', '48e663ff', 2, 3600, _makerfabs, 2),
+    ('Multitech RBS301 Temp Sensor', '7894e800', 1, 900, _rbs301_temp, 4),
+    ('rbs301-dws', '7894e801', 1, 1800, _rbs301_dws, 1),
+    ('rbs305-ath', '7894e802', 2, 900, _rbs305_ath, 1),
+    ('SW3L', 'a8404109', 2, 1200, _sw3l, 1),
+]
+
+
+def _iso(t):
+    return t.strftime('%Y-%m-%dT%H:%M:%S.') + f'{t.microsecond // 1000:03d}+00:00'
+
+
+def _uplink(rng, profile, dev_eui, dev_addr, i):
+    name, _prefix, fport, period, build, _share = profile
+    t = START + timedelta(seconds=i * period + rng.uniform(0, 5))
+    rx = []
+    for gateway_id, location in rng.sample(GATEWAYS, rng.choice((1, 1, 2))):
+        rx.append({'gatewayId': gateway_id, 'uplinkId': rng.getrandbits(16),
+                   'nsTime': _iso(t + timedelta(milliseconds=rng.randint(40, 150))),
+                   'rssi': rng.randint(-120, -60), 'snr': round(rng.uniform(-10, 14), 1),
+                   'location': location, 'context': 'AAAAAA=='})
+    return {
+        'deduplicationId': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        'time': _iso(t),
+        'deviceInfo': {'tenantId': TENANT, 'tenantName': 'ChirpStack', 'applicationName': 'Synthetic',
+                       'deviceProfileName': name, 'deviceName': f'{name} {dev_eui[-4:]}',
+                       'devEui': dev_eui, 'deviceClassEnabled': 'CLASS_A', 'tags': {}},
+        'devAddr': dev_addr, 'adr': True, 'dr': 3, 'fCnt': i, 'fPort': fport, 'confirmed': False,
+        'data': 'AAAAAAAA', 'object': build(rng, i), 'rxInfo': rx,
+        'txInfo': {'frequency': 903900000 + 200000 * rng.randint(0, 7),
+                   'modulation': {'lora': {'bandwidth': 125000, 'spreadingFactor': 7, 'codeRate': 'CR_4_5'}}},
+        'regionConfigId': 'us915_1',
+    }
+
+
+def _devices(n_devices):
+    """Assign n_devices to profiles by share: (profile, devEui, devAddr) list."""
+    weighted = [p for p in PROFILES for _ in range(p[5])]
+    out = []
+    for d in range(n_devices):
+        profile = weighted[d % len(weighted)]
+        out.append((profile, f'{profile[1]}{d:08x}', f'{d:08x}'))
+    return out
+
+
+def read_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST), encoding='utf-8') as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def generate(out_dir, n_files, files_per_device=500, seed=0):
+    """Write n_files uplinks spread over ceil(n_files / files_per_device)
+    devices and return the manifest. An existing tree generated with the
+    same parameters is reused as is."""
+    params = {'files': int(n_files), 'files_per_device': int(files_per_device), 'seed': int(seed)}
+    manifest = read_manifest(out_dir)
+    if manifest is not None and manifest.get('params') == params:
+        return manifest
+    if os.path.isdir(out_dir) and os.listdir(out_dir):
+        raise ValueError(f'{out_dir} is not empty and was not generated with {params}')
+    rng = random.Random(seed)
+    n_devices = max(1, -(-n_files // files_per_device))
+    devices = _devices(n_devices)
+    counts = {}
+    for d, (profile, dev_eui, dev_addr) in enumerate(devices):
+        # the first devices take the remainder, so sizes differ a little
+        n = n_files // n_devices + (1 if d < n_files % n_devices else 0)
+        folder = os.path.join(out_dir, profile[0], dev_eui)
+        os.makedirs(folder, exist_ok=True)
+        for i in range(n):
+            rec = _uplink(rng, profile, dev_eui, dev_addr, i)
+            with open(os.path.join(folder, rec['deduplicationId'] + '.json'), 'w', encoding='utf-8') as fh:
+                json.dump(rec, fh)
+        counts[dev_eui] = n
+    manifest = {'params': params, 'devices': counts,
+                'profiles': sorted({p[0] for p, _e, _a in devices})}
+    with open(os.path.join(out_dir, MANIFEST), 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic ChirpStack uplink tree.')
+    parser.add_argument('out_dir')
+    parser.add_argument('--files', type=int, default=1000)
+    parser.add_argument('--files-per-device', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    manifest = generate(args.out_dir, args.files, args.files_per_device, args.seed)
+    print(f"{args.files} files for {len(manifest['devices'])} devices under {args.out_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""Read data files straight out of tar/tar.gz/zip archives.
+
+Members are addressed by virtual paths of the form 'archive::member'
+(e.g. 'data/raw/LoRaWAN.tgz::SW3L/a84041.../uplink.json'), so they can sit
+in the same file lists, indexes and caches as loose files.
+
+iter_members streams an archive once, front to back (tarfile stream mode),
+and records where each member's bytes start. With that offset index,
+read_members can fetch a subset of members (one device) by seeking: for a
+compressed tar this is a single forward pass that skips the other members
+without parsing them; plain tars and zips are read at random.
+"""
+import os
+
+try:
+    from .utils import DATA_SUFFIXES
+except ImportError:  # running as a script from src/
+    from utils import DATA_SUFFIXES
+
+ARCHIVE_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz', '.zip')
+SEP = '::'
+
+# (abs archive path, mtime_ns, size) -> {member: (offset, size)}
+_OFFSETS = {}
+
+
+def is_archive(path):
+    """True if path names a tar/zip archive we can read members from."""
+    return str(path).lower().endswith(ARCHIVE_SUFFIXES) and os.path.isfile(str(path))
+
+
+def virtual_path(archive, member):
+    return f'{archive}{SEP}{member}'
+
+
+def split_virtual_path(path):
+    """Return (archive, member) for a virtual path, or (path, None)."""
+    path = str(path)
+    archive, sep, member = path.partition(SEP)
+    if not sep:
+        return path, None
+    return archive, member
+
+
+def member_suffix(member):
+    return os.path.splitext(member)[1].lower()
+
+
+def _key(archive):
+    st = os.stat(archive)
+    return (os.path.abspath(archive), st.st_mtime_ns, st.st_size)
+
+
+def remember_offsets(archive, offsets):
+    """Record member -> (offset, size) for the archive's current version."""
+    _OFFSETS[_key(archive)] = dict(offsets)
+
+
+def _is_zip(archive):
+    return str(archive).lower().endswith('.zip')
+
+
+def iter_members(archive, suffixes=DATA_SUFFIXES):
+    """Stream an archive once, yielding (member, data bytes) for data files.
+
+    Members whose suffix is not in `suffixes` (and directories, links,
+    hidden files) are skipped. The offsets of every yielded member are
+    remembered once the whole archive has been read.
+    """
+    suffixes = tuple(s.lower() for s in suffixes)
+    offsets = {}
+    if _is_zip(archive):
+        import zipfile
+        with zipfile.ZipFile(archive) as zf:
+            for info in zf.infolist():
+                name = info.filename
+                if info.is_dir() or not _wanted(name, suffixes):
+                    continue
+                offsets[name] = (info.header_offset, info.file_size)
+                yield name, zf.read(info)
+    else:
+        import tarfile
+        with tarfile.open(archive, mode='r|*') as tf:
+            for info in tf:
+                if not info.isfile() or not _wanted(info.name, suffixes):
+                    continue
+                offsets[info.name] = (info.offset_data, info.size)
+                yield info.name, tf.extractfile(info).read()
+    remember_offsets(archive, offsets)
+
+
+def _wanted(name, suffixes):
+    base = name.rsplit('/', 1)[-1]
+    return not base.startswith('.') and member_suffix(base) in suffixes
+
+
+def member_offsets(archive):
+    """Return {member: (offset, size)} for the archive, building it if needed."""
+    key = _key(archive)
+    offsets = _OFFSETS.get(key)
+    if offsets is None:
+        for _member in list_members(archive):
+            pass
+        offsets = _OFFSETS.get(key, {})
+    return offsets
+
+
+def list_members(archive, suffixes=DATA_SUFFIXES):
+    """Yield the data members of an archive without keeping their bytes."""
+    for member, _data in iter_members(archive, suffixes):
+        yield member
+
+
+def _open_stream(archive):
+    """Open the (decompressed) byte stream a tar archive's offsets refer to."""
+    with open(archive, 'rb') as fh:
+        magic = fh.read(6)
+    if magic[:2] == b'\x1f\x8b':
+        import gzip
+        return gzip.open(archive, 'rb')
+    if magic[:3] == b'BZh':
+        import bz2
+        return bz2.open(archive, 'rb')
+    if magic == b'\xfd7zXZ\x00':
+        import lzma
+        return lzma.open(archive, 'rb')
+    return open(archive, 'rb')
+
+
+def read_members(archive, members):
+    """Yield (member, data bytes) for the requested members of an archive.
+
+    Members are read in archive order (ascending offset), which keeps reads
+    from a compressed tar to one forward pass. Unknown members are skipped.
+    """
+    offsets = member_offsets(archive)
+    wanted = sorted((offsets[m][0], m) for m in set(members) if m in offsets)
+    if not wanted:
+        return
+    if _is_zip(archive):
+        import zipfile
+        with zipfile.ZipFile(archive) as zf:
+            for _offset, member in wanted:
+                yield member, zf.read(member)
+        return
+    with _open_stream(archive) as fh:
+        for offset, member in wanted:
+            fh.seek(offset)
+            yield member, fh.read(offsets[member][1])
+
+
+def read_virtual(paths):
+    """Return {virtual path: data bytes} for the archive members among paths.
+
+    Members are grouped per archive and each archive is read once with
+    read_members. Plain paths and members that cannot be read are left out.
+    """
+    groups = {}
+    for p in paths:
+        arc, member = split_virtual_path(p)
+        if member is not None:
+            groups.setdefault(arc, []).append(member)
+    out = {}
+    for arc, members in groups.items():
+        try:
+            for member, data in read_members(arc, members):
+                out[virtual_path(arc, member)] = data
+        except Exception:
+            # a missing or damaged archive: its members are simply unreadable
+            continue
+    return out
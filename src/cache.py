@@ -0,0 +1,168 @@
+"""Persistent on-disk cache of parsed uplink rows.
+
+The organizer's file parser produces normalized rows annotated with
+'_source_file'. ParseCache keeps those rows in a single pickled DataFrame
+(pandas' native binary format, so numeric columns round-trip as NumPy
+blocks) next to a JSON manifest recording every source file's mtime and
+size. Uplink files never change once written, so on later runs only new
+or modified files have to be parsed again.
+"""
+import json
+import os
+
+try:
+    from . import archive as archives
+    from . import decoder
+    from .utils import match_columns
+except ImportError:  # running as a script from src/
+    import archive as archives
+    import decoder
+    from utils import match_columns
+
+
+class ParseCache:
+    MANIFEST_NAME = 'parsed_manifest.json'
+    FRAME_NAME = 'parsed_rows.pkl'
+    VERSION = 2
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self._manifest = None  # path -> [mtime_ns, size, parsed_ok]
+        self._frame = None
+        self._dirty = False
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.cache_dir, self.MANIFEST_NAME)
+
+    @property
+    def frame_path(self):
+        return os.path.join(self.cache_dir, self.FRAME_NAME)
+
+    def _load(self):
+        """Read the manifest and cached rows from disk (once)."""
+        if self._manifest is not None:
+            return
+        import pandas as pd
+        self._manifest = {}
+        self._frame = None
+        try:
+            meta = decoder.load_file(self.manifest_path)
+            if meta.get('version') != self.VERSION:
+                return
+            files = meta.get('files') or {}
+            frame = None
+            if os.path.exists(self.frame_path):
+                frame = pd.read_pickle(self.frame_path)
+            self._manifest = files
+            self._frame = frame
+        except Exception:
+            # a missing or corrupt cache simply means everything is re-parsed
+            self._manifest = {}
+            self._frame = None
+
+    @staticmethod
+    def _signature(path):
+        # archive members ('archive::member') share their archive's signature
+        st = os.stat(archives.split_virtual_path(path)[0])
+        return [st.st_mtime_ns, st.st_size]
+
+    def partition(self, files):
+        """Split files into (fresh, stale) lists.
+
+        fresh files have a manifest entry matching their current mtime and
+        size; stale files are new or modified and must be parsed again.
+        """
+        self._load()
+        fresh = []
+        stale = []
+        for f in files:
+            entry = self._manifest.get(f)
+            try:
+                if entry is not None and entry[:2] == self._signature(f):
+                    fresh.append(f)
+                    continue
+            except OSError:
+                pass
+            stale.append(f)
+        return fresh, stale
+
+    def store(self, files, frames, loaded):
+        """Record parse results for `files`.
+
+        frames: DataFrames holding the rows parsed from those files.
+        loaded: subset of files that parsed successfully; the others are
+        remembered as failures so they are not retried until they change.
+        """
+        import pandas as pd
+        self._load()
+        files = list(files)
+        if not files:
+            return
+        replaced = set(files)
+        parts = []
+        if self._frame is not None:
+            if any(f in self._manifest for f in replaced):
+                keep = ~self._frame['_source_file'].isin(replaced)
+                parts.append(self._frame[keep])
+            else:
+                parts.append(self._frame)
+        parts.extend(df for df in frames if df is not None)
+        if parts:
+            self._frame = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+        loaded = set(loaded)
+        for f in files:
+            try:
+                self._manifest[f] = self._signature(f) + [f in loaded]
+            except OSError:
+                self._manifest.pop(f, None)
+        self._dirty = True
+
+    def loaded(self, files):
+        """Return the files (in the given order) whose cached parse succeeded."""
+        self._load()
+        out = []
+        for f in files:
+            entry = self._manifest.get(f)
+            if entry is not None and entry[2]:
+                out.append(f)
+        return out
+
+    def rows_for(self, files, columns=None):
+        """Return a copy of the cached rows for `files`, in file order.
+
+        columns: optional dotted paths (see utils.match_columns); only the
+        matching columns are copied out. Returns None if none of the files
+        has cached rows.
+        """
+        import numpy as np
+        self._load()
+        if self._frame is None or self._frame.empty or '_source_file' not in self._frame.columns:
+            return None
+        rank = {f: i for i, f in enumerate(files)}
+        ranks = self._frame['_source_file'].map(rank)
+        selected = np.flatnonzero(ranks.notna().to_numpy())
+        if selected.size == 0:
+            return None
+        order = np.argsort(ranks.to_numpy()[selected], kind='stable')
+        frame = self._frame
+        if columns is not None:
+            frame = frame[match_columns(frame.columns, columns)]
+        return frame.take(selected[order]).reset_index(drop=True)
+
+    def save(self):
+        """Write the manifest and rows back to disk if anything changed."""
+        if not self._dirty:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # write to temporary names first so an interrupted save never leaves
+        # a manifest that describes rows we do not have
+        frame_tmp = self.frame_path + '.tmp'
+        manifest_tmp = self.manifest_path + '.tmp'
+        if self._frame is not None:
+            self._frame.to_pickle(frame_tmp)
+            os.replace(frame_tmp, self.frame_path)
+        with open(manifest_tmp, 'w', encoding='utf-8') as fh:
+            json.dump({'version': self.VERSION, 'files': self._manifest}, fh)
+        os.replace(manifest_tmp, self.manifest_path)
+        self._dirty = False
@@ -0,0 +1,274 @@
+"""Typed flattener for ChirpStack event JSON (uplinks, status, join, log).
+
+pd.json_normalize treats every record generically: each nested key becomes
+an object-dtype column and the rxInfo list stays a Python list per cell.
+flatten_uplinks knows the ChirpStack layout instead and builds the columns
+in a single pass:
+
+- 'time' as datetime64[ns, UTC],
+- fCnt/fPort/dr as int32 and the best gateway's rssi/snr as float32,
+- rxInfo reduced to the best gateway (highest rssi, then snr), expanded into
+  'rxInfo.gatewayId', 'rxInfo.rssi', 'rxInfo.location.latitude', ... plus
+  'rxInfo.count' with the number of gateways that heard the frame,
+- repeated strings (deviceInfo.*, devAddr, rxInfo.gatewayId, ...) as
+  categoricals.
+
+Everything else (object.*, txInfo.*, extra top-level keys such as
+'_source_file') is flattened to the same dotted names json_normalize uses,
+so downstream code sees familiar column names.
+"""
+try:
+    from .cleaning import parse_times
+    from .utils import clean_column_name, field_paths
+except ImportError:  # running as a script from src/
+    from cleaning import parse_times
+    from utils import clean_column_name, field_paths
+
+# fixed column types; anything not listed is inferred by pandas
+_INT32 = ('fCnt', 'fPort', 'dr')
+_INT64 = ('txInfo.frequency', 'txInfo.modulation.lora.bandwidth',
+          'txInfo.modulation.lora.spreadingFactor', 'rxInfo.count')
+_FLOAT32 = ('rxInfo.rssi', 'rxInfo.snr')
+_CATEGORICAL = ('devAddr', 'regionConfigId', 'rxInfo.gatewayId',
+                'txInfo.modulation.lora.codeRate')
+_CATEGORICAL_PREFIXES = ('deviceInfo.',)
+# leading columns, in this order
+_LEADING = ('time', 'deduplicationId')
+
+
+def is_chirpstack_event(record):
+    """True if record looks like a ChirpStack integration event."""
+    return (isinstance(record, dict) and isinstance(record.get('deviceInfo'), dict)
+            and 'time' in record)
+
+
+def best_gateway(rx_info):
+    """Return the rxInfo entry with the strongest signal, or None."""
+    if not isinstance(rx_info, list) or not rx_info:
+        return None
+    if len(rx_info) == 1:
+        return rx_info[0] if isinstance(rx_info[0], dict) else None
+    best = None
+    best_key = None
+    for gw in rx_info:
+        if not isinstance(gw, dict):
+            continue
+        key = (_num(gw.get('rssi')), _num(gw.get('snr')))
+        if best is None or key > best_key:
+            best, best_key = gw, key
+    return best
+
+
+def _num(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else float('-inf')
+
+
+_EMPTY = {}
+
+
+def _collect(prefix, dicts, columns, skip=()):
+    """Add one column per (nested) key of dicts to columns, key by key.
+
+    Works column-wise: each key costs one list comprehension over all rows
+    rather than a dict insert per row and field.
+    """
+    keys = set().union(*dicts)
+    for key in sorted(keys, key=_key_order):
+        if key in skip:
+            continue
+        values = [d.get(key) for d in dicts]
+        name = prefix + key
+        if dict in set(map(type, values)):
+            subs = [v if isinstance(v, dict) else _EMPTY for v in values]
+            _collect(name + '.', subs, columns)
+            rest = [None if isinstance(v, dict) else v for v in values]
+            if set(map(type, rest)) != {type(None)}:
+                columns[name] = rest
+        else:
+            columns[name] = values
+
+
+def _key_order(key):
+    # leading columns first, so 'time' is found before e.g. rxInfo.nsTime
+    return (_LEADING.index(key) if key in _LEADING else len(_LEADING), key)
+
+
+def _project(records, paths, columns):
+    """Add only the columns selected by dotted paths to columns.
+
+    Paths resolve like the full flattener names them: 'rxInfo.*' against
+    the best gateway, and a path naming a nested dict ('object') expands
+    to all of its fields. A path matching no field is looked up by its
+    cleaned name ('object_temperature' finds 'object.temperature'), see
+    utils.clean_column_name. '_source_file' is carried over when present.
+    """
+    gateways = None
+
+    def add(path):
+        # False when the path is absent from every record
+        nonlocal gateways
+        if path == 'rxInfo.count':
+            values = [len(v) if isinstance(v, list) else None for v in (r.get('rxInfo') for r in records)]
+        elif path.startswith('rxInfo.'):
+            if gateways is None:
+                gateways = [best_gateway(r.get('rxInfo')) or _EMPTY for r in records]
+            values = [_dig(gw, path[len('rxInfo.'):].split('.')) for gw in gateways]
+        else:
+            parts = path.split('.')
+            values = [r[path] if path in r else _dig(r, parts) for r in records]
+        types = set(map(type, values))
+        if dict in types:
+            _collect(path + '.', [v if isinstance(v, dict) else _EMPTY for v in values], columns)
+        elif types != {type(None)}:
+            columns[path] = values
+        else:
+            # fields absent from every record are left out, as when not projecting
+            return False
+        return True
+
+    unresolved = [path for path in paths if path not in columns and not add(path)]
+    if unresolved:
+        for path in _cleaned_matches(records, unresolved):
+            if path not in columns:
+                add(path)
+    if '_source_file' not in columns:
+        add('_source_file')
+
+
+def _cleaned_matches(records, paths):
+    """Field paths of records whose cleaned names equal those of paths
+    (other than paths themselves), e.g. both 'object.Bat' and 'object.BAT'
+    for 'object_bat'."""
+    wanted = {clean_column_name(p) for p in paths}
+    found = set()
+    for r in records:
+        for path in field_paths(r):
+            if clean_column_name(path) in wanted:
+                found.add(path)
+        if isinstance(r.get('rxInfo'), list) and 'rxinfo_count' in wanted:
+            found.add('rxInfo.count')
+    return sorted(found - set(paths))
+
+
+def _dig(record, parts):
+    cur = record
+    for part in parts:
+        if not isinstance(cur, dict):
+            return None
+        cur = cur.get(part)
+    return cur
+
+
+def flatten_uplinks(records, typed=True, columns=None):
+    """Flatten a list of ChirpStack event dicts into a DataFrame.
+
+    With typed=False the columns are left as object arrays; callers that
+    concatenate many batches pass that and run apply_uplink_types once on
+    the result, which is cheaper than typing (and re-unifying categories
+    of) every batch. columns: optional dotted paths (e.g. ['time',
+    'object.distance']); only those fields are materialized.
+    """
+    import numpy as np
+    import pandas as pd
+
+    n = len(records)
+    paths = columns
+    columns = {}
+    if paths is not None:
+        _project(records, paths, columns)
+    else:
+        _collect('', records, columns, skip=('rxInfo',))
+        rx_info = [r.get('rxInfo') for r in records]
+        if list in set(map(type, rx_info)):
+            columns['rxInfo.count'] = [len(v) if isinstance(v, list) else None for v in rx_info]
+            gateways = [best_gateway(v) or _EMPTY for v in rx_info]
+            _collect('rxInfo.', gateways, columns)
+
+    # fromiter keeps list cells (e.g. object.* arrays) as single objects
+    df = pd.DataFrame({name: np.fromiter(values, dtype=object, count=n)
+                       for name, values in columns.items()}, index=pd.RangeIndex(n))
+    return apply_uplink_types(df) if typed else df
+
+
+def apply_uplink_types(df):
+    """Give the ChirpStack columns of df their fixed types.
+
+    'time' becomes datetime64[ns, UTC], fCnt/fPort/dr int32, rxInfo
+    rssi/snr float32 and repeated strings categorical (nullable Int32/Int64
+    where values are missing); other object columns are inferred. Columns
+    already of the right type are left alone, so this is safe to re-run
+    after concatenating typed frames.
+    """
+    import pandas as pd
+    from pandas.api.types import is_datetime64_any_dtype
+
+    out = {}
+    for name in df.columns:
+        s = df[name]
+        if name == 'time':
+            if not is_datetime64_any_dtype(s.dtype):
+                s = parse_times(s)
+        elif name in _INT32 or name in _INT64:
+            s = _int_column(s, 'int32' if name in _INT32 else 'int64')
+        elif name in _FLOAT32:
+            if s.dtype != 'float32':
+                s = pd.to_numeric(s, errors='coerce').astype('float32')
+        elif name in _CATEGORICAL or name.startswith(_CATEGORICAL_PREFIXES):
+            if not isinstance(s.dtype, pd.CategoricalDtype):
+                try:
+                    s = s.astype('category')
+                except TypeError:
+                    # unhashable values (unexpected nested lists) stay as objects
+                    s = s.infer_objects()
+        elif s.dtype == object:
+            s = s.infer_objects()
+        out[name] = s
+    return pd.DataFrame(out, index=df.index)
+
+
+def _int_column(s, dtype):
+    import pandas as pd
+    if s.dtype == dtype or s.dtype == dtype.capitalize():
+        return s
+    values = pd.to_numeric(s, errors='coerce')
+    if values.isna().any():
+        return values.astype(dtype.capitalize())
+    return values.astype(dtype)
+
+
+def normalize_records(records, typed=True, columns=None):
+    """Flatten records into a DataFrame: ChirpStack events with
+    flatten_uplinks, any other records with pd.json_normalize.
+
+    A batch mixing both is split, each part flattened on its own and the
+    rows put back in their original order, so an event's columns do not
+    depend on which records it was batched with.
+
+    columns: optional dotted paths to keep (see flatten_uplinks); other
+    records are reduced with utils.project_record before building the frame.
+    """
+    import pandas as pd
+    events = [i for i, r in enumerate(records) if is_chirpstack_event(r)]
+    if len(events) == len(records) and records:
+        return flatten_uplinks(records, typed=typed, columns=columns)
+    if not events:
+        return _normalize_other(records, columns)
+    others = sorted(set(range(len(records))) - set(events))
+    uplinks = flatten_uplinks([records[i] for i in events], typed=False, columns=columns)
+    rest = _normalize_other([records[i] for i in others], columns)
+    uplinks.index = pd.Index(events)
+    rest.index = pd.Index(others)
+    df = pd.concat([uplinks, rest]).sort_index().reset_index(drop=True)
+    return apply_uplink_types(df) if typed else df
+
+
+def _normalize_other(records, columns):
+    import pandas as pd
+    if columns is not None:
+        try:
+            from .utils import project_record
+        except ImportError:  # running as a script from src/
+            from utils import project_record
+        df = pd.DataFrame([project_record(r, columns) for r in records])
+        return df.dropna(axis=1, how='all')
+    return pd.json_normalize(records)
@@ -0,0 +1,70 @@
+"""Pluggable JSON decoder shared by the scanner, loaders and caches.
+
+Uplink files are small and numerous, so decoding dominates parse time.
+Files are read as bytes in a single call and handed to the fastest backend
+available: orjson, then pysimdjson, then the standard library. Both
+optional packages are picked up automatically when installed; use
+set_backend() to force one (e.g. for benchmarks). dumps() writes compact
+JSON with orjson when it is the active backend.
+"""
+import json
+
+_BACKENDS = {'json': json.loads}
+try:
+    import orjson
+    _BACKENDS['orjson'] = orjson.loads
+except ImportError:  # optional speedup
+    pass
+try:
+    import simdjson
+    _BACKENDS['simdjson'] = simdjson.loads
+except ImportError:  # optional speedup
+    pass
+
+# preferred order when choosing the default backend
+_PREFERENCE = ('orjson', 'simdjson', 'json')
+
+backend = next(name for name in _PREFERENCE if name in _BACKENDS)
+_loads = _BACKENDS[backend]
+
+
+def available_backends():
+    """Names of the JSON backends that can be used here."""
+    return [name for name in _PREFERENCE if name in _BACKENDS]
+
+
+def set_backend(name):
+    """Select the JSON backend by name; returns the previous one."""
+    global backend, _loads
+    if name not in _BACKENDS:
+        raise ValueError(f'JSON backend not available: {name!r} (have {available_backends()})')
+    previous = backend
+    backend, _loads = name, _BACKENDS[name]
+    return previous
+
+
+def loads(data):
+    """Decode a JSON document given as bytes or str."""
+    return _loads(data)
+
+
+def read_bytes(path):
+    with open(path, 'rb') as fh:
+        return fh.read()
+
+
+def load_file(path):
+    """Read a JSON file in one call and decode it."""
+    return _loads(read_bytes(path))
+
+
+def load_ndjson(path):
+    """Read an NDJSON/JSON Lines file and decode every non-blank line."""
+    return [_loads(line) for line in read_bytes(path).splitlines() if line.strip()]
+
+
+def dumps(obj):
+    """Encode obj as compact JSON bytes (one line, UTF-8)."""
+    if backend == 'orjson':
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
@@ -1,611 +1,880 @@
-import tkinter as tk
-from tkinter import ttk, messagebox
-from pathlib import Path
-import threading
-
-
-def run_gui(organized_data, visualizer, organizer=None, source_used=None, loaded_files=None):
-    """Run a simple tkinter GUI for device and measurement selection.
-
-    organized_data: dict mapping device_key -> list[records]
-    visualizer: Visualizer instance with display_spreadsheet and display_graph
-    organizer: Organizer instance (optional) used for on-demand loads when scan was used
-    """
-    root = tk.Tk()
-    root.title('Dataset Organizer')
-    root.geometry('900x650')
-
-    # Ensure closing the main window attempts to clean up plots and threads
-    def _on_close():
-        try:
-            # Close any matplotlib windows to avoid non-daemon GUI threads
-            try:
-                import matplotlib.pyplot as _plt
-                _plt.close('all')
-            except Exception:
-                pass
-            # Destroy any remaining Toplevels
-            for w in list(root.winfo_children()):
-                try:
-                    if isinstance(w, tk.Toplevel):
-                        w.destroy()
-                except Exception:
-                    pass
-            try:
-                root.quit()
-            except Exception:
-                pass
-            try:
-                root.destroy()
-            except Exception:
-                pass
-        finally:
-            # As a last-resort, force the process to exit to avoid leaving the
-            # terminal stuck (this will immediately terminate Python).
-            try:
-                import os
-                os._exit(0)
-            except Exception:
-                pass
-
-    root.protocol('WM_DELETE_WINDOW', _on_close)
-
-    frame = ttk.Frame(root, padding=10)
-    frame.pack(fill=tk.BOTH, expand=True)
-
-    hdr = f"Source: {source_used if source_used else 'project data'}"
-    ttk.Label(frame, text=hdr).pack(anchor='w')
-    ttk.Label(frame, text=f"Loaded files: {len(loaded_files) if loaded_files else 0}").pack(anchor='w')
-
-    ttk.Label(frame, text='Devices (select one or more):').pack(anchor='w', pady=(10, 0))
-    dev_keys = list(organized_data.keys())
-
-    # Try to load known device list for friendly names
-    try:
-        from devices import devices as DEVICE_LIST
-    except Exception:
-        DEVICE_LIST = []
-
-    def _extract_folder(first):
-        if not first or not isinstance(first, dict):
-            return None
-        sf = first.get('_source_file')
-        if not sf:
-            return None
-        try:
-            p = Path(sf)
-            parts = [part for part in p.parts]
-            lowered = [part.lower() for part in parts]
-            folder = None
-            if 'data' in lowered:
-                try:
-                    di = lowered.index('data')
-                    if di + 1 < len(lowered) and lowered[di + 1] == 'raw':
-                        if di + 2 < len(parts):
-                            folder = parts[di + 2]
-                except Exception:
-                    pass
-            if not folder:
-                parent = p.parent.name
-                if parent and parent.lower() not in {'data', 'raw', 'processed', 'dataset'}:
-                    folder = parent
-            if not folder:
-                folder = p.stem
-            return folder
-        except Exception:
-            return None
-
-    def _get_nested(first, key):
-        if not isinstance(first, dict):
-            return None
-        if key in first and first.get(key):
-            return first.get(key)
-        if '.' in key:
-            cur = first
-            for p in key.split('.'):
-                if isinstance(cur, dict) and p in cur:
-                    cur = cur[p]
-                else:
-                    cur = None
-                    break
-            return cur
-        # try lowercase match
-        lk = key.lower()
-        for kf, v in first.items():
-            if kf.lower() == lk and v:
-                return v
-        return None
-
-    def _get_name_from_record(first):
-        if not first or not isinstance(first, dict):
-            return None
-        candidates = ['deviceName', 'deviceProfileName', 'device_name', 'device_label', 'node_name', 'name']
-        blacklist = {'chirpstack', 'the things network', 'ttn', 'lorawan', 'lora'}
-        for c in candidates:
-            try:
-                v = _get_nested(first, c)
-                if v:
-                    sval = str(v).strip()
-                    if sval and sval.lower() not in blacklist:
-                        return sval
-            except Exception:
-                continue
-        for kf, v in first.items():
-            lk = kf.lower()
-            if 'device' in lk and 'name' in lk and v:
-                sval = str(v).strip()
-                if sval and sval.lower() not in blacklist:
-                    return sval
-        # match DEVICE_LIST names inside values
-        for dev in DEVICE_LIST:
-            try:
-                dname = dev.name.lower()
-                for v in first.values():
-                    try:
-                        if dname in str(v).lower():
-                            return dev.name
-                    except Exception:
-                        continue
-            except Exception:
-                continue
-        return None
-
-    def _format_label(device_id, folder=None, subname=None):
-        parts = []
-        if folder:
-            parts.append(str(folder))
-        if subname:
-            parts.append(str(subname))
-        parts.append(str(device_id))
-        return ' — '.join(parts)
-
-    # Build device labels
-    dev_labels = []
-    for k in dev_keys:
-        label = None
-        try:
-            records = organized_data.get(k)
-            if not records:
-                ks = [kk for kk in organized_data.keys() if str(kk) == str(k)]
-                if ks:
-                    records = organized_data.get(ks[0])
-            first = records[0] if records and len(records) > 0 else None
-            folder = _extract_folder(first)
-            name_candidate = _get_name_from_record(first)
-            # If the extracted name is identical to the device id, don't duplicate it
-            try:
-                if name_candidate and str(name_candidate).strip() == str(k).strip():
-                    name_candidate = None
-            except Exception:
-                pass
-            # If the extracted folder equals the device id, don't include it
-            try:
-                if folder and str(folder).strip() == str(k).strip():
-                    folder = None
-            except Exception:
-                pass
-            if folder and name_candidate:
-                label = _format_label(k, folder=folder, subname=name_candidate)
-            elif name_candidate:
-                label = _format_label(k, subname=name_candidate)
-            elif folder:
-                label = _format_label(k, folder=folder)
-            else:
-                matched = False
-                for dev in DEVICE_LIST:
-                    try:
-                        if str(k) == dev.dev_eui or str(k) == dev.dev_addr or str(k) == dev.gateway_eui or str(k) == dev.name:
-                            label = _format_label(k, subname=dev.name)
-                            matched = True
-                            break
-                    except Exception:
-                        continue
-                if not matched:
-                    label = str(k)
-        except Exception:
-            label = str(k)
-        dev_labels.append(label)
-
-    # UI widgets
-    displayed_indices = list(range(len(dev_keys)))
-
-    # container for search + listbox
-    dev_container = ttk.Frame(frame)
-    dev_container.pack(fill=tk.BOTH, expand=False)
-
-    search_var = tk.StringVar(value='')
-    search_frame = ttk.Frame(dev_container)
-    ttk.Label(search_frame, text='Search devices:').pack(side=tk.LEFT)
-    search_entry = ttk.Entry(search_frame, textvariable=search_var)
-    search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(6, 0))
-    search_frame.pack(fill=tk.X, pady=(0, 6))
-
-    dev_listbox_frame = ttk.Frame(dev_container)
-    dev_listbox_frame.pack(fill=tk.BOTH, expand=True)
-    dev_listbox = tk.Listbox(dev_listbox_frame, selectmode=tk.MULTIPLE, height=10)
-    dev_scroll = ttk.Scrollbar(dev_listbox_frame, orient=tk.VERTICAL, command=dev_listbox.yview)
-    dev_listbox.config(yscrollcommand=dev_scroll.set)
-    dev_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-    dev_scroll.pack(side=tk.LEFT, fill=tk.Y)
-
-    def _repopulate_device_list(filtered_indices=None):
-        nonlocal displayed_indices
-        # preserve currently selected device keys so selection survives repopulate
-        try:
-            cur_sel = set()
-            for si in dev_listbox.curselection():
-                try:
-                    cur_key = dev_keys[displayed_indices[si]]
-                    cur_sel.add(str(cur_key))
-                except Exception:
-                    continue
-        except Exception:
-            cur_sel = set()
-
-        dev_listbox.delete(0, tk.END)
-        if filtered_indices is None:
-            filtered_indices = list(range(len(dev_labels)))
-        displayed_indices = filtered_indices
-        for j, i in enumerate(filtered_indices):
-            dev_listbox.insert(tk.END, dev_labels[i])
-            try:
-                if str(dev_keys[i]) in cur_sel:
-                    dev_listbox.select_set(j)
-            except Exception:
-                continue
-
-    _repopulate_device_list()
-
-    def filter_devices(event=None):
-        q = search_var.get().strip().lower()
-        if not q:
-            _repopulate_device_list()
-            return
-        matches = [i for i, lbl in enumerate(dev_labels) if q in lbl.lower() or q in str(dev_keys[i]).lower()]
-        _repopulate_device_list(matches)
-
-    search_entry.bind('<KeyRelease>', filter_devices)
-
-    # helper: collect nested keys and access nested values
-    def _collect_keys_from_record(rec, prefix=''):
-        """Recursively collect keys from a possibly nested dict record.
-
-        Returns a set of dot-notated key names (e.g. payload.temperature).
-        """
-        keys = set()
-        if isinstance(rec, dict):
-            for kk, vv in rec.items():
-                if kk.startswith('_'):
-                    continue
-                new_key = f"{prefix}.{kk}" if prefix else kk
-                if isinstance(vv, dict):
-                    keys.update(_collect_keys_from_record(vv, new_key))
-                elif isinstance(vv, list):
-                    # If we have a list of dicts (e.g. rxInfo), inspect elements
-                    for it in vv:
-                        if isinstance(it, dict):
-                            keys.update(_collect_keys_from_record(it, new_key))
-                        else:
-                            # non-dict list elements are treated as a value for the list key
-                            keys.add(new_key)
-                else:
-                    keys.add(new_key)
-        return keys
-
-    def _get_nested_value(rec, key):
-        """Get a nested value from a record using dot notation.
-
-        Returns None if any part is missing.
-        """
-        if not isinstance(rec, dict):
-            return None
-        if key in rec:
-            return rec.get(key)
-        if '.' in key:
-            cur = rec
-            for part in key.split('.'):
-                if isinstance(cur, dict) and part in cur:
-                    cur = cur[part]
-                    continue
-                # If current node is a list, try to find the part in any element
-                if isinstance(cur, list):
-                    found = None
-                    for it in cur:
-                        if isinstance(it, dict) and part in it:
-                            found = it[part]
-                            break
-                    if found is None:
-                        return None
-                    cur = found
-                    continue
-                # not found
-                return None
-            return cur
-        # also try underscore variant (some loaders normalize '.' -> '_')
-        try:
-            alt = key.replace('.', '_')
-            if alt in rec:
-                return rec.get(alt)
-        except Exception:
-            pass
-        lk = key.lower()
-        for kf, v in rec.items():
-            if kf.lower() == lk:
-                return v
-        return None
-
-    # Measurements list
-    ttk.Label(frame, text='Measurements (select one or more):').pack(anchor='w', pady=(10, 0))
-    meas_frame = ttk.Frame(frame)
-    meas_frame.pack(fill=tk.BOTH, expand=False)
-    meas_listbox = tk.Listbox(meas_frame, selectmode=tk.MULTIPLE, height=8)
-    meas_scroll = ttk.Scrollbar(meas_frame, orient=tk.VERTICAL, command=meas_listbox.yview)
-    meas_listbox.config(yscrollcommand=meas_scroll.set)
-    meas_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-    meas_scroll.pack(side=tk.LEFT, fill=tk.Y)
-    
-    def populate_measurements():
-        sel = dev_listbox.curselection()
-        if not sel:
-            messagebox.showinfo('Selection', 'Please select at least one device first')
-            return
-        visible_keys = []
-        for i in sel:
-            try:
-                real_idx = displayed_indices[i]
-            except Exception:
-                real_idx = i
-            visible_keys.append(dev_keys[real_idx])
-
-        candidate_keys = set()
-
-        def _update_meas():
-            candidate_keys.clear()
-            for k in visible_keys:
-                records = organized_data.get(k, [])
-                for rec in records:
-                    candidate_keys.update(_collect_keys_from_record(rec))
-            # If any collected key corresponds to a list-of-dicts (e.g. rxinfo),
-            # add explicit subkeys for the first element so users can select rssi/snr etc.
-            extra = set()
-            for k in list(candidate_keys):
-                # look at sample records to see if this key is a list
-                for rec in (organized_data.get(visible_keys[0], []) or [])[:5]:
-                    try:
-                        val = _get_nested_value(rec, k)
-                        if isinstance(val, list) and val:
-                            first = val[0]
-                            if isinstance(first, dict):
-                                for subk in first.keys():
-                                    extra.add(f"{k}.{subk}")
-                    except Exception:
-                        continue
-            candidate_keys.update(extra)
-            exclude = {'device_id', 'time', 'device', 'Device', '_source_file'}
-            candidates = [m for m in sorted(candidate_keys) if m not in exclude]
-            meas_listbox.delete(0, tk.END)
-            for m in candidates:
-                meas_listbox.insert(tk.END, m)
-
-        keys_to_load = []
-        if organizer is not None and getattr(organizer, '_scanned', False):
-            for k in visible_keys:
-                if hasattr(organizer, '_device_folder_map') and k in organizer._device_folder_map:
-                    if not organized_data.get(k) or any(not isinstance(r, dict) or '_source_file' not in r for r in organized_data.get(k, [])):
-                        keys_to_load.append(k)
-
-        if keys_to_load:
-            progress = tk.Toplevel(root)
-            progress.title('Loading...')
-            ttk.Label(progress, text='Loading device data, please wait...').pack(padx=10, pady=10)
-
-            def worker():
-                for k in keys_to_load:
-                    try:
-                        full = organizer.load_device_full(k)
-                        if full:
-                            organized_data[k] = full
-                    except Exception:
-                        continue
-                root.after(50, lambda: (progress.destroy(), _update_meas()))
-
-            threading.Thread(target=worker, daemon=True).start()
-        else:
-            _update_meas()
-
-        def _update_meas():
-            candidate_keys.clear()
-            # Collect keys across all records for selected devices
-            for k in visible_keys:
-                records = organized_data.get(k, [])
-                for rec in records:
-                    candidate_keys.update(_collect_keys_from_record(rec))
-            exclude = {'device_id', 'time', 'device', 'Device', '_source_file'}
-            candidates = [m for m in sorted(candidate_keys) if m not in exclude]
-            meas_listbox.delete(0, tk.END)
-            for m in candidates:
-                meas_listbox.insert(tk.END, m)
-
-        keys_to_load = []
-        if organizer is not None and getattr(organizer, '_scanned', False):
-            for k in visible_keys:
-                if hasattr(organizer, '_device_folder_map') and k in organizer._device_folder_map:
-                    if not organized_data.get(k) or any(not isinstance(r, dict) or '_source_file' not in r for r in organized_data.get(k, [])):
-                        keys_to_load.append(k)
-
-        if keys_to_load:
-            progress = tk.Toplevel(root)
-            progress.title('Loading...')
-            ttk.Label(progress, text='Loading device data, please wait...').pack(padx=10, pady=10)
-
-            def worker():
-                for k in keys_to_load:
-                    try:
-                        full = organizer.load_device_full(k)
-                        if full:
-                            organized_data[k] = full
-                    except Exception:
-                        continue
-                root.after(50, lambda: (progress.destroy(), _update_meas()))
-
-            threading.Thread(target=worker, daemon=True).start()
-        else:
-            _update_meas()
-
-    ttk.Button(frame, text='Refresh Measurements', command=populate_measurements).pack(pady=6)
-
-    # Display option
-    display_var = tk.StringVar(value='graph')
-    disp_frame = ttk.Frame(frame)
-    ttk.Radiobutton(disp_frame, text='Graph', variable=display_var, value='graph').pack(side=tk.LEFT)
-    ttk.Radiobutton(disp_frame, text='Spreadsheet', variable=display_var, value='spreadsheet').pack(side=tk.LEFT)
-    disp_frame.pack(anchor='w', pady=(10, 0))
-
-    def get_selected_devices():
-        sel = dev_listbox.curselection()
-        keys = [dev_keys[displayed_indices[i]] for i in sel] if sel else []
-        if not keys:
-            keys = dev_keys
-        return keys
-
-    def get_selected_measurements():
-        sel = meas_listbox.curselection()
-        return [meas_listbox.get(i) for i in sel]
-
-    def do_spreadsheet():
-        keys = get_selected_devices()
-        keys_to_load = []
-        if organizer is not None and getattr(organizer, '_scanned', False):
-            for k in keys:
-                if hasattr(organizer, '_device_folder_map') and k in organizer._device_folder_map:
-                    if not organized_data.get(k) or any(not isinstance(r, dict) or '_source_file' not in r for r in organized_data.get(k, [])):
-                        keys_to_load.append(k)
-
-        def _do_export():
-            selected_data = {k: organized_data[k] for k in keys}
-            visualizer.display_spreadsheet(selected_data)
-            messagebox.showinfo('Export', 'Spreadsheet saved (see output.csv)')
-
-        if keys_to_load:
-            progress = tk.Toplevel(root)
-            progress.title('Loading...')
-            ttk.Label(progress, text='Loading device data, please wait...').pack(padx=10, pady=10)
-
-            def worker():
-                for k in keys_to_load:
-                    try:
-                        full = organizer.load_device_full(k)
-                        if full:
-                            organized_data[k] = full
-                    except Exception:
-                        continue
-                root.after(50, lambda: (progress.destroy(), _do_export()))
-
-            threading.Thread(target=worker, daemon=True).start()
-        else:
-            _do_export()
-
-    def do_plot():
-        keys = get_selected_devices()
-        measurements = get_selected_measurements()
-        if not measurements:
-            messagebox.showinfo('Selection', 'Please select at least one measurement to plot')
-            return
-
-        keys_to_load = []
-        if organizer is not None and getattr(organizer, '_scanned', False):
-            for k in keys:
-                if hasattr(organizer, '_device_folder_map') and k in organizer._device_folder_map:
-                    if not organized_data.get(k) or any(not isinstance(r, dict) or '_source_file' not in r for r in organized_data.get(k, [])):
-                        keys_to_load.append(k)
-
-        def _build_and_plot():
-            plot_data = {}
-            excluded = []
-            for k in keys:
-                records = organized_data.get(k, [])
-                for m in measurements:
-                    rows = []
-                    for r in records:
-                        # try common time fields and fall back to None
-                        t = _get_nested_value(r, 'time') or _get_nested_value(r, 'timestamp') or _get_nested_value(r, 'ts')
-                        # allow dot/underscore alternative for measurement key
-                        v = _get_nested_value(r, m) or _get_nested_value(r, m.replace('.', '_'))
-                        if t is None or v is None:
-                            continue
-                        rows.append({'time': t, 'value': v})
-                    # debug: show how many rows were found for this series
-                    try:
-                        print(f"Series {k} - {m}: found {len(rows)} rows")
-                    except Exception:
-                        pass
-                    if not rows:
-                        excluded.append(f"{k} - {m}")
-                        continue
-
-                    # Attempt to clean and validate time/value using pandas if available
-                    try:
-                        import pandas as _pd
-                        df = _pd.DataFrame(rows)
-                        # normalize time and numeric value similar to visualizer
-                        try:
-                            df['time'] = _pd.to_datetime(df['time'], errors='coerce')
-                        except Exception:
-                            df['time'] = _pd.to_datetime(df['time'], errors='coerce')
-                        df['value'] = _pd.to_numeric(df['value'], errors='coerce')
-                        df = df.dropna(subset=['time', 'value'])
-                        if df.empty:
-                            excluded.append(f"{k} - {m}")
-                            continue
-                        df = df.sort_values('time')
-                        series_key = f"{k} - {m}" if len(measurements) > 1 else str(k)
-                        plot_data[series_key] = df.to_dict(orient='records')
-                    except Exception:
-                        # If pandas is unavailable or conversion fails, fall back to raw rows
-                        series_key = f"{k} - {m}" if len(measurements) > 1 else str(k)
-                        plot_data[series_key] = rows
-
-            if not plot_data:
-                msg = 'No plottable data found for selection.'
-                if excluded:
-                    msg += '\nExcluded series:\n' + '\n'.join(excluded[:50])
-                messagebox.showinfo('No data', msg)
-                return
-
-            if excluded:
-                try:
-                    print('Excluded empty series:')
-                    for e in excluded:
-                        print(' -', e)
-                except Exception:
-                    pass
-
-            visualizer.display_graph(plot_data)
-
-        if keys_to_load:
-            progress = tk.Toplevel(root)
-            progress.title('Loading...')
-            ttk.Label(progress, text='Loading device data, please wait...').pack(padx=10, pady=10)
-
-            def worker():
-                for k in keys_to_load:
-                    try:
-                        full = organizer.load_device_full(k)
-                        if full:
-                            organized_data[k] = full
-                    except Exception:
-                        continue
-                root.after(50, lambda: (progress.destroy(), _build_and_plot()))
-
-            threading.Thread(target=worker, daemon=True).start()
-        else:
-            _build_and_plot()
-
-    btn_frame = ttk.Frame(frame)
-    ttk.Button(btn_frame, text='Show Spreadsheet', command=do_spreadsheet).pack(side=tk.LEFT, padx=4)
-    ttk.Button(btn_frame, text='Plot Graph', command=do_plot).pack(side=tk.LEFT, padx=4)
-    ttk.Button(btn_frame, text='Quit', command=_on_close).pack(side=tk.LEFT, padx=4)
-    btn_frame.pack(pady=12)
-
-    root.mainloop()
-        
+import tkinter as tk
+import tkinter.font as tkfont
+from tkinter import ttk, messagebox
+from pathlib import Path
+import queue
+import sys
+import threading
+import time
+
+try:
+    from . import instrument
+    from .prefetch import Prefetcher
+    from .search import SearchIndex
+    from .store import extract_series, record_schema
+except ImportError:  # running as a script from src/
+    import instrument
+    from prefetch import Prefetcher
+    from search import SearchIndex
+    from store import extract_series, record_schema
+
+# devices at the top of the list loaded in the background when the GUI is idle
+_IDLE_PREFETCH = 8
+# ms of quiet after a filter or range change before the idle prefetch starts
+_IDLE_DELAY = 500
+# stages shown in the status bar, in pipeline order
+_STATUS_STAGES = ('walk', 'read', 'decode', 'normalize', 'clean', 'store', 'group',
+                  'plot-build', 'render', 'export')
+# ms of quiet typing before the device search runs
+_SEARCH_DELAY = 150
+# rows moved per mouse wheel notch in the device list
+_WHEEL_ROWS = 3
+
+
+class _VirtualList:
+    """A multiple-selection Listbox that only holds the rows in view.
+
+    rows lists the items shown (positions into the caller's data) and
+    label(item) gives their text. Scrolling refills the listbox from rows,
+    so showing or filtering 10k+ devices costs about a screenful of inserts.
+    Listbox rows are reused while scrolling, so the selection is kept here,
+    as the set of selected items.
+    """
+
+    def __init__(self, master, label, height=10):
+        self.label = label
+        self.rows = []
+        self.selected = set()
+        self.top = 0
+        self._visible = height  # whole rows that fit
+        self.listbox = tk.Listbox(master, selectmode=tk.MULTIPLE, height=height, exportselection=False)
+        self.scroll = ttk.Scrollbar(master, orient=tk.VERTICAL, command=self._yview)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scroll.pack(side=tk.LEFT, fill=tk.Y)
+        lb = self.listbox
+        self._line = (tkfont.Font(root=lb, font=lb.cget('font')).metrics('linespace') + 1
+                      + 2 * lb.winfo_pixels(lb.cget('selectborderwidth')))
+        self._border = 2 * (lb.winfo_pixels(lb.cget('borderwidth')) + lb.winfo_pixels(lb.cget('highlightthickness')))
+        lb.bind('<Configure>', self._on_configure)
+        lb.bind('<<ListboxSelect>>', self._on_select)
+        lb.bind('<MouseWheel>', self._on_wheel)
+        lb.bind('<Button-4>', self._on_wheel)
+        lb.bind('<Button-5>', self._on_wheel)
+        lb.bind('<Up>', lambda e: self._on_arrow(-1))
+        lb.bind('<Down>', lambda e: self._on_arrow(1))
+
+    def set_rows(self, rows):
+        """Show rows from the top; selected items no longer shown are dropped."""
+        self.rows = rows
+        if self.selected:
+            shown = set(rows)
+            self.selected = {i for i in self.selected if i in shown}
+        self.top = 0
+        self.refresh()
+
+    def append(self, items):
+        """Add items at the end of the rows."""
+        start = len(self.rows)
+        self.rows.extend(items)
+        if start < self.top + self._visible + 1:
+            self.refresh()
+        else:
+            self._update_scrollbar()
+
+    def selection(self):
+        """Selected items, in row order."""
+        return [i for i in self.rows if i in self.selected] if self.selected else []
+
+    def refresh(self):
+        """Refill the listbox with the rows in view (e.g. after relabelling)."""
+        lb = self.listbox
+        lb.delete(0, tk.END)
+        window = self.rows[self.top:self.top + self._visible + 1]
+        if window:
+            lb.insert(tk.END, *[self.label(i) for i in window])
+        for j, i in enumerate(window):
+            if i in self.selected:
+                lb.selection_set(j)
+        self._update_scrollbar()
+
+    def scroll_to(self, top):
+        top = max(0, min(top, len(self.rows) - self._visible))
+        if top != self.top:
+            self.top = top
+            self.refresh()
+
+    def _update_scrollbar(self):
+        n = len(self.rows)
+        if n <= self._visible:
+            self.scroll.set(0.0, 1.0)
+        else:
+            self.scroll.set(self.top / n, (self.top + self._visible) / n)
+
+    def _yview(self, *args):
+        # Scrollbar command: ('moveto', fraction) or ('scroll', n, 'units' | 'pages')
+        if args[0] == 'moveto':
+            self.scroll_to(int(float(args[1]) * len(self.rows)))
+        elif args[0] == 'scroll':
+            step = max(1, self._visible - 1) if args[2] == 'pages' else 1
+            self.scroll_to(self.top + int(args[1]) * step)
+
+    def _on_configure(self, event):
+        visible = max(1, (event.height - self._border) // self._line)
+        if visible != self._visible:
+            self._visible = visible
+            self.top = max(0, min(self.top, len(self.rows) - visible))
+            self.refresh()
+
+    def _on_select(self, event=None):
+        shown = set(self.listbox.curselection())
+        for j, i in enumerate(self.rows[self.top:self.top + self._visible + 1]):
+            if j in shown:
+                self.selected.add(i)
+            else:
+                self.selected.discard(i)
+
+    def _on_wheel(self, event):
+        if event.num == 4 or getattr(event, 'delta', 0) > 0:
+            self.scroll_to(self.top - _WHEEL_ROWS)
+        else:
+            self.scroll_to(self.top + _WHEEL_ROWS)
+        return 'break'
+
+    def _on_arrow(self, step):
+        # moving the cursor past either edge scrolls the rows under it
+        j = self.listbox.index(tk.ACTIVE) + step
+        if 0 <= j < self._visible:
+            return None
+        self.scroll_to(self.top + step)
+        self.listbox.activate(min(max(j, 0), self._visible - 1))
+        return 'break'
+
+
+def run_gui(organized_data, visualizer, organizer=None, source_used=None, loaded_files=None, on_exit=None,
+            scan_dir=None):
+    """Run a simple tkinter GUI for device and measurement selection.
+
+    organized_data: dict mapping device_key -> list[records]
+    visualizer: Visualizer instance with display_spreadsheet and display_graph
+    organizer: Organizer instance (optional) used for on-demand loads when scan was used
+    on_exit: optional callable run when the window is closed (e.g. to dump stats)
+    scan_dir: optional directory (or archive) for organizer to scan in the
+        background once the window is up; devices are added to the list as
+        they are found
+    """
+    root = tk.Tk()
+    root.title('Dataset Organizer')
+    root.geometry('900x650')
+
+    # Full device loads run ahead of the user in a small worker pool, keyed by
+    # (device, window): highlighted devices first, then the top of the list.
+    prefetch = None
+
+    def _start_prefetch():
+        nonlocal prefetch
+        if prefetch is None and organizer is not None and getattr(organizer, '_scanned', False):
+            # parse-cache rows are saved once a burst of prefetches is over
+            prefetch = Prefetcher(lambda key: organizer.load_device_full(key[0], since=key[1][0], until=key[1][1]),
+                                  on_idle=organizer.flush_cache)
+
+    # a background scan must finish before devices can be loaded
+    scanning = scan_dir is not None and organizer is not None
+    if not scanning:
+        _start_prefetch()
+
+    # stage timings of loads, plots and exports (the organizer's, when there is one)
+    stats = organizer.stats if organizer is not None else instrument.Stats()
+
+    # Ensure closing the main window attempts to clean up plots and threads
+    def _on_close():
+        try:
+            if prefetch is not None:
+                prefetch.shutdown()
+            if organizer is not None:
+                organizer.flush_cache()
+            if on_exit is not None:
+                try:
+                    on_exit()
+                except Exception:
+                    pass
+            # Close any matplotlib windows to avoid non-daemon GUI threads
+            # (only if something plotted: importing pyplot here is slow)
+            plt = sys.modules.get('matplotlib.pyplot')
+            if plt is not None:
+                try:
+                    plt.close('all')
+                except Exception:
+                    pass
+            # Destroy any remaining Toplevels
+            for w in list(root.winfo_children()):
+                try:
+                    if isinstance(w, tk.Toplevel):
+                        w.destroy()
+                except Exception:
+                    pass
+            try:
+                root.quit()
+            except Exception:
+                pass
+            try:
+                root.destroy()
+            except Exception:
+                pass
+        finally:
+            # As a last-resort, force the process to exit to avoid leaving the
+            # terminal stuck (this will immediately terminate Python).
+            try:
+                import os
+                os._exit(0)
+            except Exception:
+                pass
+
+    root.protocol('WM_DELETE_WINDOW', _on_close)
+
+    # status bar: what the last action spent its time on
+    status_var = tk.StringVar(value='Ready')
+    ttk.Label(root, textvariable=status_var, relief=tk.SUNKEN, anchor='w',
+              padding=(6, 2)).pack(side=tk.BOTTOM, fill=tk.X)
+
+    def _report(action, before):
+        done = instrument.diff_summary(stats.summary(), before)
+        status_var.set(f"{action}: {instrument.format_summary(done, _STATUS_STAGES) or 'nothing to do'}")
+
+    frame = ttk.Frame(root, padding=10)
+    frame.pack(fill=tk.BOTH, expand=True)
+
+    hdr = f"Source: {source_used if source_used else 'project data'}"
+    ttk.Label(frame, text=hdr).pack(anchor='w')
+    files_label = ttk.Label(frame, text=f"Loaded files: {len(loaded_files) if loaded_files else 0}")
+    files_label.pack(anchor='w')
+
+    dev_header = ttk.Frame(frame)
+    ttk.Label(dev_header, text='Devices (select one or more):').pack(side=tk.LEFT)
+    count_var = tk.StringVar()
+    ttk.Label(dev_header, textvariable=count_var).pack(side=tk.LEFT, padx=(8, 0))
+    scan_bar = ttk.Progressbar(dev_header, length=200)
+    dev_header.pack(anchor='w', fill=tk.X, pady=(10, 0))
+    dev_keys = list(organized_data.keys())
+
+    # Try to load known device list for friendly names
+    try:
+        from devices import devices as DEVICE_LIST
+    except Exception:
+        DEVICE_LIST = []
+
+    def _extract_folder(first):
+        if not first or not isinstance(first, dict):
+            return None
+        sf = first.get('_source_file')
+        if not sf:
+            return None
+        try:
+            sf = str(sf)
+            if '::' in sf:
+                # archive member ('archive::Profile/devEUI/file.json'): label
+                # it by its top-level folder, like data/raw/<folder> below
+                member_parts = Path(sf.split('::', 1)[1]).parts
+                if len(member_parts) > 1:
+                    return member_parts[0]
+                sf = sf.split('::', 1)[1]
+            p = Path(sf)
+            parts = [part for part in p.parts]
+            lowered = [part.lower() for part in parts]
+            folder = None
+            if 'data' in lowered:
+                try:
+                    di = lowered.index('data')
+                    if di + 1 < len(lowered) and lowered[di + 1] == 'raw':
+                        if di + 2 < len(parts):
+                            folder = parts[di + 2]
+                except Exception:
+                    pass
+            if not folder:
+                parent = p.parent.name
+                if parent and parent.lower() not in {'data', 'raw', 'processed', 'dataset'}:
+                    folder = parent
+            if not folder:
+                folder = p.stem
+            return folder
+        except Exception:
+            return None
+
+    def _get_nested(first, key):
+        if not isinstance(first, dict):
+            return None
+        if key in first and first.get(key):
+            return first.get(key)
+        if '.' in key:
+            cur = first
+            for p in key.split('.'):
+                if isinstance(cur, dict) and p in cur:
+                    cur = cur[p]
+                else:
+                    cur = None
+                    break
+            return cur
+        # try lowercase match
+        lk = key.lower()
+        for kf, v in first.items():
+            if kf.lower() == lk and v:
+                return v
+        return None
+
+    def _get_name_from_record(first):
+        if not first or not isinstance(first, dict):
+            return None
+        candidates = ['deviceName', 'deviceProfileName', 'device_name', 'device_label', 'node_name', 'name']
+        blacklist = {'chirpstack', 'the things network', 'ttn', 'lorawan', 'lora'}
+        for c in candidates:
+            try:
+                v = _get_nested(first, c)
+                if v:
+                    sval = str(v).strip()
+                    if sval and sval.lower() not in blacklist:
+                        return sval
+            except Exception:
+                continue
+        for kf, v in first.items():
+            lk = kf.lower()
+            if 'device' in lk and 'name' in lk and v:
+                sval = str(v).strip()
+                if sval and sval.lower() not in blacklist:
+                    return sval
+        # match DEVICE_LIST names inside values
+        for dev in DEVICE_LIST:
+            try:
+                dname = dev.name.lower()
+                for v in first.values():
+                    try:
+                        if dname in str(v).lower():
+                            return dev.name
+                    except Exception:
+                        continue
+            except Exception:
+                continue
+        return None
+
+    def _format_label(device_id, folder=None, subname=None):
+        parts = []
+        if folder:
+            parts.append(str(folder))
+        if subname:
+            parts.append(str(subname))
+        parts.append(str(device_id))
+        return ' — '.join(parts)
+
+    def _device_label(k):
+        """Label a device by its folder, name from its first record, and id."""
+        label = None
+        try:
+            records = organized_data.get(k)
+            if not records:
+                ks = [kk for kk in organized_data.keys() if str(kk) == str(k)]
+                if ks:
+                    records = organized_data.get(ks[0])
+            first = records[0] if records and len(records) > 0 else None
+            folder = _extract_folder(first)
+            name_candidate = _get_name_from_record(first)
+            # If the extracted name is identical to the device id, don't duplicate it
+            try:
+                if name_candidate and str(name_candidate).strip() == str(k).strip():
+                    name_candidate = None
+            except Exception:
+                pass
+            # If the extracted folder equals the device id, don't include it
+            try:
+                if folder and str(folder).strip() == str(k).strip():
+                    folder = None
+            except Exception:
+                pass
+            if folder and name_candidate:
+                label = _format_label(k, folder=folder, subname=name_candidate)
+            elif name_candidate:
+                label = _format_label(k, subname=name_candidate)
+            elif folder:
+                label = _format_label(k, folder=folder)
+            else:
+                matched = False
+                for dev in DEVICE_LIST:
+                    try:
+                        if str(k) == dev.dev_eui or str(k) == dev.dev_addr or str(k) == dev.gateway_eui or str(k) == dev.name:
+                            label = _format_label(k, subname=dev.name)
+                            matched = True
+                            break
+                    except Exception:
+                        continue
+                if not matched:
+                    label = str(k)
+        except Exception:
+            label = str(k)
+        return label
+
+    dev_labels = [_device_label(k) for k in dev_keys]
+
+    def _search_texts(i):
+        """What device i is found by: its label (folder, name, id), its id
+        and the device and profile names of its first record."""
+        k = dev_keys[i]
+        records = organized_data.get(k)
+        first = records[0] if records and len(records) > 0 else None
+        names = []
+        if isinstance(first, dict):
+            for key in ('deviceName', 'deviceProfileName', 'deviceInfo.deviceName', 'deviceInfo.deviceProfileName'):
+                try:
+                    v = _get_nested(first, key)
+                except Exception:
+                    v = None
+                if v and not isinstance(v, (dict, list)):
+                    names.append(v)
+        return (dev_labels[i], k, *names)
+
+    search = SearchIndex()
+    for i in range(len(dev_keys)):
+        search.add(*_search_texts(i))
+
+    # container for search + listbox
+    dev_container = ttk.Frame(frame)
+    dev_container.pack(fill=tk.BOTH, expand=False)
+
+    search_var = tk.StringVar(value='')
+    search_frame = ttk.Frame(dev_container)
+    ttk.Label(search_frame, text='Search devices:').pack(side=tk.LEFT)
+    search_entry = ttk.Entry(search_frame, textvariable=search_var)
+    search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(6, 0))
+    search_frame.pack(fill=tk.X, pady=(0, 6))
+
+    dev_listbox_frame = ttk.Frame(dev_container)
+    dev_listbox_frame.pack(fill=tk.BOTH, expand=True)
+    # only the rows in view are in the Tk listbox; dev_list.rows holds the
+    # positions in dev_keys of every device shown
+    dev_list = _VirtualList(dev_listbox_frame, lambda i: dev_labels[i])
+    dev_list.set_rows(list(range(len(dev_keys))))
+
+    search_job = None
+
+    def filter_devices(event=None):
+        nonlocal search_job
+        if search_job is not None:
+            root.after_cancel(search_job)
+            search_job = None
+        dev_list.set_rows(search.query(search_var.get()))
+        _update_count()
+        _schedule_idle_prefetch()
+
+    def _schedule_filter(*args):
+        """Search once typing pauses for _SEARCH_DELAY ms."""
+        nonlocal search_job
+        if search_job is not None:
+            root.after_cancel(search_job)
+        search_job = root.after(_SEARCH_DELAY, filter_devices)
+
+    search_var.trace_add('write', _schedule_filter)
+    search_entry.bind('<Return>', filter_devices)
+
+    scanned_files = 0
+
+    def _update_count():
+        text = f'{len(dev_keys):,} found'
+        if len(dev_list.rows) != len(dev_keys):
+            text += f', {len(dev_list.rows):,} shown'
+        if scanning:
+            text += f' (scanning, {scanned_files:,} files so far)'
+        count_var.set(text)
+
+    def _add_devices(found):
+        """Append newly found devices (key -> sample records) to the list,
+        showing those matching the current search."""
+        q = search_var.get()
+        shown = []
+        relabel = False
+        for k, samples in found.items():
+            if k in organized_data:
+                if k not in loaded_with:
+                    # the final scan step may bring samples a device lacked
+                    relabel = relabel or bool(samples and not organized_data[k])
+                    organized_data[k] = samples
+                continue
+            organized_data[k] = samples
+            dev_keys.append(k)
+            dev_labels.append(_device_label(k))
+            i = search.add(*_search_texts(len(dev_keys) - 1))
+            if search.matches(i, q):
+                shown.append(i)
+        dev_list.append(shown)
+        if relabel:
+            for i, k in enumerate(dev_keys):
+                dev_labels[i] = _device_label(k)
+                search.update(i, *_search_texts(i))
+            filter_devices()
+        _update_count()
+
+    _update_count()
+
+    # Time range for full device loads, relative to the newest scanned record
+    # in the dataset (so a range means the same window for every device and
+    # prefetched loads stay valid). Only files overlapping it are read.
+    time_ranges = {'All data': None, 'Last 24 hours': 86400,
+                   'Last 7 days': 7 * 86400, 'Last 30 days': 30 * 86400}
+    range_var = tk.StringVar(value='All data')
+    range_frame = ttk.Frame(frame)
+    ttk.Label(range_frame, text='Time range:').pack(side=tk.LEFT)
+    range_box = ttk.Combobox(range_frame, textvariable=range_var, values=list(time_ranges),
+                             state='readonly', width=16)
+    range_box.pack(side=tk.LEFT, padx=(6, 0))
+    range_frame.pack(anchor='w', pady=(6, 0))
+
+    dataset_last = None
+
+    def _selected_window():
+        """Return (since, until) epoch seconds for the chosen time range."""
+        nonlocal dataset_last
+        span = time_ranges.get(range_var.get())
+        if span is None or organizer is None:
+            return None, None
+        if dataset_last is None:
+            lasts = []
+            for k in dev_keys:
+                summary = organizer.device_summary(k) or {}
+                if summary.get('last') is not None:
+                    lasts.append(summary['last'])
+            dataset_last = max(lasts) if lasts else time.time()
+        return dataset_last - span, None
+
+    # (window, columns) each device was loaded with by organizer.load_device_full;
+    # columns is None for a load of every field. Scanned devices only hold a
+    # few sample records until then.
+    loaded_with = {}
+
+    def _keys_needing_load(keys, window, columns=None):
+        if organizer is None or not getattr(organizer, '_scanned', False):
+            return []
+        folder_map = getattr(organizer, '_device_folder_map', None) or {}
+        out = []
+        for k in keys:
+            if k not in folder_map:
+                continue
+            have = loaded_with.get(k)
+            if (have is None or have[0] != window
+                    or (have[1] is not None and (columns is None or not set(columns) <= set(have[1])))):
+                out.append(k)
+        return out
+
+    def _store(k, full, window, columns):
+        # an empty windowed load means no data in range, not "keep the samples"
+        if full or window[0] is not None:
+            organized_data[k] = full
+        loaded_with[k] = (window, columns)
+
+    def _adopt(key, fut):
+        """Main-thread callback for a finished prefetch: make its data resident."""
+        k, window = key
+        prefetch.forget(key)
+        if fut.cancelled() or fut.exception() is not None or window != _selected_window():
+            return
+        if k in _keys_needing_load([k], window):
+            _store(k, fut.result(), window, None)
+
+    def _prefetch(keys, priority):
+        if prefetch is None:
+            return
+        window = _selected_window()
+        for k in _keys_needing_load(keys, window):
+            key = (k, window)
+            if prefetch.known(key):
+                prefetch.request(key, priority)  # may move it up the queue
+                continue
+            fut = prefetch.request(key, priority)
+            fut.add_done_callback(lambda f, key=key: root.after(0, lambda: _adopt(key, f)))
+
+    idle_job = None
+
+    def _schedule_idle_prefetch(event=None):
+        """Prefetch the top of the device list once the user pauses."""
+        nonlocal idle_job
+        if prefetch is None:
+            return
+        if idle_job is not None:
+            root.after_cancel(idle_job)
+
+        def run():
+            nonlocal idle_job
+            idle_job = None
+            _prefetch([dev_keys[i] for i in dev_list.rows[:_IDLE_PREFETCH]], priority=1)
+
+        idle_job = root.after(_IDLE_DELAY, run)
+
+    def _on_range_change(event=None):
+        if prefetch is not None:
+            window = _selected_window()
+            prefetch.discard(lambda key: key[1] != window)
+        _schedule_idle_prefetch()
+
+    range_box.bind('<<ComboboxSelected>>', _on_range_change)
+
+    def _on_highlight(event=None):
+        _prefetch([dev_keys[i] for i in dev_list.selection()], priority=0)
+
+    # after dev_list's own binding, which records the selection
+    dev_list.listbox.bind('<<ListboxSelect>>', _on_highlight, add='+')
+    _schedule_idle_prefetch()
+
+    def _load_devices(keys, then, columns=None):
+        """Load the selected time range of each device in keys, then call then().
+
+        columns: optional dotted paths; only those fields are loaded. Devices
+        already being prefetched are taken from the prefetcher (whose loads
+        carry every field) instead of being loaded again. While the
+        background scan runs, the request waits for it to finish.
+        """
+        if scanning:
+            pending_loads.append((keys, then, columns))
+            status_var.set('Waiting for the device scan to finish...')
+            return
+        window = _selected_window()
+        keys_to_load = _keys_needing_load(keys, window, columns)
+        if not keys_to_load:
+            then()
+            return
+        futures = {}
+        if prefetch is not None:
+            for k in keys_to_load:
+                key = (k, window)
+                if columns is None or prefetch.known(key):
+                    futures[k] = prefetch.request(key, priority=-1)
+
+        def load_all():
+            since, until = window
+            for k in keys_to_load:
+                try:
+                    fut = futures.get(k)
+                    if fut is not None:
+                        full = fut.result()
+                        prefetch.forget((k, window))
+                        _store(k, full, window, None)
+                    else:
+                        _store(k, organizer.load_device_full(k, since=since, until=until, columns=columns),
+                               window, columns)
+                except Exception:
+                    stats.add('load_device', calls=0, failed=1)
+                    continue
+
+        if len(futures) == len(keys_to_load) and all(f.done() for f in futures.values()):
+            # everything is already prefetched: no progress window needed
+            load_all()
+            then()
+            return
+        progress = tk.Toplevel(root)
+        progress.title('Loading...')
+        ttk.Label(progress, text='Loading device data, please wait...').pack(padx=10, pady=10)
+
+        def worker():
+            load_all()
+            if organizer is not None:
+                organizer.flush_cache()
+            root.after(50, lambda: (progress.destroy(), then()))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    # Schema catalogs of scan-sample lists, keyed by device and tied to the
+    # list object so a full load (which replaces it) invalidates the entry.
+    # DeviceRecords cache their own catalog.
+    schema_cache = {}
+
+    def _device_schema(k):
+        records = organized_data.get(k, [])
+        cached = schema_cache.get(k)
+        if cached is not None and cached[0] is records:
+            return cached[1]
+        schema = record_schema(records)
+        schema_cache[k] = (records, schema)
+        return schema
+
+    # Measurements list
+    ttk.Label(frame, text='Measurements (select one or more):').pack(anchor='w', pady=(10, 0))
+    meas_frame = ttk.Frame(frame)
+    meas_frame.pack(fill=tk.BOTH, expand=False)
+    meas_listbox = tk.Listbox(meas_frame, selectmode=tk.MULTIPLE, height=8)
+    meas_scroll = ttk.Scrollbar(meas_frame, orient=tk.VERTICAL, command=meas_listbox.yview)
+    meas_listbox.config(yscrollcommand=meas_scroll.set)
+    meas_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    meas_scroll.pack(side=tk.LEFT, fill=tk.Y)
+    
+    def populate_measurements():
+        sel = dev_list.selection()
+        if not sel:
+            messagebox.showinfo('Selection', 'Please select at least one device first')
+            return
+        visible_keys = [dev_keys[i] for i in sel]
+        before = stats.summary()
+
+        def _update_meas():
+            # union of the per-device schema catalogs: O(devices), not O(records)
+            candidate_keys = set()
+            for k in visible_keys:
+                candidate_keys.update(_device_schema(k))
+            exclude = {'device_id', 'time', 'device', 'Device', '_source_file'}
+            candidates = [m for m in sorted(candidate_keys) if m not in exclude]
+            meas_listbox.delete(0, tk.END)
+            for m in candidates:
+                meas_listbox.insert(tk.END, m)
+            _report('Measurements', before)
+
+        _load_devices(visible_keys, _update_meas)
+
+    ttk.Button(frame, text='Refresh Measurements', command=populate_measurements).pack(pady=6)
+
+    # Display option
+    display_var = tk.StringVar(value='graph')
+    disp_frame = ttk.Frame(frame)
+    ttk.Radiobutton(disp_frame, text='Graph', variable=display_var, value='graph').pack(side=tk.LEFT)
+    ttk.Radiobutton(disp_frame, text='Spreadsheet', variable=display_var, value='spreadsheet').pack(side=tk.LEFT)
+    disp_frame.pack(anchor='w', pady=(10, 0))
+
+    def get_selected_devices():
+        keys = [dev_keys[i] for i in dev_list.selection()]
+        if not keys:
+            keys = dev_keys
+        return keys
+
+    def get_selected_measurements():
+        sel = meas_listbox.curselection()
+        return [meas_listbox.get(i) for i in sel]
+
+    def do_spreadsheet():
+        keys = get_selected_devices()
+
+        # export only the selected measurements, when there are any
+        measurements = get_selected_measurements()
+        columns = ['time'] + measurements if measurements else None
+        before = stats.summary()
+
+        def _do_export():
+            selected_data = {k: organized_data[k] for k in keys}
+            with instrument.recording(stats):
+                visualizer.display_spreadsheet(selected_data, columns=columns)
+            _report('Spreadsheet', before)
+            messagebox.showinfo('Export', 'Spreadsheet saved (see output.csv)')
+
+        _load_devices(keys, _do_export, columns)
+
+    def do_plot():
+        keys = get_selected_devices()
+        measurements = get_selected_measurements()
+        if not measurements:
+            messagebox.showinfo('Selection', 'Please select at least one measurement to plot')
+            return
+
+        before = stats.summary()
+
+        def _build_and_plot():
+            plot_data = {}
+            excluded = []
+            with stats.span('plot-build') as counts:
+                for k in keys:
+                    records = organized_data.get(k, [])
+                    for m in measurements:
+                        # pull time + values for the whole device in one pass
+                        try:
+                            times, values = extract_series(records, m)
+                        except Exception:
+                            times, values = (), ()
+                            counts['failed'] = counts.get('failed', 0) + 1
+                        if len(times) == 0:
+                            excluded.append(f"{k} - {m}")
+                            continue
+                        series_key = f"{k} - {m}" if len(measurements) > 1 else str(k)
+                        # hand the NumPy arrays straight to the visualizer
+                        plot_data[series_key] = (times, values)
+                        counts['records'] = counts.get('records', 0) + len(times)
+                counts['skipped'] = len(excluded)
+
+            if not plot_data:
+                msg = 'No plottable data found for selection.'
+                if excluded:
+                    msg += '\nExcluded series:\n' + '\n'.join(excluded[:50])
+                _report('Plot', before)
+                messagebox.showinfo('No data', msg)
+                return
+
+            if excluded:
+                try:
+                    print('Excluded empty series:')
+                    for e in excluded:
+                        print(' -', e)
+                except Exception:
+                    pass
+
+            with instrument.recording(stats):
+                visualizer.display_graph(plot_data)
+            _report('Plot', before)
+
+        # plotting needs only the time and the selected measurements
+        _load_devices(keys, _build_and_plot, ['time'] + measurements)
+
+    # Background scan: the worker thread only walks the tree and queues scan
+    # steps; the Tk thread drains the queue and updates the widgets.
+    pending_loads = []
+    scan_queue = queue.Queue()
+
+    def _scan_worker():
+        try:
+            for step in organizer.iter_scan(scan_dir):
+                scan_queue.put(step)
+        except Exception as exc:
+            scan_queue.put(exc)
+        scan_queue.put(None)
+
+    def _poll_scan():
+        nonlocal scanning, scanned_files, dataset_last
+        found = {}
+        failed = None
+        while True:
+            try:
+                step = scan_queue.get_nowait()
+            except queue.Empty:
+                break
+            if step is None:
+                scanning = False
+                break
+            if isinstance(step, Exception):
+                failed = step
+                continue
+            found.update(step.devices)
+            scanned_files = step.files
+            if step.expected:
+                scan_bar.stop()
+                scan_bar.config(mode='determinate', maximum=step.expected, value=min(step.files, step.expected))
+        _add_devices(found)
+        if scanning:
+            root.after(100, _poll_scan)
+            return
+        scan_bar.stop()
+        scan_bar.pack_forget()
+        files_label.config(text=f"Loaded files: {len(getattr(organizer, '_loaded_files', None) or [])}")
+        _update_count()
+        if failed is not None:
+            status_var.set(f'Scan failed: {failed}')
+        else:
+            _report('Scan', scan_started)
+        dataset_last = None
+        _start_prefetch()
+        _schedule_idle_prefetch()
+        while pending_loads:
+            _load_devices(*pending_loads.pop(0))
+
+    if scanning:
+        scan_started = stats.summary()
+        scan_bar.config(mode='indeterminate')
+        scan_bar.pack(side=tk.LEFT, padx=(8, 0))
+        scan_bar.start(15)
+        threading.Thread(target=_scan_worker, daemon=True).start()
+        root.after(100, _poll_scan)
+
+    btn_frame = ttk.Frame(frame)
+    ttk.Button(btn_frame, text='Show Spreadsheet', command=do_spreadsheet).pack(side=tk.LEFT, padx=4)
+    ttk.Button(btn_frame, text='Plot Graph', command=do_plot).pack(side=tk.LEFT, padx=4)
+    ttk.Button(btn_frame, text='Quit', command=_on_close).pack(side=tk.LEFT, padx=4)
+    btn_frame.pack(pady=12)
+
+    root.mainloop()
+        
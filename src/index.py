@@ -0,0 +1,608 @@
+"""Incremental index of a dataset directory used by Organizer.scan_dataset.
+
+The index records, per data file, the device it belongs to, how many
+records it holds and its first/last timestamps, plus per-device summaries
+(folder, file list, first/last timestamps, record count and a few sample
+records). Directory mtimes are remembered as well, so a later refresh only
+stats directories and parses files that were added since the previous run.
+When a cache_dir is given the index is persisted there as a JSON manifest.
+
+The root may also be a tar/zip archive (see archive.py); its members are
+indexed under 'archive::member' paths together with their offsets.
+"""
+import functools
+import hashlib
+import itertools
+import json
+import os
+import re
+import time
+from pathlib import Path
+
+try:
+    from . import archive as archives
+    from . import decoder
+    from . import instrument
+    from . import ndjson
+    from . import segment
+    from .utils import walk_data_files
+except ImportError:  # running as a script from src/
+    import archive as archives
+    import decoder
+    import instrument
+    import ndjson
+    import segment
+    from utils import walk_data_files
+
+# key names (lowercased) that identify a device inside a record
+_ID_CANDIDATES = {'dev_eui', 'deveui', 'devaddr', 'dev_addr', 'device_id', 'deviceid'}
+TIME_KEYS = ('time', 'timestamp', 'datetime', 'date', 'ts')
+_HEX_FOLDER = re.compile(r'[0-9a-fA-F]{8,32}')
+# fast-path patterns applied to the raw bytes at the start of a file
+_FAST_PREFIX_BYTES = 4096
+_DEV_EUI_RE = re.compile(rb'"dev_?eui"\s*:\s*"([^"]+)"', re.IGNORECASE)
+_DEV_ADDR_RE = re.compile(rb'"dev_?addr"\s*:\s*"([^"]+)"', re.IGNORECASE)
+_TIME_RE = re.compile(rb'"time"\s*:\s*"([^"]+)"')
+# fraction of seconds in an ISO8601 time; fromisoformat before Python 3.11
+# takes only 3 or 6 digits (ChirpStack writes up to 9) and no 'Z' suffix
+_ISO_FRACTION = re.compile(r'\.(\d+)')
+
+
+def find_device_id(o):
+    """Search a (nested) record for something that looks like a device id."""
+    if o is None:
+        return None
+    if isinstance(o, dict):
+        for k, v in o.items():
+            lk = k.strip().lower()
+            if lk in _ID_CANDIDATES and v is not None:
+                return str(v)
+            if 'dev' in lk and ('eui' in lk or 'addr' in lk or 'id' in lk) and v is not None:
+                return str(v)
+            # recurse into nested dicts/lists
+            if isinstance(v, dict):
+                got = find_device_id(v)
+                if got:
+                    return got
+            if isinstance(v, list):
+                for it in v:
+                    got = find_device_id(it)
+                    if got:
+                        return got
+    return None
+
+
+@functools.lru_cache(maxsize=4096)
+def _folder_device_id_for_dir(dir_path):
+    for part in reversed(Path(dir_path).parts):
+        if _HEX_FOLDER.fullmatch(part):
+            return part
+    return None
+
+
+def folder_device_id(path):
+    """Return the nearest parent folder name that looks like a hex devEUI.
+
+    Resolution is cached per directory, so sibling files share one lookup.
+    """
+    return _folder_device_id_for_dir(os.path.dirname(str(path)))
+
+
+def resolve_device_id(sample, path, dev_id=None):
+    """Pick the device key for a file from its sample record and location.
+
+    dev_id: an id already extracted from the file (e.g. by the fast path);
+    when omitted the sample record is searched generically.
+    """
+    if dev_id is None:
+        dev_id = find_device_id(sample)
+    folder_candidate = folder_device_id(path)
+    # if sample-derived id looks like a UUID but folder looks like hex devEUI, prefer folder
+    if dev_id and '-' in str(dev_id) and folder_candidate:
+        dev_id = folder_candidate
+    if not dev_id and folder_candidate:
+        dev_id = folder_candidate
+    if not dev_id:
+        # fallback to folder-based key (use immediate parent folder name)
+        dev_id = Path(path).parent.name
+    return str(dev_id)
+
+
+def to_epoch(value):
+    """Convert an ISO8601 string, datetime or numeric timestamp to epoch seconds."""
+    from datetime import datetime, timezone
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        # treat very large numbers as milliseconds
+        return float(value) / 1000.0 if value > 1e11 else float(value)
+    text = str(value).strip()
+    if text.endswith(('Z', 'z')):
+        text = text[:-1] + '+00:00'
+    text = _ISO_FRACTION.sub(lambda m: '.' + m.group(1)[:6].ljust(6, '0'), text, count=1)
+    try:
+        dt = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def record_time(rec):
+    """Return the epoch-seconds timestamp of a top-level record, if any."""
+    for k in TIME_KEYS:
+        if k in rec:
+            return to_epoch(rec[k])
+    for k, v in rec.items():
+        if k.strip().lower() in TIME_KEYS:
+            return to_epoch(v)
+    return None
+
+
+def time_column(columns):
+    """Return the column record_time would read for records with these keys."""
+    for k in TIME_KEYS:
+        if k in columns:
+            return k
+    for k in columns:
+        if str(k).strip().lower() in TIME_KEYS:
+            return k
+    return None
+
+
+def iter_file_records(path, since=None, until=None):
+    """Yield the record dicts of a CSV/JSON/NDJSON file one at a time.
+
+    CSV files are streamed row by row and NDJSON files are decoded line by
+    line from a memory map (see ndjson.py); a JSON document is read as
+    bytes in one call, decoded whole and its records yielded in order.
+    `path` may also be an 'archive::member' virtual path.
+
+    since/until (epoch seconds) let segments and NDJSON files skip the
+    parts of the file outside that window. Records outside it may still be
+    yielded; callers filter exactly.
+    """
+    arc, member = archives.split_virtual_path(path)
+    if member is not None:
+        for _member, data in archives.read_members(arc, [member]):
+            yield from iter_bytes_records(data, archives.member_suffix(member))
+        return
+    suffix = os.path.splitext(str(path))[1].lower()
+    if suffix == segment.SEGMENT_SUFFIX:
+        yield from segment.iter_segment_records(path, since=since, until=until)
+        return
+    if suffix == '.csv':
+        import csv
+        with open(path, 'r', encoding='utf-8') as fh:
+            for row in csv.DictReader(fh):
+                yield {k.strip(): v for k, v in row.items()}
+        return
+    if suffix in ndjson.NDJSON_SUFFIXES:
+        yield from ndjson.iter_records(path, since=since, until=until)
+        return
+    start = time.perf_counter()
+    data = decoder.read_bytes(path)
+    read = time.perf_counter()
+    obj = decoder.loads(data)
+    objs = obj if isinstance(obj, list) else [obj]
+    stats = instrument.active()
+    stats.add('read', read - start, files=1, bytes=len(data))
+    stats.add('decode', time.perf_counter() - read, records=len(objs))
+    for o in objs:
+        if isinstance(o, dict):
+            yield o
+
+
+def iter_bytes_records(data, suffix):
+    """Yield the record dicts of a data file's contents (e.g. an archive member)."""
+    if suffix == segment.SEGMENT_SUFFIX:
+        yield from segment.iter_segment_bytes(data)
+        return
+    if suffix == '.csv':
+        import csv
+        import io
+        for row in csv.DictReader(io.StringIO(data.decode('utf-8'))):
+            yield {k.strip(): v for k, v in row.items()}
+        return
+    if suffix in ndjson.NDJSON_SUFFIXES:
+        objs = (decoder.loads(line) for line in data.splitlines() if line.strip())
+    else:
+        obj = decoder.loads(data)
+        objs = obj if isinstance(obj, list) else [obj]
+    for o in objs:
+        if isinstance(o, dict):
+            yield o
+
+
+def iter_sources(files, since=None, until=None):
+    """Yield (path, record iterator) for each file, in order.
+
+    since/until are passed on to iter_file_records for files on disk.
+    Archive members are fetched in bulk (one archives.read_virtual pass per
+    run of consecutive members) instead of one seek per member. Errors
+    surface when a record iterator is consumed, per file.
+    """
+    files = [str(f) for f in files]
+    i = 0
+    while i < len(files):
+        if archives.split_virtual_path(files[i])[1] is None:
+            yield files[i], iter_file_records(files[i], since=since, until=until)
+            i += 1
+            continue
+        j = i
+        while j < len(files) and archives.split_virtual_path(files[j])[1] is not None:
+            j += 1
+        blobs = archives.read_virtual(files[i:j])
+        for f in files[i:j]:
+            data = blobs.pop(f, None)
+            if data is None:
+                yield f, _unreadable(f)
+            else:
+                yield f, iter_bytes_records(data, archives.member_suffix(f))
+        i = j
+
+
+def _unreadable(path):
+    raise OSError(f'Cannot read archive member: {path}')
+    yield  # makes this a generator, so the error is raised on iteration
+
+
+def read_records(path):
+    """Read every record dict from a CSV/JSON/NDJSON file."""
+    return list(iter_file_records(path))
+
+
+def summarize_file(path):
+    """Return (sample_record, record_count, tmin, tmax) for a data file."""
+    return summarize_records(read_records(path))
+
+
+def summarize_records(records):
+    """Return (sample_record, record_count, tmin, tmax) for a list of records."""
+    times = [t for t in (record_time(r) for r in records) if t is not None]
+    sample = records[0] if records else None
+    return sample, len(records), (min(times) if times else None), (max(times) if times else None)
+
+
+def fast_summarize_file(path, prefix_bytes=_FAST_PREFIX_BYTES):
+    """Summarize a single-uplink JSON file from a bounded prefix of its bytes.
+
+    ChirpStack writes one uplink object per file with the top-level 'time'
+    ahead of 'deviceInfo', and 'deviceInfo.devEui' within the first few
+    hundred bytes. Returns (device_id, record_count, tmin, tmax) without
+    decoding the JSON, or None when the prefix does not look like that so
+    the caller can fall back to a full parse.
+
+    Packed segments are summarized from their footer and NDJSON files from
+    their line index; the device comes from the footer or first record.
+    """
+    if segment.is_segment(path):
+        footer = segment.read_footer(path)
+        if footer is None:
+            return None
+        return footer.get('device'), footer['count'], footer['tmin'], footer['tmax']
+    if ndjson.is_ndjson(path):
+        first, count, tmin, tmax = ndjson.summarize(path)
+        return (find_device_id(first) if first else None), count, tmin, tmax
+    if not str(path).lower().endswith('.json'):
+        return None
+    with open(path, 'rb') as fh:
+        head = fh.read(prefix_bytes)
+    return fast_summarize_bytes(head)
+
+
+def fast_summarize_bytes(head):
+    """fast_summarize_file for bytes already in memory (e.g. an archive member)."""
+    head = head[:_FAST_PREFIX_BYTES]
+    if not head.lstrip()[:1] == b'{':
+        return None
+    m = _DEV_EUI_RE.search(head) or _DEV_ADDR_RE.search(head)
+    if not m:
+        return None
+    dev_id = m.group(1).decode('utf-8', 'replace')
+    t = None
+    tm = _TIME_RE.search(head)
+    info_pos = head.find(b'"deviceInfo"')
+    if tm and (info_pos < 0 or tm.start() < info_pos):
+        t = to_epoch(tm.group(1).decode('ascii', 'replace'))
+    return dev_id, 1, t, t
+
+
+def _file_stat(path):
+    """(size, mtime in ns) of path, (None, None) if it cannot be stat'ed."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None, None
+    return st.st_size, st.st_mtime_ns
+
+
+class DatasetIndex:
+    VERSION = 1
+
+    def __init__(self, root, cache_dir=None):
+        self.root = str(root)
+        self.cache_dir = cache_dir
+        # dir path -> {'mtime': ns, 'dirs': [names], 'files': [names]};
+        # for an archive root: {root: {'mtime': ns, 'size': bytes}}
+        self.dirs = {}
+        # file path -> {'device', 'count', 'tmin', 'tmax', 'size', 'mtime'} (device
+        # None if unreadable); archive members ('archive::member') carry the
+        # member's 'offset' and 'size' instead of 'size' and 'mtime'
+        self.files = {}
+        self.devices = {}   # device key -> summary dict, see _summarize
+        self._loaded = False
+        self._dirty = False
+
+    @property
+    def path(self):
+        if not self.cache_dir:
+            return None
+        digest = hashlib.sha1(os.path.abspath(self.root).encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.cache_dir, f'scan_index_{digest}.json')
+
+    def load(self):
+        """Load a previously persisted index, if any."""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            meta = decoder.load_file(self.path)
+            if meta.get('version') != self.VERSION or meta.get('root') != self.root:
+                return
+            self.dirs = meta.get('dirs') or {}
+            self.files = meta.get('files') or {}
+            self.devices = meta.get('devices') or {}
+            if archives.is_archive(self.root) and self.dirs.get(self.root) == self._archive_signature():
+                # reuse the persisted member offsets instead of re-reading the archive
+                archives.remember_offsets(self.root, {
+                    archives.split_virtual_path(f)[1]: (info['offset'], info['size'])
+                    for f, info in self.files.items() if 'offset' in info})
+        except Exception:
+            self.dirs, self.files, self.devices = {}, {}, {}
+
+    def save(self):
+        """Persist the index if it changed since it was loaded."""
+        if not self.path or not self._dirty:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            json.dump({'version': self.VERSION, 'root': self.root, 'dirs': self.dirs,
+                       'files': self.files, 'devices': self.devices}, fh)
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+    def _iter_files(self):
+        """Yield data file paths under root, re-listing only changed directories."""
+        before = dict(self.dirs)
+        for path, _suffix in walk_data_files(self.root, dir_cache=self.dirs):
+            yield path
+        if self.dirs != before:
+            self._dirty = True
+
+    def refresh(self, sample_per_device=1, max_files=None):
+        """Bring the index up to date with the directory tree.
+
+        Only files not already in the index are opened. Returns True if the
+        whole tree was visited (False when stopped early by max_files).
+        """
+        steps = self.iter_refresh(sample_per_device, max_files)
+        while True:
+            try:
+                next(steps)
+            except StopIteration as done:
+                return done.value
+
+    def iter_refresh(self, sample_per_device=1, max_files=None, every=256):
+        """refresh() as a generator, for callers that show devices as they
+        are found.
+
+        Every `every` files (and once at the end) yields (files_seen,
+        new_devices), new_devices mapping each device key seen for the first
+        time since the previous step to its sample records. The per-device
+        summaries in self.devices are only final once the generator is
+        exhausted; its return value is refresh()'s.
+        """
+        self.load()
+        if archives.is_archive(self.root):
+            complete = self._refresh_archive(sample_per_device, max_files)
+            yield len(self.files), {k: list(d['samples']) for k, d in self.devices.items()}
+            return complete
+        seen = []
+        complete = True
+        emitted = set()
+        pending = {}
+        for f in instrument.timed_iter('walk', self._iter_files()):
+            if max_files is not None and len(seen) >= max_files:
+                complete = False
+                break
+            seen.append(f)
+            self._refresh_file(f, sample_per_device)
+            device = self.files[f].get('device')
+            if device is not None and device not in emitted:
+                emitted.add(device)
+                pending[device] = list((self.devices.get(device) or {}).get('samples') or [])
+            if len(seen) % every == 0:
+                yield len(seen), pending
+                pending = {}
+
+        if complete:
+            # forget files that disappeared since the last refresh
+            alive = set(seen)
+            for f in [f for f in self.files if f not in alive]:
+                del self.files[f]
+                self._dirty = True
+        # loose files packed into a segment are read from the segment instead
+        self._summarize(segment.drop_packed(seen), sample_per_device)
+        yield len(seen), pending
+        return complete
+
+    def _refresh_file(self, f, sample_per_device):
+        """Index file f unless its entry is still current."""
+        # files change in place (segments and NDJSON exports grow), so an
+        # entry is current only while the file's size and mtime match
+        size, mtime = _file_stat(f)
+        info = self.files.get(f)
+        if info is not None and info.get('size') == size and info.get('mtime') == mtime:
+            return
+        self._dirty = True
+        if segment.is_segment(f) or ndjson.is_ndjson(f):
+            # the footer / line index summarizes the file; only decode its first record as a sample
+            self._index_file(f, lambda: fast_summarize_file(f),
+                             lambda: list(itertools.islice(iter_file_records(f), 1)), sample_per_device)
+        else:
+            self._index_file(f, lambda: fast_summarize_file(f), lambda: read_records(f), sample_per_device)
+        self.files[f].update(size=size, mtime=mtime)
+
+    def _index_file(self, f, fast, read, sample_per_device):
+        """Add the entry for file f to self.files, collecting a sample record.
+
+        fast() returns a fast-path summary or None; read() returns all of the
+        file's records and is only called when a full parse is needed.
+        """
+        try:
+            summary = fast()
+        except Exception:
+            summary = None
+        if summary is not None:
+            dev_id, count, tmin, tmax = summary
+            device = resolve_device_id(None, f, dev_id=dev_id)
+            self.files[f] = {'device': device, 'count': count, 'tmin': tmin, 'tmax': tmax}
+            # only decode the file when the device still needs a sample
+            samples = self.devices.setdefault(device, {}).setdefault('samples', [])
+            if len(samples) < sample_per_device:
+                try:
+                    sample = read()[0]
+                    sample['_source_file'] = f
+                    samples.append(sample)
+                except Exception:
+                    pass
+            return
+        try:
+            sample, count, tmin, tmax = summarize_records(read())
+        except Exception:
+            instrument.active().add('read', calls=0, failed=1)
+            self.files[f] = {'device': None, 'count': 0, 'tmin': None, 'tmax': None}
+            return
+        device = None
+        if isinstance(sample, dict):
+            sample['_source_file'] = f
+            device = resolve_device_id(sample, f)
+            samples = self.devices.setdefault(device, {}).setdefault('samples', [])
+            if len(samples) < sample_per_device:
+                samples.append(sample)
+        self.files[f] = {'device': device, 'count': count, 'tmin': tmin, 'tmax': tmax}
+
+    def _archive_signature(self):
+        st = os.stat(self.root)
+        return {'mtime': st.st_mtime_ns, 'size': st.st_size}
+
+    def _refresh_archive(self, sample_per_device, max_files):
+        """refresh() for an archive root.
+
+        An unchanged archive (same mtime and size) is not read at all.
+        Otherwise it is streamed once; every member is summarized in flight
+        and its offset recorded, so device loads can seek to their members.
+        """
+        signature = self._archive_signature()
+        if self.dirs.get(self.root) == signature:
+            seen = list(self.files)
+            self._summarize(seen, sample_per_device)
+            return True
+        # the archive changed: members cannot be matched up, start over
+        self.files, self.devices, self.dirs = {}, {}, {}
+        self._dirty = True
+        seen = []
+        complete = True
+        members = archives.iter_members(self.root)
+        for member, data in members:
+            if max_files is not None and len(seen) >= max_files:
+                complete = False
+                break
+            f = archives.virtual_path(self.root, member)
+            seen.append(f)
+            suffix = archives.member_suffix(member)
+            self._index_file(
+                f,
+                lambda: fast_summarize_bytes(data) if suffix == '.json' else None,
+                lambda: list(iter_bytes_records(data, suffix)),
+                sample_per_device)
+        members.close()
+        if complete:
+            offsets = archives.member_offsets(self.root)
+            for f in seen:
+                offset, size = offsets[archives.split_virtual_path(f)[1]]
+                self.files[f]['offset'] = offset
+                self.files[f]['size'] = size
+            self.dirs = {self.root: signature}
+        self._summarize(seen, sample_per_device)
+        return complete
+
+    def files_in_range(self, files, since=None, until=None):
+        """Drop the files whose indexed [tmin, tmax] lies outside [since, until].
+
+        since/until are epoch seconds. Files not in the index, or without
+        recorded times, are kept so the caller still reads them.
+        """
+        if since is None and until is None:
+            return list(files)
+        kept = []
+        for f in files:
+            info = self.files.get(f) or {}
+            tmin, tmax = info.get('tmin'), info.get('tmax')
+            if since is not None and tmax is not None and tmax < since:
+                continue
+            if until is not None and tmin is not None and tmin > until:
+                continue
+            kept.append(f)
+        return kept
+
+    def _summarize(self, files, sample_per_device):
+        """Rebuild per-device summaries from the per-file entries in `files`."""
+        devices = {}
+        for f in files:
+            info = self.files.get(f)
+            if not info or not info.get('device'):
+                continue
+            dev = devices.get(info['device'])
+            if dev is None:
+                dev = devices[info['device']] = {
+                    'folder': os.path.dirname(f), 'files': [], 'first': None,
+                    'last': None, 'count': 0, 'samples': []}
+            dev['files'].append(f)
+            dev['count'] += info.get('count') or 0
+            if info.get('tmin') is not None and (dev['first'] is None or info['tmin'] < dev['first']):
+                dev['first'] = info['tmin']
+            if info.get('tmax') is not None and (dev['last'] is None or info['tmax'] > dev['last']):
+                dev['last'] = info['tmax']
+
+        for key, dev in devices.items():
+            listed = set(dev['files'])
+            old = (self.devices.get(key) or {}).get('samples') or []
+            samples = [s for s in old if s.get('_source_file') in listed][:sample_per_device]
+            have = {s.get('_source_file') for s in samples}
+            # top up samples from the device's files when we have too few
+            for f in dev['files']:
+                if len(samples) >= sample_per_device:
+                    break
+                if f in have:
+                    continue
+                try:
+                    sample = summarize_file(f)[0]
+                except Exception:
+                    continue
+                if isinstance(sample, dict):
+                    sample['_source_file'] = f
+                    samples.append(sample)
+            dev['samples'] = samples
+        if devices != self.devices:
+            self._dirty = True
+        self.devices = devices
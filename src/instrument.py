@@ -0,0 +1,250 @@
+"""Lightweight stage timing and counters.
+
+A Stats object aggregates, per named stage ('walk', 'read', 'decode',
+'normalize', 'clean', 'group', 'plot-build', 'render', ...), the number of
+calls, wall time and counters such as files, bytes, records, skipped and
+failed. Stages timed with span() are also kept as trace events, which can
+be dumped as JSON or as a Chrome trace (chrome://tracing, Perfetto).
+
+Code deep inside a load does not take a Stats argument: it records into
+active(), the Stats installed for the current thread by recording(), or a
+no-op recorder when there is none. Organizer installs its own Stats around
+its public methods.
+
+profile_imports() measures import cost the way `python -X importtime` does,
+in a fresh interpreter, for the startup budget.
+"""
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+_local = threading.local()
+# trace events kept per Stats; aggregates keep counting after that
+MAX_EVENTS = 100000
+
+
+class Stats:
+    """Thread-safe per-stage aggregates plus a bounded list of trace events."""
+
+    def __init__(self, max_events=MAX_EVENTS):
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+            self._events = []
+            self._dropped = 0
+
+    def add(self, name, seconds=0.0, calls=1, **counts):
+        """Add seconds and counts to stage name (no trace event)."""
+        with self._lock:
+            self._add(name, seconds, calls, counts)
+
+    def _add(self, name, seconds, calls, counts):
+        stage = self._stages.get(name)
+        if stage is None:
+            stage = self._stages[name] = {'calls': 0, 'seconds': 0.0}
+        stage['calls'] += calls
+        stage['seconds'] += seconds
+        for key, value in counts.items():
+            if value:
+                stage[key] = stage.get(key, 0) + value
+
+    @contextlib.contextmanager
+    def span(self, name, **counts):
+        """Time the block as stage name. Yields a dict of counts the block
+        may fill in (e.g. counts['records'] = n); they are added on exit."""
+        counts = dict(counts)
+        start = time.perf_counter()
+        try:
+            yield counts
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self._add(name, end - start, 1, counts)
+                if len(self._events) < self.max_events:
+                    self._events.append((name, start - self._origin, end - start,
+                                         threading.get_ident(), {k: v for k, v in counts.items() if v}))
+                else:
+                    self._dropped += 1
+
+    def summary(self):
+        """Return {stage: {'calls', 'seconds', counters...}}."""
+        with self._lock:
+            return {name: dict(stage) for name, stage in self._stages.items()}
+
+    def export(self):
+        """Picklable snapshot for merge() (e.g. from a worker process)."""
+        with self._lock:
+            return {'stages': {n: dict(s) for n, s in self._stages.items()}}
+
+    def merge(self, exported):
+        """Add the aggregates of another Stats' export() to these."""
+        with self._lock:
+            for name, stage in exported['stages'].items():
+                counts = {k: v for k, v in stage.items() if k not in ('calls', 'seconds')}
+                self._add(name, stage['seconds'], stage['calls'], counts)
+
+    def to_json(self):
+        with self._lock:
+            events = [{'name': name, 'start': round(start, 6), 'seconds': round(dur, 6), 'thread': tid, **args}
+                      for name, start, dur, tid, args in self._events]
+            return {'stages': {n: dict(s) for n, s in self._stages.items()},
+                    'events': events, 'dropped_events': self._dropped}
+
+    def to_chrome_trace(self):
+        """Return the trace events in Chrome's Trace Event Format."""
+        pid = os.getpid()
+        with self._lock:
+            events = [{'name': name, 'ph': 'X', 'ts': round(start * 1e6, 1), 'dur': round(dur * 1e6, 1),
+                       'pid': pid, 'tid': tid, 'args': args}
+                      for name, start, dur, tid, args in self._events]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def dump(self, path, fmt='json'):
+        """Write to_json() (fmt='json') or to_chrome_trace() (fmt='chrome') to path."""
+        if fmt not in ('json', 'chrome'):
+            raise ValueError(f"Unknown stats format: {fmt!r}")
+        data = self.to_chrome_trace() if fmt == 'chrome' else self.to_json()
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(data, fh, indent=1)
+
+
+class _NullStats:
+    """Recorder used when no Stats is active: records nothing."""
+
+    def add(self, name, seconds=0.0, calls=1, **counts):
+        pass
+
+    def merge(self, exported):
+        pass
+
+    @contextlib.contextmanager
+    def span(self, name, **counts):
+        yield {}
+
+
+_NULL = _NullStats()
+
+
+def active():
+    """Return the Stats recording on this thread (a no-op one if none)."""
+    return getattr(_local, 'stats', None) or _NULL
+
+
+@contextlib.contextmanager
+def recording(stats):
+    """Make stats the active recorder of this thread for the block."""
+    previous = getattr(_local, 'stats', None)
+    _local.stats = stats
+    try:
+        yield stats
+    finally:
+        _local.stats = previous
+
+
+def timed_iter(name, iterable, unit='files'):
+    """Yield from iterable, adding the time spent producing items and their
+    count (as `unit`) to stage name of the active recorder at the end."""
+    stats = active()
+    elapsed = 0.0
+    n = 0
+    it = iter(iterable)
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                elapsed += time.perf_counter() - start
+                return
+            elapsed += time.perf_counter() - start
+            n += 1
+            yield item
+    finally:
+        stats.add(name, elapsed, **{unit: n})
+
+
+def diff_summary(after, before):
+    """Return the stages of summary() `after` minus those of `before`, e.g.
+    the work done by one operation; stages with no new calls are dropped."""
+    out = {}
+    for name, stage in after.items():
+        prev = before.get(name, {})
+        delta = {k: v - prev.get(k, 0) for k, v in stage.items()}
+        if delta['calls'] or delta['seconds']:
+            out[name] = delta
+    return out
+
+
+def format_summary(summary, stages=None):
+    """One-line human summary of summary() for status bars and logs."""
+    parts = []
+    for name in stages or summary:
+        stage = summary.get(name)
+        if not stage:
+            continue
+        text = f"{name} {stage['seconds']:.2f}s"
+        details = []
+        for key in ('files', 'records', 'bytes', 'skipped', 'failed'):
+            value = stage.get(key)
+            if not value:
+                continue
+            if key == 'bytes':
+                details.append(f'{value / 1e6:.1f} MB')
+            else:
+                details.append(f'{value:,} {key}')
+        if details:
+            text += f" ({', '.join(details)})"
+        parts.append(text)
+    return ' · '.join(parts)
+
+
+def profile_imports(modules, path=None):
+    """Import modules in a fresh interpreter under -X importtime.
+
+    path is prepended to the child's sys.path. Returns one dict per imported
+    module, in import order: 'module', 'depth' (0 for a top-level import),
+    'self_us' and 'cumulative_us' (microseconds, as -X importtime reports).
+    Interpreter startup (site) is left out. Raises RuntimeError when the
+    import fails.
+    """
+    import subprocess
+    code = f"import sys; sys.path.insert(0, {str(path or os.getcwd())!r}); import {', '.join(modules)}"
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing {', '.join(modules)} failed:\n{proc.stderr.strip()[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header line
+        name = fields[2].rstrip()
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        if depth == 0 and stripped == 'site':
+            rows = []  # everything so far was interpreter startup
+            continue
+        rows.append({'module': stripped, 'depth': depth,
+                     'self_us': int(fields[0]), 'cumulative_us': int(fields[1])})
+    return rows
+
+
+def format_import_profile(rows, top=15):
+    """importtime-style table of the top imports by cumulative time, and
+    the total of the top-level ones."""
+    lines = [f"{'self [us]':>10} | {'cumulative':>10} | module"]
+    for row in sorted(rows, key=lambda r: r['cumulative_us'], reverse=True)[:top]:
+        lines.append(f"{row['self_us']:>10} | {row['cumulative_us']:>10} | {'  ' * row['depth']}{row['module']}")
+    total = sum(r['cumulative_us'] for r in rows if r['depth'] == 0)
+    lines.append(f'total {total / 1000:.1f} ms for {len(rows)} modules')
+    return '\n'.join(lines)
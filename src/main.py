@@ -1,17 +1,56 @@
 # main.py
 
 import sys
+import instrument
 from organizer import Organizer
+from utils import walk_data_files
 from visualizer import Visualizer
 
+# modules main.py and the GUI import before the window opens
+_STARTUP_MODULES = ('instrument', 'organizer', 'utils', 'visualizer', 'gui')
+# imported on first use only; the device list must not need them
+_DEFERRED_MODULES = ('pandas', 'numpy', 'matplotlib')
+
+
+def _profile_startup(organizer, scan_dir):
+    """Print the import cost of the startup modules (-X importtime style)
+    and what listing the devices of scan_dir costs, then return."""
+    import os
+    rows = instrument.profile_imports(_STARTUP_MODULES, os.path.dirname(os.path.abspath(__file__)))
+    print(instrument.format_import_profile(rows))
+    eager = sorted({r['module'].split('.')[0] for r in rows} & set(_DEFERRED_MODULES))
+    print(f"Imported at startup: {', '.join(eager)}" if eager else
+          f"Deferred until first use: {', '.join(_DEFERRED_MODULES)}")
+    if scan_dir is None:
+        print('No data files found to scan.')
+        return
+    devices = organizer.scan_dataset(scan_dir)
+    print(f"Device list ({len(devices)} devices from {scan_dir}): "
+          f"{instrument.format_summary(organizer.stats_summary())}")
+    loaded = [m for m in _DEFERRED_MODULES if m in sys.modules]
+    if loaded:
+        print(f"Listing devices imported: {', '.join(loaded)}")
+
+
 def main():
-    # Initialize the Organizer and Visualizer
-    organizer = Organizer()
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description='Organize and visualize LoRaWAN device data.')
+    parser.add_argument('--stats', metavar='PATH', help='write stage timings and counters as JSON on exit')
+    parser.add_argument('--trace', metavar='PATH',
+                        help='write a Chrome trace (chrome://tracing, Perfetto) of the stages on exit')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='report import times of the startup modules and the cost of listing devices, then exit')
+    args = parser.parse_args()
+
+    # Initialize the Organizer and Visualizer. Parsed rows are cached under
+    # data/cache so unchanged uplink files are not re-parsed on every launch.
+    organizer = Organizer(cache_dir=os.path.join('data', 'cache'))
     visualizer = Visualizer()
 
     # Load and clean data: prefer processed files (already cleaned) and merge
     # all CSVs found there. If none, fall back to raw files (and merge them).
-    import os
 
     processed_dir = os.path.join('data', 'processed')
     raw_dir = os.path.join('data', 'raw')
@@ -22,12 +61,40 @@ def main():
     # suggested PowerShell command in the README or below.
     external_dataset_dir = r"C:\Users\davew\OneDrive - Carleton University\Repositories\computer-networks-hackathon-ssi-canada\dataset"
 
+    def _dump_stats():
+        if args.stats:
+            organizer.dump_stats(args.stats)
+        if args.trace:
+            organizer.dump_stats(args.trace, fmt='chrome')
+
+    # the first source holding data files
+    scan_dir = next((d for d in (external_dataset_dir, processed_dir, raw_dir)
+                     if os.path.isdir(d) and next(walk_data_files(d), None) is not None), None)
+
+    if args.profile_startup:
+        _profile_startup(organizer, scan_dir)
+        return
+
+    try:
+        from gui import run_gui
+    except Exception:
+        run_gui = None
+
+    if run_gui is not None and scan_dir is not None:
+        # Open the window at once: the source is scanned in the background
+        # and its devices stream into the list. Full device loads then
+        # happen on demand.
+        run_gui({}, visualizer, organizer=organizer, source_used=scan_dir,
+                on_exit=_dump_stats, scan_dir=scan_dir)
+        sys.exit(0)
+
     data_loaded = None
+    source_used = None
     try:
         if os.path.exists(external_dataset_dir):
             # Perform a fast scan instead of loading all files to avoid
-            # expensive full normalization at startup. GUI can request
-            # per-device full loads on demand.
+            # expensive full normalization at startup. On-demand full loads
+            # remain possible per device.
             scanned = organizer.scan_dataset(external_dataset_dir)
             if scanned:
                 data_loaded = scanned
@@ -35,7 +102,6 @@ def main():
     except Exception:
         data_loaded = None
 
-    source_used = None
     if data_loaded is None:
         data_loaded = organizer.load_all_from_dir(processed_dir)
         source_used = processed_dir if data_loaded is not None else None
@@ -57,6 +123,8 @@ def main():
         organizer.clean_data()
         organized_data = organizer.organize_by_device()
 
+    print(f"Startup: {instrument.format_summary(organizer.stats_summary())}")
+
     # Inform the user where data came from and how many devices were found
     try:
         loaded_files = getattr(organizer, '_loaded_files', None)
@@ -74,9 +142,7 @@ def main():
         pass
 
     # Launch GUI for all user selection
-    try:
-        from gui import run_gui
-    except Exception:
+    if run_gui is None:
         print('GUI components unavailable; falling back to command-line prompts')
         # If GUI cannot be imported, keep CLI behavior (simple fallback)
         display_option = input("How would you like to display the data? (spreadsheet/graph): ").strip().lower()
@@ -103,18 +169,21 @@ def main():
         else:
             print("Selection out of range.")
             sys.exit(1)
-        if display_option == 'spreadsheet':
-            visualizer.display_spreadsheet(selected_data)
-        elif display_option == 'graph':
-            visualizer.display_graph(selected_data)
-        else:
-            print("Invalid option. Please choose 'spreadsheet' or 'graph'.")
-            sys.exit(1)
+        with instrument.recording(organizer.stats):
+            if display_option == 'spreadsheet':
+                visualizer.display_spreadsheet(selected_data)
+            elif display_option == 'graph':
+                visualizer.display_graph(selected_data)
+            else:
+                print("Invalid option. Please choose 'spreadsheet' or 'graph'.")
+                sys.exit(1)
+        _dump_stats()
     else:
         # run GUI with organized data
         # pass organizer to GUI so it can perform on-demand full loads when
         # the dataset was scanned (fast startup)
-        run_gui(organized_data, visualizer, organizer=organizer, source_used=source_used, loaded_files=getattr(organizer, '_loaded_files', None))
+        run_gui(organized_data, visualizer, organizer=organizer, source_used=source_used,
+                loaded_files=getattr(organizer, '_loaded_files', None), on_exit=_dump_stats)
         # Ensure process exits after GUI is closed (some backends may leave
         # non-daemon threads running); explicitly exit to return control to shell.
         try:
@@ -0,0 +1,242 @@
+"""Memory-mapped NDJSON / JSON Lines reader with a persisted line index.
+
+Large NDJSON exports are read through mmap: each record is decoded from a
+slice of the mapping, so the file is never copied into one big Python
+string. A LineIndex holds
+
+- the byte offset and end of every record line (found with one
+  vectorized newline scan), and
+- a sparse time index: the min/max record time of each block of BLOCK
+  lines.
+
+Time-range reads only touch the blocks overlapping the window, sampled
+reads jump straight to every n-th line, and scan summaries (count, first,
+last) come from the index without decoding the file again. Indexes are
+memoized per file version and, once set_cache_dir() is called (the
+Organizer does this when given a cache_dir), persisted there as .npz.
+"""
+import contextlib
+import hashlib
+import mmap
+import os
+import warnings
+
+try:
+    from . import decoder
+except ImportError:  # running as a script from src/
+    import decoder
+
+NDJSON_SUFFIXES = ('.ndjson', '.jsonl')
+BLOCK = 256
+_VERSION = 1
+
+_cache_dir = None
+# (abs path, mtime_ns, size) -> LineIndex
+_MEMO = {}
+
+
+def set_cache_dir(cache_dir):
+    """Persist line indexes under cache_dir (None keeps them in memory only)."""
+    global _cache_dir
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    _cache_dir = cache_dir
+
+
+def is_ndjson(path):
+    return str(path).lower().endswith(NDJSON_SUFFIXES)
+
+
+class LineIndex:
+
+    def __init__(self, starts, ends, block_tmin, block_tmax):
+        self.starts = starts          # int64 byte offset of each record line
+        self.ends = ends              # int64 end offset (exclusive, before '\n')
+        self.block_tmin = block_tmin  # float64 per block, NaN when untimed
+        self.block_tmax = block_tmax
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def tmin(self):
+        import numpy as np
+        return None if np.isnan(self.block_tmin).all() else float(np.nanmin(self.block_tmin))
+
+    @property
+    def tmax(self):
+        import numpy as np
+        return None if np.isnan(self.block_tmax).all() else float(np.nanmax(self.block_tmax))
+
+    def lines_in(self, since=None, until=None):
+        """Line numbers of the blocks that may hold records in [since, until].
+
+        Blocks without any timed record are always included, so callers
+        still filter exactly on the decoded records.
+        """
+        import numpy as np
+        keep = np.ones(len(self.block_tmin), dtype=bool)
+        untimed = np.isnan(self.block_tmin)
+        if since is not None:
+            keep &= untimed | (self.block_tmax >= since)
+        if until is not None:
+            keep &= untimed | (self.block_tmin <= until)
+        blocks = np.flatnonzero(keep)
+        if not len(blocks):
+            return np.empty(0, dtype=np.int64)
+        lines = (blocks[:, None] * BLOCK + np.arange(BLOCK)).ravel()
+        return lines[lines < len(self.starts)]
+
+
+def _open_map(path):
+    """Return (file, mmap) for path, or (None, None) for an empty file."""
+    fh = open(path, 'rb')
+    try:
+        if os.fstat(fh.fileno()).st_size == 0:
+            fh.close()
+            return None, None
+        return fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    except Exception:
+        fh.close()
+        raise
+
+
+def _key(path):
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+def _index_path(key):
+    digest = hashlib.sha1(key[0].encode('utf-8')).hexdigest()[:16]
+    return os.path.join(_cache_dir, f'ndjson_{digest}.npz')
+
+
+def line_index(path):
+    """Return the LineIndex for an NDJSON file, building it if needed."""
+    import numpy as np
+    key = _key(path)
+    idx = _MEMO.get(key)
+    if idx is not None:
+        return idx
+    stored = _index_path(key) if _cache_dir else None
+    if stored and os.path.exists(stored):
+        try:
+            with np.load(stored) as npz:
+                if tuple(npz['signature']) == (_VERSION, key[1], key[2]):
+                    idx = LineIndex(npz['starts'], npz['ends'], npz['block_tmin'], npz['block_tmax'])
+        except Exception:
+            idx = None
+    if idx is None:
+        idx = _build(path)
+        if stored and os.path.isdir(_cache_dir):
+            try:
+                # write to a temporary name first so readers never see a partial index
+                with open(stored + '.tmp', 'wb') as fh:
+                    np.savez(fh, signature=np.array([_VERSION, key[1], key[2]], dtype=np.int64),
+                             starts=idx.starts, ends=idx.ends,
+                             block_tmin=idx.block_tmin, block_tmax=idx.block_tmax)
+                os.replace(stored + '.tmp', stored)
+            except OSError:
+                # persisting is an optimization; the in-memory index still works
+                pass
+    _MEMO[key] = idx
+    return idx
+
+
+def _build(path):
+    import numpy as np
+    try:
+        from .index import record_time
+    except ImportError:  # running as a script from src/
+        from index import record_time
+
+    fh, mm = _open_map(path)
+    if mm is None:
+        empty = np.empty(0, dtype=np.int64)
+        return LineIndex(empty, empty, np.empty(0), np.empty(0))
+    try:
+        buf = np.frombuffer(mm, dtype=np.uint8)
+        newlines = np.flatnonzero(buf == 0x0A)
+        del buf  # release the exported buffer before the mmap is closed
+        starts, ends, times = [], [], []
+        for s, e in zip(np.concatenate(([0], newlines + 1)).tolist(),
+                        np.concatenate((newlines, [len(mm)])).tolist()):
+            line = mm[s:e]
+            if not line.strip():
+                continue
+            try:
+                rec = decoder.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(rec, dict):
+                continue
+            t = record_time(rec)
+            starts.append(s)
+            ends.append(e)
+            times.append(np.nan if t is None else t)
+    finally:
+        mm.close()
+        fh.close()
+    n_blocks = (len(times) + BLOCK - 1) // BLOCK
+    blocks = np.full(n_blocks * BLOCK, np.nan)
+    blocks[:len(times)] = times
+    blocks = blocks.reshape(n_blocks, BLOCK)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN blocks
+        block_tmin = np.nanmin(blocks, axis=1)
+        block_tmax = np.nanmax(blocks, axis=1)
+    return LineIndex(np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64), block_tmin, block_tmax)
+
+
+def iter_records(path, since=None, until=None, step=None):
+    """Yield the record dicts of an NDJSON file, decoded from mmap slices.
+
+    since/until (epoch seconds) restrict reading to the index blocks that
+    overlap the window; records just outside it may still be yielded, so
+    callers filter exactly. step=n yields every n-th record only. A plain
+    full read walks the mapping line by line without building an index.
+    """
+    use_index = since is not None or until is not None or (step or 1) > 1
+    fh, mm = _open_map(path)
+    if mm is None:
+        return
+    try:
+        if use_index:
+            idx = line_index(path)
+            lines = idx.lines_in(since, until)
+            if step and step > 1:
+                lines = lines[::step]
+            spans = zip(idx.starts[lines].tolist(), idx.ends[lines].tolist())
+        else:
+            spans = _line_spans(mm)
+        for s, e in spans:
+            line = mm[s:e]
+            if not line.strip():
+                continue
+            obj = decoder.loads(line)
+            if isinstance(obj, dict):
+                yield obj
+    finally:
+        mm.close()
+        fh.close()
+
+
+def _line_spans(mm):
+    pos = 0
+    size = len(mm)
+    while pos < size:
+        end = mm.find(b'\n', pos)
+        if end < 0:
+            end = size
+        yield pos, end
+        pos = end + 1
+
+
+def summarize(path):
+    """Return (first record or None, record count, tmin, tmax) from the index."""
+    idx = line_index(path)
+    first = None
+    if len(idx):
+        with contextlib.closing(iter_records(path)) as records:
+            first = next(records, None)
+    return first, len(idx), idx.tmin, idx.tmax
@@ -1,6 +1,229 @@
+import functools
+import itertools
+import threading
+import time
+from collections import namedtuple
+
+try:
+    from . import archive as archives
+    from . import decoder
+    from . import instrument
+    from . import ndjson
+    from . import segment
+    from .cache import ParseCache
+    from .chirpstack import apply_uplink_types, normalize_records
+    from .cleaning import clean_frame
+    from .index import DatasetIndex, TIME_KEYS, iter_sources, record_time, time_column, to_epoch
+    from .store import DeviceRecords
+    from .utils import match_columns, project_record, walk_data_files
+except ImportError:  # running as a script from src/
+    import archive as archives
+    import decoder
+    import instrument
+    import ndjson
+    import segment
+    from cache import ParseCache
+    from chirpstack import apply_uplink_types, normalize_records
+    from cleaning import clean_frame
+    from index import DatasetIndex, TIME_KEYS, iter_sources, record_time, time_column, to_epoch
+    from store import DeviceRecords
+    from utils import match_columns, project_record, walk_data_files
+
+
+# seconds device loads may leave new parse-cache rows unsaved: the cache is
+# one pickled frame, so saving after every load would rewrite it per device
+_CACHE_SAVE_INTERVAL = 30.0
+
+# one step of Organizer.iter_scan: files seen, files in the previous scan (or
+# None), {device: samples} found since the last step, and whether it is done
+ScanProgress = namedtuple('ScanProgress', 'files expected devices done')
+
+
+def _parse_file_chunk(files, blobs=None):
+    """Parse a list of CSV/JSON files into one DataFrame.
+
+    Returns (DataFrame or None, list of successfully parsed paths). JSON
+    records from every file in the chunk are normalized in a single
+    normalize_records call (the typed ChirpStack flattener, or
+    pd.json_normalize for other shapes) and annotated with '_source_file';
+    if that call fails, the files are normalized one at a time and only
+    the ones that still fail are left out. Defined at module level so it can be shipped to ProcessPoolExecutor
+    workers.
+
+    Files may be 'archive::member' paths. blobs optionally maps paths to
+    contents already in memory; archive members not in it are read in bulk.
+
+    Read/decode time and file, byte, record, skipped and failed counts are
+    added to the active instrument.Stats once per chunk.
+    """
+    import io
+    import pandas as pd
+
+    stats = instrument.active()
+    if blobs is None:
+        blobs = archives.read_virtual(files)
+
+    frames = []
+    records = []
+    record_sources = []
+    loaded = []
+    read_s = decode_s = 0.0
+    n_bytes = n_records = skipped = failed = 0
+
+    def _flush_records():
+        # normalize the pending JSON records in one call, keeping file order
+        if not records:
+            return
+        try:
+            with stats.span('normalize', records=len(records)):
+                # left untyped: the caller types the concatenated result once
+                df = normalize_records(records, typed=False)
+            # annotate source file so downstream code (GUI) can use origin info
+            df['_source_file'] = record_sources
+            frames.append(df)
+        except Exception:
+            _normalize_per_file()
+        records.clear()
+        record_sources.clear()
+
+    def _normalize_per_file():
+        # one bad record must not cost the whole chunk: retry file by file and
+        # drop only the files that still fail, like unparsable files
+        nonlocal failed
+        start = 0
+        for f, group in itertools.groupby(record_sources):
+            end = start + len(list(group))
+            batch = records[start:end]
+            start = end
+            try:
+                with stats.span('normalize', records=len(batch)):
+                    df = normalize_records(batch, typed=False)
+            except Exception:
+                stats.add('normalize', calls=0, failed=len(batch))
+                loaded.remove(f)
+                failed += 1
+                continue
+            df['_source_file'] = f
+            frames.append(df)
+
+    for f in files:
+        try:
+            data = blobs.get(f)
+            start = time.perf_counter()
+            if f.lower().endswith('.csv'):
+                df = pd.read_csv(io.BytesIO(data) if data is not None else f)
+                read_s += time.perf_counter() - start
+                n_records += len(df)
+                if df is not None and not df.empty:
+                    df['_source_file'] = f
+                _flush_records()
+                frames.append(df)
+            else:
+                # Attempt to load arbitrary JSON structures and normalize
+                if data is None and ndjson.is_ndjson(f):
+                    # decoded line by line from a memory map
+                    objs = list(ndjson.iter_records(f))
+                else:
+                    if data is None:
+                        data = decoder.read_bytes(f)
+                        read_s += time.perf_counter() - start
+                        start = time.perf_counter()
+                    n_bytes += len(data)
+                    if segment.is_segment(f):
+                        objs = list(segment.iter_segment_bytes(data))
+                    elif ndjson.is_ndjson(f):
+                        objs = [decoder.loads(line) for line in data.splitlines() if line.strip()]
+                    else:
+                        obj = decoder.loads(data)
+                        objs = obj if isinstance(obj, list) else [obj]
+                decode_s += time.perf_counter() - start
+                if not all(isinstance(o, dict) for o in objs):
+                    skipped += 1
+                    continue
+                records.extend(objs)
+                record_sources.extend([f] * len(objs))
+                n_records += len(objs)
+            loaded.append(f)
+        except Exception:
+            # skip unreadable or unparsable files
+            failed += 1
+            continue
+    _flush_records()
+    stats.add('read', read_s, files=len(files), bytes=n_bytes, failed=failed)
+    stats.add('decode', decode_s, records=n_records, skipped=skipped)
+
+    if not frames:
+        return None, loaded
+    if len(frames) == 1:
+        return frames[0], loaded
+    return pd.concat(frames, ignore_index=True), loaded
+
+
+def _parse_chunk_recorded(files, blobs=None):
+    """_parse_file_chunk for worker processes: also returns the chunk's
+    stats (instrument.Stats.export()) for the parent to merge."""
+    stats = instrument.Stats(max_events=0)
+    with instrument.recording(stats):
+        df, loaded = _parse_file_chunk(files, blobs)
+    return df, loaded, stats.export()
+
+
+def _recorded(name):
+    """Run an Organizer method with self.stats active, timed as stage name."""
+    def decorate(method):
+        @functools.wraps(method)
+        def run(self, *args, **kwargs):
+            with instrument.recording(self.stats), self.stats.span(name):
+                return method(self, *args, **kwargs)
+        return run
+    return decorate
+
+
+def _clean(df):
+    with instrument.active().span('clean', records=len(df)):
+        return clean_frame(df)
+
+
+def _filter_window(df, since=None, until=None):
+    """Keep the rows of df whose record time lies in [since, until] (epoch
+    seconds), matching the per-record filter of Organizer.iter_records."""
+    import numpy as np
+    import pandas as pd
+    if since is None and until is None:
+        return df
+    col = time_column(list(df.columns))
+    if col is None:
+        return df.iloc[:0]
+    values = df[col]
+    if pd.api.types.is_datetime64_any_dtype(values):
+        times = values.dt.tz_localize('UTC') if values.dt.tz is None else values
+        epochs = (times - pd.Timestamp(0, tz='UTC')).dt.total_seconds().to_numpy()
+    else:
+        epochs = np.array([np.nan if t is None else t for t in map(to_epoch, values)], dtype=float)
+    keep = ~np.isnan(epochs)
+    if since is not None:
+        keep &= epochs >= since
+    if until is not None:
+        keep &= epochs <= until
+    return df[keep].reset_index(drop=True)
+
+
 class Organizer:
-    def __init__(self):
+    def __init__(self, cache_dir=None):
+        """cache_dir: optional directory for the persistent parse cache. When
+        set, parsed rows are stored there keyed by file mtime/size so later
+        loads only parse new or modified files."""
         self.data = None
+        self.cache_dir = cache_dir
+        self._parse_cache = ParseCache(cache_dir) if cache_dir else None
+        # the parse cache is shared state; device loads may run on several threads
+        self._cache_lock = threading.Lock()
+        self._cache_saved_at = time.monotonic()
+        # per-stage timings and counters of the loads below (see instrument.py)
+        self.stats = instrument.Stats()
+        if cache_dir:
+            # NDJSON line indexes are persisted alongside the parse cache
+            ndjson.set_cache_dir(cache_dir)
 
     def load_data(self, file_path):
         import pandas as pd
@@ -13,60 +236,160 @@ class Organizer:
             pass
         return self.data
 
-    def load_all_from_dir(self, dir_path, pattern='*.csv'):
+    def stats_summary(self):
+        """Return the per-stage timings and counters recorded so far:
+        {stage: {'calls', 'seconds', 'files', 'bytes', 'records', 'skipped',
+        'failed'}} (counters that stayed zero are left out)."""
+        return self.stats.summary()
+
+    def flush_cache(self):
+        """Write parse-cache rows not yet saved to disk. Device loads save
+        at most every _CACHE_SAVE_INTERVAL seconds; call this when a burst
+        of loads is over and before exiting."""
+        if self._parse_cache is None:
+            return
+        with self._cache_lock:
+            self._save_cache()
+
+    def _save_cache(self):
+        # caller holds _cache_lock
+        try:
+            self._parse_cache.save()
+        except Exception:
+            # the cache is an optimization; failing to persist it is not fatal
+            pass
+        self._cache_saved_at = time.monotonic()
+
+    def dump_stats(self, path, fmt='json'):
+        """Write the recorded stats to path as JSON (fmt='json') or as a
+        Chrome trace (fmt='chrome', for chrome://tracing or Perfetto)."""
+        self.stats.dump(path, fmt)
+
+    @_recorded('load_all')
+    def load_all_from_dir(self, dir_path, pattern='*.csv', workers=None, chunksize=256):
         """Load and concatenate all CSV files in a directory into a single DataFrame.
         Sets self.data and returns the concatenated DataFrame. If no files are
         found, returns None.
+
+        Files are parsed in chunks of `chunksize`; each chunk's JSON records
+        are normalized together, which is much cheaper than normalizing one
+        file at a time. With `workers` > 1 the chunks are fanned out across a
+        process pool (`workers=0` uses one process per CPU).
+
+        dir_path may also be a tar/tar.gz/zip archive. Without a parse cache
+        it is streamed once and its members parsed in flight; with one, the
+        members are addressed as 'archive::member' paths like loose files.
         """
         import pandas as pd
-        import glob
-        import os
 
-        # Search recursively for CSV/JSON files to handle nested dataset layouts
-        patterns = ['**/*.csv', '**/*.json', '**/*.ndjson', '**/*.jsonl']
-        files = []
-        for p in patterns:
-            files.extend(glob.glob(os.path.join(dir_path, p), recursive=True))
-        if not files:
-            return None
+        if archives.is_archive(dir_path):
+            if self._parse_cache is None:
+                # stream the archive once, parsing members in flight
+                chunks = self._parse_archive(str(dir_path), chunksize)
+                files = None
+            else:
+                files = [archives.virtual_path(str(dir_path), m)
+                         for m in archives.member_offsets(str(dir_path))]
+        else:
+            # Search recursively for CSV/JSON files to handle nested dataset layouts;
+            # loose files already packed into a segment are read from the segment
+            files = segment.drop_packed(f for f, _suffix in instrument.timed_iter('walk', walk_data_files(dir_path)))
+        if files is not None:
+            if not files:
+                return None
+
+            if self._parse_cache is not None:
+                df, loaded_files = self._parse_files_cached(files, workers, chunksize, save=True)
+                if df is None:
+                    return None
+                self.data = df
+                self._loaded_files = loaded_files
+                return self.data
+            chunks = self._parse_files(files, workers, chunksize)
 
         dfs = []
         loaded_files = []
-        import json
-        for f in files:
-            try:
-                if f.lower().endswith('.csv'):
-                    df = pd.read_csv(f)
-                else:
-                    # Attempt to load arbitrary JSON structures and normalize
-                    with open(f, 'r', encoding='utf-8') as fh:
-                        obj = json.load(fh)
-                    # If the file contains a list of records, create DataFrame directly
-                    if isinstance(obj, list):
-                        df = pd.json_normalize(obj)
-                    else:
-                        df = pd.json_normalize([obj])
-                # annotate source file so downstream code (GUI) can use origin info
-                if df is not None and not df.empty:
-                    try:
-                        df['_source_file'] = f
-                    except Exception:
-                        # best-effort: ignore if cannot set
-                        pass
+        for df, loaded in chunks:
+            if df is not None:
                 dfs.append(df)
-                loaded_files.append(f)
-            except Exception:
-                # skip unreadable or unparsable files
-                continue
+            loaded_files.extend(loaded)
 
         if not dfs:
             return None
 
-        self.data = pd.concat(dfs, ignore_index=True)
+        self.data = apply_uplink_types(pd.concat(dfs, ignore_index=True))
         # record which files were successfully loaded (useful for debugging)
         self._loaded_files = loaded_files
         return self.data
 
+    @staticmethod
+    def _parse_files(files, workers=None, chunksize=256):
+        """Parse files with _parse_file_chunk, optionally in a process pool.
+
+        Returns a list of (DataFrame or None, loaded_files) per chunk, in
+        file order. Archive members are read up front in one pass per
+        archive rather than one pass per chunk.
+        """
+        import os
+
+        chunksize = max(1, int(chunksize or 1))
+        chunks = [files[i:i + chunksize] for i in range(0, len(files), chunksize)]
+        blobs = archives.read_virtual(files)
+        chunk_blobs = [{f: blobs[f] for f in c if f in blobs} for c in chunks]
+        if workers == 0:
+            workers = os.cpu_count() or 1
+
+        if workers and workers > 1 and len(chunks) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            stats = instrument.active()
+            results = []
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as ex:
+                for df, loaded, exported in ex.map(_parse_chunk_recorded, chunks, chunk_blobs):
+                    stats.merge(exported)
+                    results.append((df, loaded))
+            return results
+        return [_parse_file_chunk(c, b) for c, b in zip(chunks, chunk_blobs)]
+
+    @staticmethod
+    def _parse_archive(path, chunksize=256):
+        """Stream an archive once and parse its members chunk by chunk."""
+        chunksize = max(1, int(chunksize or 1))
+        results = []
+        batch = {}
+        for member, data in archives.iter_members(path):
+            batch[archives.virtual_path(path, member)] = data
+            if len(batch) >= chunksize:
+                results.append(_parse_file_chunk(list(batch), batch))
+                batch = {}
+        if batch:
+            results.append(_parse_file_chunk(list(batch), batch))
+        return results
+
+    def _parse_files_cached(self, files, workers=None, chunksize=256, columns=None, save=False):
+        """Return (rows, loaded_files) for files, parsing only cache misses.
+
+        Misses are parsed and cached in full; columns (dotted paths) only
+        limits the rows handed back. The cache is saved when save is true,
+        else at most every _CACHE_SAVE_INTERVAL seconds (see flush_cache).
+        """
+        with self._cache_lock:
+            return self._parse_files_cached_locked(files, workers, chunksize, columns, save)
+
+    def _parse_files_cached_locked(self, files, workers, chunksize, columns, save):
+        cache = self._parse_cache
+        _fresh, stale = cache.partition(files)
+        if stale:
+            frames = []
+            loaded = []
+            for df, ok in self._parse_files(stale, workers, chunksize):
+                frames.append(df)
+                loaded.extend(ok)
+            cache.store(stale, frames, loaded)
+            if save or time.monotonic() - self._cache_saved_at >= _CACHE_SAVE_INTERVAL:
+                self._save_cache()
+        rows = cache.rows_for(files, columns=columns)
+        return (apply_uplink_types(rows) if rows is not None else None), cache.loaded(files)
+
     def scan_dataset(self, dir_path, sample_per_device=1, max_files=None):
         """Lightweight recursive scan of a dataset directory.
 
@@ -74,209 +397,241 @@ class Organizer:
         `max_files` files total and collecting up to `sample_per_device`
         sample records per detected device id. Returns a dict mapping
         device_id_or_folder_key -> list[record(dict)]. Also builds
-        self._device_file_index mapping device_id -> set(file_paths) for
+        self._device_file_index mapping device_id -> list(file_paths) for
         on-demand full loads.
+
+        The scan is backed by a DatasetIndex. With a cache_dir the index is
+        persisted, so later scans only stat directories and parse files
+        added since the previous run. dir_path may also be a tar/tar.gz/zip
+        archive; its members are then indexed (with their offsets) as
+        'archive::member' paths and loaded without extracting anything.
         """
-        from pathlib import Path
-        import json
+        device_map = None
+        for step in self.iter_scan(dir_path, sample_per_device, max_files):
+            if step.done:
+                device_map = step.devices
+        return device_map
 
-        base = Path(dir_path)
-        if not base.exists() or not base.is_dir():
-            return None
+    def iter_scan(self, dir_path, sample_per_device=1, max_files=None, every=256):
+        """scan_dataset() as a generator of ScanProgress steps, so devices
+        can be shown while the rest of the tree is still being indexed.
 
-        device_map = {}
-        folder_map = {}
-        loaded_files = []
-        device_file_index = {}
+        Every `every` files a step reports the files seen so far, the file
+        count of the previous scan (None on a first scan) and the devices
+        found since the previous step. The last step has done=True and
+        carries scan_dataset()'s device map; only then are on-demand loads
+        possible. Yields nothing when dir_path is not a directory or archive.
+        """
+        from pathlib import Path
 
-        # Helper to try and find a device identifier inside a sample dict
-        id_candidates = {'dev_eui', 'deveui', 'devaddr', 'dev_addr', 'device_id', 'deviceid', 'dev_eui'}
+        base = Path(dir_path)
+        if not base.exists() or not (base.is_dir() or archives.is_archive(base)):
+            return
+
+        with instrument.recording(self.stats), self.stats.span('scan') as counts:
+            index = DatasetIndex(str(dir_path), cache_dir=self.cache_dir)
+            index.load()
+            expected = len(index.files) or None
+            files = 0
+            for files, new in index.iter_refresh(sample_per_device, max_files, every):
+                yield ScanProgress(files, expected, {k: [dict(s) for s in v] for k, v in new.items()}, False)
+            try:
+                index.save()
+            except Exception:
+                # the persisted index is an optimization; failing to write it is not fatal
+                pass
+
+            device_map = {}
+            device_file_index = {}
+            folder_map = {}
+            for key, dev in index.devices.items():
+                device_map[key] = [dict(s) for s in dev['samples']]
+                device_file_index[key] = list(dev['files'])
+                folder_map[key] = dev['folder']
+
+            # store indices/mappings for on-demand full loads
+            self._scan_index = index
+            self._device_file_index = device_file_index
+            self._device_folder_map = folder_map
+            self._loaded_files = [f for dev in index.devices.values() for f in dev['files']]
+            self._scanned = True
+            counts['files'] = files
+        yield ScanProgress(files, expected, device_map, True)
+
+    def compact(self, dir_path, prune=False):
+        """Pack the loose uplink files of every device folder under dir_path
+        into one segment file per folder (see segment.py).
+
+        Later scans and loads read the segments and skip the packed loose
+        files; with prune=True those files are deleted. Returns the number
+        of files packed.
+        """
+        return segment.compact_tree(dir_path, prune=prune)
 
-        def _find_device_id(o):
-            if o is None:
-                return None
-            if isinstance(o, dict):
-                for k, v in o.items():
-                    lk = k.strip().lower()
-                    if lk in id_candidates and v is not None:
-                        return str(v)
-                    if 'dev' in lk and ('eui' in lk or 'addr' in lk or 'id' in lk) and v is not None:
-                        return str(v)
-                    # recurse into nested dicts/lists
-                    if isinstance(v, dict):
-                        got = _find_device_id(v)
-                        if got:
-                            return got
-                    if isinstance(v, list):
-                        for it in v:
-                            got = _find_device_id(it)
-                            if got:
-                                return got
+    def device_summary(self, device_key):
+        """Return the scan index summary for a device (folder, files, first,
+        last, count) or None if the device is unknown."""
+        index = getattr(self, '_scan_index', None)
+        if index is None:
             return None
+        dev = index.devices.get(device_key)
+        if dev is None:
+            return None
+        return {k: v for k, v in dev.items() if k != 'samples'}
 
-        # Iterate files recursively but cap the number of files inspected
-        file_patterns = ('**/*.json', '**/*.ndjson', '**/*.jsonl', '**/*.csv')
-        scanned = 0
-        for pat in file_patterns:
-            for f in base.glob(pat):
-                if max_files is not None and scanned >= max_files:
-                    break
-                scanned += 1
-                try:
-                    sample_obj = None
-                    if f.suffix.lower() == '.csv':
-                        import csv
-                        with open(f, 'r', encoding='utf-8') as fh:
-                            reader = csv.DictReader(fh)
-                            row = next(reader, None)
-                            if row:
-                                sample_obj = {k.strip(): v for k, v in row.items()}
-                    else:
-                        # JSON/NDJSON
-                        if f.suffix.lower() in ('.ndjson', '.jsonl'):
-                            with open(f, 'r', encoding='utf-8') as fh:
-                                line = fh.readline()
-                                if line:
-                                    sample_obj = json.loads(line)
-                        else:
-                            with open(f, 'r', encoding='utf-8') as fh:
-                                obj = json.load(fh)
-                                if isinstance(obj, list) and obj:
-                                    sample_obj = obj[0]
-                                elif isinstance(obj, dict):
-                                    sample_obj = obj
-                    if isinstance(sample_obj, dict):
-                        sample_obj['_source_file'] = str(f)
-                        dev_id = _find_device_id(sample_obj)
-                        # prefer folder-derived device id when it looks like a devEUI (hex string)
-                        try:
-                            import re
-                            parent_tokens = [part for part in f.parts if part]
-                            folder_candidate = None
-                            # check parent directories starting from immediate parent up
-                            for part in reversed(parent_tokens[:-1]):
-                                if re.fullmatch(r'[0-9a-fA-F]{8,32}', part):
-                                    folder_candidate = part
-                                    break
-                            # if sample-derived id looks like a UUID but folder looks like hex devEUI, prefer folder
-                            if dev_id and '-' in str(dev_id) and folder_candidate:
-                                dev_id = folder_candidate
-
-                            if not dev_id and folder_candidate:
-                                dev_id = folder_candidate
-                        except Exception:
-                            pass
-
-                        if dev_id:
-                            # store sample if we don't have enough for this device yet
-                            samples = device_map.setdefault(str(dev_id), [])
-                            if len(samples) < sample_per_device:
-                                samples.append(sample_obj)
-                            device_file_index.setdefault(str(dev_id), set()).add(str(f))
-                            folder_map.setdefault(str(dev_id), str(f.parent))
-                        else:
-                            # fallback to folder-based key (use immediate parent folder name)
-                            key = f.parent.name
-                            samples = device_map.setdefault(key, [])
-                            if len(samples) < sample_per_device:
-                                samples.append(sample_obj)
-                            device_file_index.setdefault(key, set()).add(str(f))
-                            folder_map.setdefault(key, str(f.parent))
-                    loaded_files.append(str(f))
-                except Exception:
-                    continue
-            if max_files is not None and scanned >= max_files:
-                break
-
-        # convert sets to lists
-        for k, s in device_file_index.items():
-            device_file_index[k] = list(s)
-
-        # store indices/mappings for on-demand full loads
-        self._device_file_index = device_file_index
-        self._device_folder_map = folder_map
-        self._loaded_files = loaded_files
-        self._scanned = True
-        return device_map
-
-    def load_device_full(self, device_key):
-        """Load all records for a device (by folder name as returned by scan_dataset).
+    def _device_files(self, device_key, since=None, until=None):
+        """Return the data files known for a scanned device.
 
-        Returns a list of record dicts. This performs full parsing of files under
-        the device folder and annotates records with '_source_file'.
+        since/until (epoch seconds) drop the files the scan index records as
+        lying entirely outside that window, so they are never opened.
         """
-        import json
-        from pathlib import Path
-
+        files = self._all_device_files(device_key)
+        index = getattr(self, '_scan_index', None)
+        if index is not None:
+            files = index.files_in_range(files, since, until)
+        return files
+
+    def _all_device_files(self, device_key):
+        """Return every data file of a scanned device."""
         if not hasattr(self, '_device_folder_map'):
             raise RuntimeError('No device folder mapping available; run scan_dataset first')
         folder = self._device_folder_map.get(device_key)
         if not folder:
             raise KeyError(f'No folder known for device key: {device_key}')
-
-        records = []
         # If we have a precomputed file index for this device, use it (fast)
-        files = None
         if hasattr(self, '_device_file_index') and device_key in self._device_file_index:
-            files = [Path(fp) for fp in self._device_file_index.get(device_key, [])]
-        else:
-            p = Path(folder)
-            files = list(p.rglob('*.json')) + list(p.rglob('*.ndjson')) + list(p.rglob('*.jsonl')) + list(p.rglob('*.csv'))
-        for f in files:
-            try:
-                if f.suffix.lower() == '.csv':
-                    import csv
-                    with open(f, 'r', encoding='utf-8') as fh:
-                        reader = csv.DictReader(fh)
-                        for row in reader:
-                            r = {k.strip(): v for k, v in row.items()}
-                            r['_source_file'] = str(f)
-                            records.append(r)
-                else:
-                    if f.suffix.lower() in ('.ndjson', '.jsonl'):
-                        with open(f, 'r', encoding='utf-8') as fh:
-                            for line in fh:
-                                if not line.strip():
-                                    continue
-                                obj = json.loads(line)
-                                if isinstance(obj, dict):
-                                    obj['_source_file'] = str(f)
-                                    records.append(obj)
-                    else:
-                        with open(f, 'r', encoding='utf-8') as fh:
-                            obj = json.load(fh)
-                            if isinstance(obj, list):
-                                for it in obj:
-                                    if isinstance(it, dict):
-                                        it['_source_file'] = str(f)
-                                        records.append(it)
-                            elif isinstance(obj, dict):
-                                obj['_source_file'] = str(f)
-                                records.append(obj)
-                # update loaded_files
+            return [str(fp) for fp in self._device_file_index.get(device_key, [])]
+        return segment.drop_packed(fp for fp, _suffix in walk_data_files(folder))
+
+    def iter_records(self, device_key, columns=None, since=None, until=None, chunksize=None):
+        """Lazily iterate a device's records straight from disk.
+
+        Yields record dicts annotated with '_source_file', one file at a time,
+        so memory stays flat regardless of device size. `columns` is a list
+        of dotted paths (e.g. ['time', 'object.distance']); when given, each
+        record is reduced to a flat dict of those paths. `since`/`until`
+        (datetime, ISO8601 string or epoch seconds, both inclusive) drop
+        records whose top-level time falls outside the window. With
+        `chunksize`, DataFrames of up to that many normalized records (only
+        the projected columns, when given) are yielded instead of dicts.
+        """
+        lo = to_epoch(since) if since is not None else None
+        hi = to_epoch(until) if until is not None else None
+        files = self._device_files(device_key, lo, hi)
+        return self._iter_records(files, columns=columns, since=lo, until=hi, chunksize=chunksize)
+
+    @staticmethod
+    def _iter_records(files, columns=None, since=None, until=None, chunksize=None, loaded=None):
+        lo = to_epoch(since) if since is not None else None
+        hi = to_epoch(until) if until is not None else None
+
+        def _records():
+            for f, records in iter_sources(files, since=lo, until=hi):
                 try:
-                    if not hasattr(self, '_loaded_files'):
-                        self._loaded_files = []
-                    self._loaded_files.append(str(f))
+                    for rec in records:
+                        if lo is not None or hi is not None:
+                            t = record_time(rec)
+                            if t is None or (lo is not None and t < lo) or (hi is not None and t > hi):
+                                continue
+                        rec['_source_file'] = f
+                        yield project_record(rec, columns) if columns and not chunksize else rec
                 except Exception:
-                    pass
-            except Exception:
-                continue
+                    # skip unreadable or unparsable files
+                    instrument.active().add('read', calls=0, failed=1)
+                    continue
+                if loaded is not None:
+                    loaded.append(f)
+
+        if not chunksize:
+            return _records()
+        columns = columns or None
+
+        def _chunks():
+            batch = []
+            stats = instrument.active()
+            for rec in _records():
+                batch.append(rec)
+                if len(batch) >= chunksize:
+                    with stats.span('normalize', records=len(batch)):
+                        chunk = normalize_records(batch, columns=columns)
+                    yield chunk
+                    batch = []
+            if batch:
+                with stats.span('normalize', records=len(batch)):
+                    chunk = normalize_records(batch, columns=columns)
+                yield chunk
+
+        return _chunks()
+
+    @staticmethod
+    def _device_records(df):
+        """Wrap a cleaned frame in a DeviceRecords with its schema catalog built.
+
+        The catalog is computed here, on the loading thread, so callers
+        such as the GUI only union cached catalogs afterwards.
+        """
+        with instrument.active().span('store', records=len(df)):
+            records = DeviceRecords.from_frame(df)
+            records.schema
+        return records
+
+    @_recorded('load_device')
+    def load_device_full(self, device_key, since=None, until=None, columns=None):
+        """Load all records for a device (by folder name as returned by scan_dataset).
 
-        # Optionally, normalize/clean these records using existing clean_data
+        Returns a DeviceRecords (a compact columnar store that reads like a
+        list of record dicts). This performs full parsing of files under the
+        device folder and annotates records with '_source_file'.
+
+        since/until (datetime, ISO8601 string or epoch seconds, both
+        inclusive) restrict the load to records in that window. Files whose
+        indexed time range lies outside it are skipped without being opened.
+        columns: optional dotted paths (e.g. ['time', 'object.distance']);
+        only those fields (and '_source_file') are materialized. Cleaned
+        column names ('object_distance') are accepted as well.
+        """
+        lo = to_epoch(since) if since is not None else None
+        hi = to_epoch(until) if until is not None else None
+        files = self._device_files(device_key, lo, hi)
+        if not hasattr(self, '_loaded_files'):
+            self._loaded_files = []
+
+        if self._parse_cache is not None:
+            windowed = lo is not None or hi is not None
+            fetch = columns
+            if columns is not None and windowed:
+                # the window is applied to the cached rows: fetch their time too
+                fetch = list(columns) + list(TIME_KEYS)
+            df, loaded = self._parse_files_cached(files, columns=fetch)
+            self._loaded_files.extend(loaded)
+            if df is None:
+                import pandas as pd
+                return self._device_records(_clean(pd.DataFrame()))
+            df = _filter_window(df, lo, hi)
+            if fetch is not columns:
+                extra = set(match_columns(df.columns, TIME_KEYS)) - set(match_columns(df.columns, columns))
+                df = df.drop(columns=sorted(extra))
+            # cached rows carry the union of columns across the whole cache;
+            # keep only those this device actually has
+            return self._device_records(_clean(df.dropna(axis=1, how='all')))
+
+        # Stream the files in normalized chunks rather than building a list of
+        # every raw record first, then clean the device's frame. Nothing is
+        # stored on self, so devices can be loaded from several threads.
+        loaded = []
         try:
             import pandas as pd
-            df = pd.json_normalize(records)
-            df['_source_file'] = df.get('_source_file')
-            # run basic cleaning on this df
-            self.data = df
-            self._clean_data_internal()
-            # return records for the device as list of dicts
-            return self.data.to_dict(orient='records')
+            frames = list(self._iter_records(files, columns=columns, since=lo, until=hi,
+                                             chunksize=2048, loaded=loaded))
+            self._loaded_files.extend(loaded)
+            # re-apply the fixed types: concat turns mismatched categoricals into objects
+            df = apply_uplink_types(pd.concat(frames, ignore_index=True)) if frames else pd.DataFrame()
+            # return records for the device as a columnar list-of-dicts facade
+            return self._device_records(_clean(df))
         except Exception:
-            return records
-
-    
+            # the raw records, uncleaned, in the same container as every other path
+            raw = list(self._iter_records(files, columns=columns, since=lo, until=hi))
+            return self._device_records(pd.DataFrame(raw))
 
     # Allow passing a DataFrame directly (tests call clean_data(data))
     def clean_data(self, data=None):
@@ -285,63 +640,16 @@ class Organizer:
         return self._clean_data_internal()
 
     def _clean_data_internal(self):
-        # Internal cleaning used by both interfaces
+        # Internal cleaning used by both interfaces (see cleaning.py)
         if self.data is None:
             return None
-        # Make column names safe: lowercase, replace spaces/dots with underscores
-        orig_cols = list(self.data.columns)
-        safe_cols = [c.strip().lower().replace(' ', '_').replace('.', '_') for c in orig_cols]
-        self.data.columns = safe_cols
-
-        # Heuristics to find a device identifier column (don't map every
-        # 'device*' column to device_id — be specific)
-        device_col = None
-        # priority substrings to look for
-        priorities = ['dev_eui', 'deveui', 'devaddr', 'dev_addr', 'device_id', 'deviceid', 'deviceid']
-        for p in priorities:
-            for c in safe_cols:
-                if p in c:
-                    device_col = c
-                    break
-            if device_col:
-                break
-
-        # fallback: look for any column that contains 'dev' and ('eui' or 'addr' or 'id')
-        if not device_col:
-            for c in safe_cols:
-                lc = c.lower()
-                if 'dev' in lc and ('eui' in lc or 'addr' in lc or lc.endswith('_id') or '_id' in lc):
-                    device_col = c
-                    break
-
-        # If we found a device column, ensure there's a 'device_id' normalized column
-        if device_col and 'device_id' not in self.data.columns:
-            self.data['device_id'] = self.data[device_col].astype(str)
-
-        # Normalize time column if present
-        time_col = None
-        for c in safe_cols:
-            if 'time' in c or 'timestamp' in c or 'date' in c:
-                time_col = c
-                break
-        if time_col:
-            # parse times into pandas datetimes for consistent plotting
-            import pandas as _pd
-            # coerce errors to NaT and keep timezone info if present
-            self.data['time'] = _pd.to_datetime(self.data[time_col], errors='coerce', utc=True)
-
-        # Do basic cleaning: drop rows with no device id
-        if 'device_id' in self.data.columns:
-            self.data.dropna(subset=['device_id'], inplace=True)
-        else:
-            # if no device id, drop rows entirely (nothing to group)
-            self.data.dropna(how='all', inplace=True)
-
-        self.data.reset_index(drop=True, inplace=True)
+        with instrument.recording(self.stats):
+            self.data = _clean(self.data)
         return self.data
 
     def organize_by_device(self, data=None):
-        """Group rows by device_id and return a dict mapping device -> list of records.
+        """Group rows by device_id and return a dict mapping device -> records
+        (a DeviceRecords per device, which reads like a list of record dicts).
         Accepts an optional DataFrame argument for backwards compatibility with tests.
         """
         df = data if data is not None else self.data
@@ -373,9 +681,13 @@ class Organizer:
                 df['Device'] = df['device_id']
             return df
 
-        # Default behavior (no data arg): return dict mapping device -> records
-        grouped = self.data.groupby('device_id')
-        return grouped.apply(lambda x: x.to_dict(orient='records')).to_dict()
+        # Default behavior (no data arg): return dict mapping device -> records,
+        # each held as a compact DeviceRecords column store
+        with self.stats.span('group', records=len(self.data)) as counts:
+            organized = {device: DeviceRecords.from_frame(group.reset_index(drop=True))
+                         for device, group in self.data.groupby('device_id')}
+            counts['devices'] = len(organized)
+        return organized
 
     def save_processed_data(self, data, file_path):
         """Save a cleaned DataFrame (or records) to CSV."""
@@ -0,0 +1,127 @@
+"""Background prefetching of device loads for the GUI.
+
+A Prefetcher runs a load function for keys handed to request() on a small,
+bounded pool of daemon threads, most urgent first: requests carry a
+priority (lower runs sooner) and asking again for a queued key with a
+more urgent priority moves it up. Every key gets a concurrent.futures
+Future, so a consumer that needs the data now waits on the same load
+that may already be running instead of starting another one.
+"""
+import heapq
+import itertools
+import threading
+from concurrent.futures import Future
+
+
+class Prefetcher:
+
+    def __init__(self, load, workers=2, on_idle=None):
+        """load: callable(key) -> result, run on the worker threads.
+        workers: the most loads running at once.
+        on_idle: optional callable run on a worker thread each time the
+        last load finishes with nothing left queued (e.g. to persist what
+        the loads cached); its exceptions are ignored."""
+        self._load = load
+        self._on_idle = on_idle
+        self._max_workers = max(1, int(workers))
+        self._threads = []
+        self._idle = 0
+        self._running = 0
+        self._heap = []      # (priority, seq, key); stale entries are skipped
+        self._queued = {}    # key -> priority of its live heap entry
+        self._futures = {}   # key -> Future
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def request(self, key, priority=0):
+        """Schedule key for loading (if needed) and return its Future."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('Prefetcher is shut down')
+            fut = self._futures.get(key)
+            if fut is None:
+                fut = self._futures[key] = Future()
+            elif key not in self._queued or self._queued[key] <= priority:
+                # already running, finished, or queued at least as urgently
+                return fut
+            self._queued[key] = priority
+            heapq.heappush(self._heap, (priority, next(self._seq), key))
+            if len(self._heap) > self._idle and len(self._threads) < self._max_workers:
+                t = threading.Thread(target=self._work, name='prefetch', daemon=True)
+                self._threads.append(t)
+                t.start()
+            self._cond.notify()
+            return fut
+
+    def known(self, key):
+        """True if key is queued, loading or loaded."""
+        with self._cond:
+            return key in self._futures
+
+    def done(self, key):
+        """True if key has finished loading (successfully or not)."""
+        with self._cond:
+            fut = self._futures.get(key)
+        return fut is not None and fut.done()
+
+    def forget(self, key):
+        """Drop a finished key's result (the consumer has taken it)."""
+        with self._cond:
+            fut = self._futures.get(key)
+            if fut is not None and fut.done():
+                del self._futures[key]
+
+    def discard(self, predicate):
+        """Cancel queued keys and drop finished ones for which predicate(key)
+        is true. Loads already running are left to finish."""
+        with self._cond:
+            for key in [k for k in self._futures if predicate(k)]:
+                fut = self._futures[key]
+                if key in self._queued:
+                    del self._queued[key]
+                    fut.cancel()
+                elif not fut.done():
+                    continue
+                del self._futures[key]
+
+    def shutdown(self):
+        """Cancel everything queued and let the worker threads exit."""
+        with self._cond:
+            self._closed = True
+            for key in list(self._queued):
+                self._futures.pop(key).cancel()
+            self._queued.clear()
+            self._heap.clear()
+            self._cond.notify_all()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    if self._heap:
+                        priority, _seq, key = heapq.heappop(self._heap)
+                        if self._queued.get(key) == priority:
+                            break
+                        continue
+                    self._idle += 1
+                    self._cond.wait()
+                    self._idle -= 1
+                del self._queued[key]
+                fut = self._futures[key]
+                self._running += 1
+            if fut.set_running_or_notify_cancel():
+                try:
+                    fut.set_result(self._load(key))
+                except BaseException as exc:
+                    fut.set_exception(exc)
+            with self._cond:
+                self._running -= 1
+                idle = not self._running and not self._queued and not self._closed
+            if idle and self._on_idle is not None:
+                try:
+                    self._on_idle()
+                except Exception:
+                    pass
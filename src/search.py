@@ -0,0 +1,83 @@
+"""In-memory substring search over the device list.
+
+The GUI filters its device list as the user types. Lowercasing and
+scanning every label on each keystroke costs O(devices) Python work per
+key; a SearchIndex lowercases the searchable texts of each device (id,
+folder, device and profile names) once and keeps, for every trigram, the
+ascending list of devices whose texts contain it. A query of three or more
+characters only checks the devices listed under its rarest trigram, a
+query that extends the previous one only re-checks the previous results,
+and shorter queries fall back to checking the prepared texts.
+"""
+import bisect
+
+# gram length; queries shorter than this are checked against every item
+_N = 3
+
+
+def _grams(text):
+    return {text[j:j + _N] for j in range(len(text) - _N + 1)}
+
+
+class SearchIndex:
+
+    def __init__(self):
+        self._texts = []     # lowercased texts per item, joined by '\n'
+        self._postings = {}  # gram -> ascending item positions (may be stale)
+        self._last = None    # (query, results) of the previous query
+
+    def __len__(self):
+        return len(self._texts)
+
+    def add(self, *texts):
+        """Index a new item searchable by texts (None entries are skipped).
+        Returns its position, which is the number of items added before."""
+        i = len(self._texts)
+        text = self._prepare(texts)
+        self._texts.append(text)
+        for gram in _grams(text):
+            self._postings.setdefault(gram, []).append(i)
+        self._last = None
+        return i
+
+    def update(self, i, *texts):
+        """Replace the texts of item i."""
+        old, text = self._texts[i], self._prepare(texts)
+        if text == old:
+            return
+        self._texts[i] = text
+        # postings of grams the item lost are left behind: queries confirm
+        # every candidate against its current text anyway
+        for gram in _grams(text) - _grams(old):
+            items = self._postings.setdefault(gram, [])
+            j = bisect.bisect_left(items, i)
+            if j == len(items) or items[j] != i:
+                items.insert(j, i)
+        self._last = None
+
+    def matches(self, i, query):
+        """Whether item i contains query (case-insensitive)."""
+        query = query.strip().lower()
+        return not query or query in self._texts[i]
+
+    def query(self, query):
+        """Ascending positions of the items whose texts contain query
+        (case-insensitive); every item for an empty query."""
+        query = query.strip().lower()
+        if not query:
+            return list(range(len(self._texts)))
+        last = self._last
+        if last is not None and last[0] in query:
+            candidates = last[1]
+        elif len(query) >= _N:
+            candidates = min((self._postings.get(g, ()) for g in _grams(query)), key=len)
+        else:
+            candidates = range(len(self._texts))
+        texts = self._texts
+        results = [i for i in candidates if query in texts[i]]
+        self._last = (query, results)
+        return list(results)
+
+    @staticmethod
+    def _prepare(texts):
+        return '\n'.join(str(t).lower() for t in texts if t is not None and t != '')
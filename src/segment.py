@@ -0,0 +1,311 @@
+"""Packed segment files: many small uplink files in one append-only file.
+
+A device folder of thousands of 1-2 KB uplink JSONs costs an open/read/
+close per record. compact_folder packs them into a single segment file
+(SEGMENT_NAME, inside the same folder) laid out as
+
+    record line        compact JSON, one record per line, in time order
+    ...
+    footer line        JSON: device, count, tmin/tmax, the packed source
+                       file names with their size and mtime, an index of
+                       [time, offset, length] and each record's source
+    trailer            MAGIC + 8-byte little-endian footer offset
+
+New uplinks are appended after the last record and the footer is rewritten
+behind them, so existing record bytes never move. Readers load a whole
+segment with one sequential read, or use the footer's time index to read
+only the byte range of a time window.
+
+Loose files listed in a segment's footer are skipped by the organizer, so
+they can be kept or pruned after compaction. A kept file edited after it was
+packed no longer matches the size and mtime in the footer: it is loaded as a
+loose file again (the segment still holds its old records) and the next
+compaction replaces its packed records.
+
+Usage: python src/segment.py <dataset dir> [--prune]
+"""
+import bisect
+import os
+import struct
+import tempfile
+
+try:
+    from . import decoder
+except ImportError:  # running as a script from src/
+    import decoder
+
+SEGMENT_SUFFIX = '.seg'
+SEGMENT_NAME = 'uplinks' + SEGMENT_SUFFIX
+MAGIC = b'USEG0001'
+_TRAILER = struct.Struct('<8sQ')
+# loose files that can be packed
+_PACKABLE = ('.json', '.ndjson', '.jsonl')
+
+
+def is_segment(path):
+    return str(path).lower().endswith(SEGMENT_SUFFIX)
+
+
+def read_footer(path):
+    """Return a segment's footer dict (with 'footer_offset'), or None."""
+    with open(path, 'rb') as fh:
+        return _read_footer(fh)
+
+
+def _read_footer(fh):
+    fh.seek(0, os.SEEK_END)
+    end = fh.tell()
+    if end < _TRAILER.size:
+        return None
+    fh.seek(end - _TRAILER.size)
+    magic, offset = _TRAILER.unpack(fh.read(_TRAILER.size))
+    if magic != MAGIC or offset > end - _TRAILER.size:
+        return None
+    fh.seek(offset)
+    footer = decoder.loads(fh.read(end - _TRAILER.size - offset))
+    footer['footer_offset'] = offset
+    return footer
+
+
+def iter_segment_bytes(data):
+    """Yield the records of a segment held in memory (e.g. an archive member)."""
+    magic, offset = _TRAILER.unpack(data[-_TRAILER.size:])
+    if magic != MAGIC:
+        raise ValueError('Not a segment file (missing footer)')
+    footer = decoder.loads(data[offset:-_TRAILER.size])
+    for _t, start, length in footer['index']:
+        yield decoder.loads(data[start:start + length])
+
+
+def iter_segment_records(path, since=None, until=None):
+    """Yield a segment's records in time order.
+
+    since/until are epoch seconds (inclusive); when given, only the byte
+    range covering that window is read. Without them the record area is
+    read in one call.
+    """
+    with open(path, 'rb') as fh:
+        footer = _read_footer(fh)
+        if footer is None:
+            raise ValueError(f'Not a segment file (missing footer): {path}')
+        index = footer['index']
+        lo, hi = 0, len(index)
+        if since is not None or until is not None:
+            # records are in time order; untimed records sort first
+            times = [t if t is not None else float('-inf') for t, _off, _len in index]
+            if since is not None:
+                lo = bisect.bisect_left(times, since)
+            if until is not None:
+                hi = bisect.bisect_right(times, until)
+        if lo >= hi:
+            return
+        start = index[lo][1]
+        stop = index[hi - 1][1] + index[hi - 1][2]
+        fh.seek(start)
+        data = fh.read(stop - start)
+    for _t, offset, length in index[lo:hi]:
+        yield decoder.loads(data[offset - start:offset - start + length])
+
+
+def packed_sources(path):
+    """Map the absolute paths of the loose files packed into a segment to
+    their [size, mtime_ns] when packed (None in segments that predate it)."""
+    footer = read_footer(path)
+    if footer is None:
+        return {}
+    folder = os.path.dirname(str(path))
+    stats = footer.get('stats', {})
+    return {os.path.join(folder, name): stats.get(name) for name in footer.get('sources', ())}
+
+
+def _file_stat(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _edited(path, stat):
+    # whether a packed loose file changed since it was packed
+    if stat is None:
+        return False
+    try:
+        return _file_stat(path) != list(stat)
+    except OSError:
+        return False
+
+
+def drop_packed(files):
+    """Remove loose files already packed into a segment from a file list.
+
+    Files edited since they were packed are kept: their new contents are
+    not in the segment yet.
+    """
+    files = list(files)
+    segments = [f for f in files if is_segment(f)]
+    if not segments:
+        return files
+    packed = {}
+    for seg in segments:
+        try:
+            packed.update(packed_sources(seg))
+        except Exception:
+            continue
+    return [f for f in files if f not in packed or _edited(f, packed[f])]
+
+
+def write_records(path, records, sources=(), device=None, stats=None, replace=()):
+    """Add records to a segment, creating it if needed.
+
+    records: list of (epoch time or None, record dict[, source name]).
+    Records that all come after the segment's last one are appended;
+    otherwise the segment is rewritten in time order. The footer is
+    rewritten behind the records either way. sources: loose file names
+    (relative to the segment's folder) the records came from; stats
+    optionally maps them to their [size, mtime_ns]. replace: names of
+    packed files being packed again (edited since); their old records are
+    dropped, which also rewrites the segment. Returns the number of records
+    written.
+    """
+    path = str(path)
+    if not records and not replace:
+        return 0
+    footer = read_footer(path) if os.path.exists(path) else None
+    index = list(footer['index']) if footer else []
+    names = list(footer.get('sources', ())) if footer else []
+    # position in names of each record's source (None: unknown)
+    origin = list(footer.get('origin', [None] * len(index))) if footer else []
+    stats = dict((footer or {}).get('stats', {}), **(stats or {}))
+    records = [(tr[0], tr[1], tr[2] if len(tr) > 2 else None) for tr in records]
+    # untimed records sort first, like in the footer's time index
+    records.sort(key=lambda tr: (tr[0] is not None, tr[0] or 0))
+    last = next((t for t, _o, _l in reversed(index) if t is not None), None)
+    first = records[0][0] if records else last
+    replace = set(replace) & set(names)
+    if index and (first is None or (last is not None and first < last) or replace):
+        # out-of-order or replaced data: merge with the existing records and rewrite
+        old = [(t, rec, names[o] if o is not None else None)
+               for (t, _o, _l), o, rec in zip(index, origin, iter_segment_records(path))
+               if o is None or names[o] not in replace]
+        if not old and not records:
+            os.remove(path)
+            return 0
+        # write the merged segment beside the old one and swap it in, so a
+        # failed or interrupted rewrite leaves the old segment intact
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.',
+                                   prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+        os.close(fd)
+        try:
+            os.remove(tmp)  # write_records creates the segment from scratch
+            n = write_records(tmp, old + records, names + list(sources), device or footer.get('device'), stats)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return n - len(old)
+
+    mode = 'r+b' if footer is not None else 'wb'
+    with open(path, mode) as fh:
+        start = footer['footer_offset'] if footer is not None else 0
+        fh.seek(start)
+        fh.truncate()
+        offset = start
+        known = set(names)
+        names += [n for n in dict.fromkeys(sources) if n not in known]
+        position = {n: i for i, n in enumerate(names)}
+        for t, rec, source in records:
+            line = decoder.dumps(rec)
+            fh.write(line + b'\n')
+            index.append([t, offset, len(line)])
+            origin.append(position.get(source))
+            offset += len(line) + 1
+        times = [t for t, _o, _l in index if t is not None]
+        meta = {
+            'version': 1,
+            'device': device or (footer or {}).get('device'),
+            'count': len(index),
+            'tmin': min(times) if times else None,
+            'tmax': max(times) if times else None,
+            'sources': names,
+            'stats': {n: stats[n] for n in names if n in stats},
+            'index': index,
+            'origin': origin,
+        }
+        fh.write(decoder.dumps(meta) + b'\n')
+        fh.write(_TRAILER.pack(MAGIC, offset))
+    return len(records)
+
+
+def compact_folder(folder, prune=False):
+    """Pack a folder's loose JSON/NDJSON files into its segment.
+
+    Files already packed are skipped unless they were edited since, in
+    which case their packed records are replaced. With prune=True the
+    packed loose files are deleted afterwards. Returns the number of files
+    packed.
+    """
+    try:
+        from .index import iter_file_records, record_time, resolve_device_id
+    except ImportError:  # running as a script from src/
+        from index import iter_file_records, record_time, resolve_device_id
+
+    folder = str(folder)
+    seg_path = os.path.join(folder, SEGMENT_NAME)
+    already = packed_sources(seg_path) if os.path.exists(seg_path) else {}
+    names = sorted(n for n in os.listdir(folder)
+                   if os.path.splitext(n)[1].lower() in _PACKABLE and not n.startswith('.'))
+    todo = [n for n in names if os.path.join(folder, n) not in already
+            or _edited(os.path.join(folder, n), already[os.path.join(folder, n)])]
+    records = []
+    packed = []
+    stats = {}
+    device = None
+    for name in todo:
+        path = os.path.join(folder, name)
+        try:
+            # stat before reading, so an edit made meanwhile is seen next time
+            stat = _file_stat(path)
+            file_records = list(iter_file_records(path))
+        except Exception:
+            # leave unreadable files loose
+            continue
+        for rec in file_records:
+            records.append((record_time(rec), rec, name))
+        if device is None and file_records:
+            device = resolve_device_id(file_records[0], path)
+        packed.append(name)
+        stats[name] = stat
+    if packed:
+        replace = [n for n in packed if os.path.join(folder, n) in already]
+        write_records(seg_path, records, sources=packed, device=device, stats=stats, replace=replace)
+    if prune:
+        # edited files that could not be packed again stay
+        kept = {os.path.join(folder, n) for n in todo} - {os.path.join(folder, n) for n in packed}
+        for name in packed + [os.path.relpath(p, folder) for p in already if p not in kept]:
+            try:
+                os.remove(os.path.join(folder, name))
+            except FileNotFoundError:
+                pass
+    return len(packed)
+
+
+def compact_tree(root, prune=False):
+    """compact_folder every folder under root holding loose JSON files."""
+    total = 0
+    for folder, _dirs, files in os.walk(root):
+        if any(os.path.splitext(n)[1].lower() in _PACKABLE for n in files):
+            total += compact_folder(folder, prune=prune)
+    return total
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Pack uplink files into per-folder segments.')
+    parser.add_argument('root', help='dataset directory (or a single device folder)')
+    parser.add_argument('--prune', action='store_true', help='delete loose files once packed')
+    args = parser.parse_args(argv)
+    count = compact_tree(args.root, prune=args.prune)
+    print(f'Packed {count} files under {args.root}')
+
+
+if __name__ == '__main__':
+    main()
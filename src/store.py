@@ -0,0 +1,421 @@
+"""Compact columnar container for one device's records.
+
+Organizer used to hand the GUI a list of dicts per device: one Python dict
+per uplink, every key string repeated in each of them. DeviceRecords keeps
+the same rows as columns instead:
+
+- numeric and boolean fields as NumPy arrays,
+- datetimes as int64 epoch nanoseconds,
+- repeated strings (gatewayId, eventType, deviceName, ...) as categorical
+  codes plus a small array of categories,
+- anything else (lists such as rxInfo, free text) as object arrays.
+
+It still behaves like a read-only list of record dicts (len, indexing,
+iteration), so code written against the old dict-of-lists-of-dicts keeps
+working, while column()/to_frame() give vectorized access.
+"""
+from collections.abc import Sequence
+
+# object columns with at most this share of distinct values become categorical
+_CATEGORICAL_RATIO = 0.5
+# rows materialized at a time while iterating
+_ITER_BLOCK = 1024
+# int64 value NumPy uses for NaT
+_NAT = -2 ** 63
+
+
+def _merge_duplicate_columns(df):
+    """One column per name. Columns sharing a name (such as the 'object.Bat'
+    and 'object.BAT' of two device profiles once cleaned) are merged, the
+    first non-null value winning."""
+    import pandas as pd
+    merged = {}
+    for j, name in enumerate(df.columns):
+        s = df.iloc[:, j]
+        merged[name] = s if name not in merged else merged[name].where(merged[name].notna(), s)
+    return pd.DataFrame(merged, index=df.index)
+
+
+class DeviceRecords(Sequence):
+
+    def __init__(self, columns, length):
+        """columns: dict name -> (kind, payload), see from_frame."""
+        self._columns = columns
+        self._length = length
+        self._schema = None
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build a DeviceRecords from a DataFrame (one row per record)."""
+        import numpy as np
+        import pandas as pd
+        from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_numeric_dtype
+
+        if df.columns.has_duplicates:
+            df = _merge_duplicate_columns(df)
+        columns = {}
+        n = len(df)
+        for name in df.columns:
+            s = df[name]
+            if is_datetime64_any_dtype(s.dtype):
+                tz = getattr(s.dt, 'tz', None)
+                values = s.dt.tz_convert('UTC') if tz is not None else s
+                ns = values.dt.as_unit('ns').to_numpy(dtype='datetime64[ns]').view('int64')
+                columns[name] = ('time', (ns, 'UTC' if tz is not None else None))
+            elif is_bool_dtype(s.dtype) or is_numeric_dtype(s.dtype):
+                if isinstance(s.dtype, pd.CategoricalDtype):
+                    s = s.astype(object)
+                elif isinstance(s.dtype, pd.api.extensions.ExtensionDtype) and s.hasnans:
+                    # nullable Int32/Int64 columns: missing values become NaN
+                    s = s.astype('float64')
+                columns[name] = ('num', s.to_numpy())
+            else:
+                values = s.to_numpy(dtype=object)
+                kind = ('obj', values)
+                try:
+                    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+                    if (len(uniques) <= max(1, n * _CATEGORICAL_RATIO)
+                            and all(isinstance(v, str) for v in uniques)):
+                        kind = ('cat', (codes.astype(_code_dtype(len(uniques))),
+                                        np.asarray(uniques, dtype=object)))
+                except TypeError:
+                    # unhashable values (lists of dicts such as rxInfo) stay as objects
+                    pass
+                columns[name] = kind
+        return cls(columns, n)
+
+    # -- sequence facade -------------------------------------------------
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            sel = range(self._length)[index]
+            return self._take(list(sel))
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('DeviceRecords index out of range')
+        return {name: _cell(kind, payload, index) for name, (kind, payload) in self._columns.items()}
+
+    def __iter__(self):
+        names = list(self._columns)
+        for start in range(0, self._length, _ITER_BLOCK):
+            stop = min(start + _ITER_BLOCK, self._length)
+            cols = [_block(*self._columns[name], start, stop) for name in names]
+            for values in zip(*cols):
+                yield dict(zip(names, values))
+
+    def __repr__(self):
+        return f'DeviceRecords({self._length} records, {len(self._columns)} columns)'
+
+    # -- columnar access -------------------------------------------------
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    def column(self, name):
+        """Return a column as a NumPy array (datetimes as datetime64[ns])."""
+        import numpy as np
+        kind, payload = self._columns[name]
+        if kind == 'time':
+            return payload[0].view('datetime64[ns]')
+        if kind == 'cat':
+            codes, categories = payload
+            out = np.empty(len(codes), dtype=object)
+            valid = codes >= 0
+            out[valid] = categories[codes[valid]]
+            out[~valid] = np.nan
+            return out
+        return payload
+
+    @property
+    def schema(self):
+        """Catalog of the measurement keys in these records.
+
+        Maps dotted key -> {'type': inferred type name, 'count': non-null
+        rows}. Nested dicts and lists of dicts in object columns (e.g.
+        rxinfo) contribute their sub-keys ('rxinfo.rssi'). Computed once
+        and cached; the records are immutable, so a reload with new files
+        produces a new DeviceRecords and thereby a fresh catalog.
+        """
+        if self._schema is None:
+            self._schema = self._build_schema()
+        return self._schema
+
+    def _build_schema(self):
+        import numpy as np
+        schema = {}
+        for name, (kind, payload) in self._columns.items():
+            if name.startswith('_'):
+                continue
+            if kind == 'time':
+                count = int((payload[0] != _NAT).sum())
+                typ = 'datetime'
+            elif kind == 'cat':
+                count = int((payload[0] >= 0).sum())
+                typ = 'str'
+            elif kind == 'num':
+                typ = {'f': 'float', 'i': 'int', 'u': 'int', 'b': 'bool'}.get(payload.dtype.kind, str(payload.dtype))
+                count = int((~np.isnan(payload)).sum()) if payload.dtype.kind == 'f' else len(payload)
+            else:
+                for cell in payload:
+                    _add_to_schema(schema, name, cell, set())
+                continue
+            if count:
+                schema[name] = {'type': typ, 'count': count}
+        return schema
+
+    def to_frame(self, columns=None):
+        """Return the records as a pandas DataFrame.
+
+        columns: optional dotted paths (see utils.match_columns); only the
+        matching columns are converted.
+        """
+        import pandas as pd
+        names = list(self._columns)
+        if columns is not None:
+            try:
+                from .utils import match_columns
+            except ImportError:  # running as a script from src/
+                from utils import match_columns
+            names = match_columns(names, columns)
+        data = {}
+        for name in names:
+            kind, payload = self._columns[name]
+            if kind == 'time':
+                ns, tz = payload
+                values = pd.to_datetime(ns.view('datetime64[ns]'))
+                data[name] = values.tz_localize(tz) if tz else values
+            elif kind == 'cat':
+                codes, categories = payload
+                data[name] = pd.Categorical.from_codes(codes, categories=categories)
+            else:
+                data[name] = payload
+        return pd.DataFrame(data, index=pd.RangeIndex(self._length))
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the column buffers (object cells excluded)."""
+        total = 0
+        for kind, payload in self._columns.values():
+            if kind == 'time':
+                total += payload[0].nbytes
+            elif kind == 'cat':
+                total += payload[0].nbytes + payload[1].nbytes
+            else:
+                total += payload.nbytes
+        return total
+
+    def _take(self, positions):
+        import numpy as np
+        idx = np.asarray(positions, dtype=np.intp)
+        columns = {}
+        for name, (kind, payload) in self._columns.items():
+            if kind == 'time':
+                columns[name] = (kind, (payload[0][idx], payload[1]))
+            elif kind == 'cat':
+                columns[name] = (kind, (payload[0][idx], payload[1]))
+            else:
+                columns[name] = (kind, payload[idx])
+        return DeviceRecords(columns, len(idx))
+
+
+def _code_dtype(n_categories):
+    import numpy as np
+    for dt in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dt).max:
+            return dt
+    return np.int64
+
+
+def _cell(kind, payload, i):
+    """Return one cell as the Python value DataFrame.to_dict would give."""
+    if kind == 'time':
+        import pandas as pd
+        ns, tz = payload
+        return pd.Timestamp(int(ns[i]), tz=tz) if ns[i] != _NAT else pd.NaT
+    if kind == 'cat':
+        codes, categories = payload
+        return categories[codes[i]] if codes[i] >= 0 else float('nan')
+    v = payload[i]
+    return v.item() if hasattr(v, 'item') else v
+
+
+def _block(kind, payload, start, stop):
+    """Return cells [start, stop) of a column as a list of Python values."""
+    if kind == 'time':
+        import pandas as pd
+        ns, tz = payload
+        return [pd.Timestamp(int(v), tz=tz) if v != _NAT else pd.NaT for v in ns[start:stop]]
+    if kind == 'cat':
+        codes, categories = payload
+        nan = float('nan')
+        return [categories[c] if c >= 0 else nan for c in codes[start:stop]]
+    return payload[start:stop].tolist()
+
+
+def _add_to_schema(schema, key, value, seen):
+    """Record `value` (and any nested keys) under `key` in a schema catalog.
+
+    `seen` holds the keys already counted for the current row so a list of
+    several gateways only counts once per record.
+    """
+    try:
+        if value is None or value != value:  # None, NaN or NaT
+            return
+    except (TypeError, ValueError):
+        pass
+    if isinstance(value, dict):
+        for k, v in value.items():
+            if not isinstance(k, str) or k.startswith('_'):
+                continue
+            _add_to_schema(schema, f'{key}.{k}' if key else k, v, seen)
+        return
+    if isinstance(value, list):
+        scalar = False
+        for it in value:
+            if isinstance(it, dict):
+                _add_to_schema(schema, key, it, seen)
+            else:
+                scalar = True
+        if not scalar:
+            return
+        typ = 'list'
+    else:
+        typ = type(value).__name__
+    if key in seen:
+        return
+    seen.add(key)
+    entry = schema.get(key)
+    if entry is None:
+        schema[key] = {'type': typ, 'count': 1}
+    else:
+        entry['count'] += 1
+
+
+def record_schema(records):
+    """Return the schema catalog for a device's records.
+
+    DeviceRecords answer from their cached catalog; plain lists of record
+    dicts (scan samples) are walked row by row.
+    """
+    if isinstance(records, DeviceRecords):
+        return records.schema
+    schema = {}
+    for rec in records or []:
+        if isinstance(rec, dict):
+            _add_to_schema(schema, '', rec, set())
+    return schema
+
+
+def _resolve_column(names, key):
+    """Find the column for a measurement key: exact, '.'->'_' or case-insensitive."""
+    if key in names:
+        return key
+    alt = key.replace('.', '_')
+    if alt in names:
+        return alt
+    lowered = {n.lower(): n for n in names}
+    return lowered.get(key.lower()) or lowered.get(alt.lower())
+
+
+def _column_values(records, key):
+    """Return a device's values for `key` as an array (None if unavailable).
+
+    Columns are matched whole first; otherwise the longest column prefix of
+    a dotted key is taken and the rest of the path is followed inside each
+    cell, e.g. 'rxinfo.rssi' reads 'rssi' from the rxinfo list of dicts.
+    """
+    import numpy as np
+    try:
+        from .utils import get_path
+    except ImportError:  # running as a script from src/
+        from utils import get_path
+
+    names = records.columns
+    col = _resolve_column(names, key)
+    if col is not None:
+        return records.column(col)
+    parts = key.split('.')
+    for cut in range(len(parts) - 1, 0, -1):
+        col = _resolve_column(names, '.'.join(parts[:cut]))
+        if col is None:
+            continue
+        rest = '.'.join(parts[cut:])
+        cells = records.column(col)
+        out = np.empty(len(cells), dtype=object)
+        for i, cell in enumerate(cells):
+            out[i] = get_path(cell, rest) if isinstance(cell, (dict, list)) else None
+        return out
+    return None
+
+
+def extract_series(records, measurement, time_keys=('time', 'timestamp', 'ts')):
+    """Pull (times, values) for one measurement of one device.
+
+    Returns two NumPy arrays ready to plot: tz-naive UTC datetime64[ns]
+    times sorted ascending, and float64 values, with rows lacking either
+    dropped. DeviceRecords are read column-wise; plain lists of record
+    dicts (e.g. scan samples) are handled row by row.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if isinstance(records, DeviceRecords):
+        times = None
+        for tk in time_keys:
+            if times is not None and not np.isnat(times).any():
+                # cleaning already filled 'time' from the other time columns
+                break
+            raw = _column_values(records, tk)
+            if raw is None:
+                continue
+            parsed = _to_utc_naive(raw)
+            times = parsed if times is None else np.where(np.isnat(times), parsed, times)
+        values = _column_values(records, measurement)
+    else:
+        try:
+            from .utils import get_path
+        except ImportError:  # running as a script from src/
+            from utils import get_path
+        rows = [r for r in (records or []) if isinstance(r, dict)]
+        times = None
+        for tk in time_keys:
+            if times is not None and not np.isnat(times).any():
+                break
+            raw = np.array([get_path(r, tk) for r in rows], dtype=object)
+            parsed = _to_utc_naive(raw)
+            times = parsed if times is None else np.where(np.isnat(times), parsed, times)
+        alt = measurement.replace('.', '_')
+        values = []
+        for r in rows:
+            v = get_path(r, measurement)
+            values.append(get_path(r, alt) if v is None else v)
+        values = np.array(values, dtype=object)
+
+    if times is None or values is None or len(values) == 0:
+        return np.array([], dtype='datetime64[ns]'), np.array([], dtype=float)
+    values = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    keep = ~np.isnat(times) & ~np.isnan(values)
+    times, values = times[keep], values[keep]
+    order = np.argsort(times, kind='stable')
+    return times[order], values[order]
+
+
+def _to_utc_naive(values):
+    """Parse an array of timestamps into tz-naive UTC datetime64[ns].
+
+    Columns parsed at load time (datetime64) are only converted.
+    """
+    import pandas as pd
+    try:
+        from .cleaning import parse_times
+    except ImportError:  # running as a script from src/
+        from cleaning import parse_times
+    if values.dtype.kind == 'M':
+        return values.astype('datetime64[ns]')
+    parsed = parse_times(pd.Series(values, dtype=object))
+    return parsed.dt.tz_localize(None).to_numpy(dtype='datetime64[ns]')
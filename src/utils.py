@@ -15,4 +15,167 @@ def save_to_csv(data, file_path):
 def load_from_csv(file_path):
     # Function to load data from a CSV file
     import pandas as pd
-    return pd.read_csv(file_path).to_dict(orient='records')
\ No newline at end of file
+    return pd.read_csv(file_path).to_dict(orient='records')
+
+def get_path(record, path):
+    """Return the value at a dotted path inside a nested record, or None.
+
+    A literal key equal to the whole path wins (records flattened by
+    json_normalize). When a list is met before the path is exhausted, the
+    first dict element containing the next part is followed, e.g.
+    'rxInfo.rssi' resolves through the rxInfo list.
+    """
+    if not isinstance(record, (dict, list)):
+        return None
+    if isinstance(record, dict) and path in record:
+        return record[path]
+    cur = record
+    for part in path.split('.'):
+        if isinstance(cur, dict) and part in cur:
+            cur = cur[part]
+        elif isinstance(cur, list):
+            cur = next((it[part] for it in cur if isinstance(it, dict) and part in it), None)
+            if cur is None:
+                return None
+        else:
+            return None
+    return cur
+
+
+def field_paths(record, prefix=''):
+    """Yield the dotted path of every field of a nested record, following
+    dicts and the dicts inside lists as get_path does (list fields may
+    repeat)."""
+    for key, value in record.items():
+        path = prefix + str(key)
+        yield path
+        if isinstance(value, dict):
+            yield from field_paths(value, path + '.')
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, dict):
+                    yield from field_paths(item, path + '.')
+
+
+def project_record(record, columns):
+    """Return a flat dict holding only the dotted `columns` of a record.
+
+    A column that is no path of the record is looked up by its cleaned
+    name ('object_temperature' finds 'object.temperature'), see
+    clean_column_name. '_source_file' is carried over when present.
+    """
+    out = {}
+    missing = []
+    for c in columns:
+        out[c] = value = get_path(record, c)
+        if value is None:
+            missing.append(c)
+    if missing:
+        by_safe = {}
+        for path in field_paths(record):
+            by_safe.setdefault(clean_column_name(path), path)
+        for c in missing:
+            path = by_safe.get(clean_column_name(c))
+            if path is not None:
+                out[c] = get_path(record, path)
+    if '_source_file' in record:
+        out['_source_file'] = record['_source_file']
+    return out
+
+
+def clean_column_name(name):
+    """The cleaned form of a column name: stripped, lowercase, spaces and
+    dots as underscores ('object.temperature' -> 'object_temperature')."""
+    return str(name).strip().lower().replace(' ', '_').replace('.', '_')
+
+
+def match_columns(available, columns):
+    """Return the names in `available` selected by the dotted `columns`.
+
+    A column matches a path exactly, as a nested field of it ('object'
+    selects 'object.temperature', ...) or when both clean to the same name
+    ('.' and spaces as '_', lowercase: 'object_temperature' selects
+    'object.temperature' and the reverse). '_source_file' is always kept.
+    Names come in the order of `columns`.
+    """
+    available = list(available)
+    cleaned = [clean_column_name(name) for name in available]
+    out = []
+    for path in columns:
+        safe = clean_column_name(path)
+        for name, name_safe in zip(available, cleaned):
+            if name in out:
+                continue
+            if name == path or name.startswith(path + '.') or name_safe == safe:
+                out.append(name)
+    if '_source_file' in available and '_source_file' not in out:
+        out.append('_source_file')
+    return out
+
+
+# File suffixes the organizer knows how to parse ('.seg': packed segments, see segment.py)
+DATA_SUFFIXES = ('.csv', '.json', '.ndjson', '.jsonl', '.seg')
+
+
+def walk_data_files(root, suffixes=DATA_SUFFIXES, dir_cache=None):
+    """Walk `root` once with os.scandir and yield (path, suffix) for data files.
+
+    Every directory is listed a single time no matter how many suffixes are
+    requested; files are classified by their lowercased suffix as they are
+    seen. Entries starting with '.' are skipped, like glob's '**'. Paths
+    are built with os.path.join so they match glob-style paths.
+
+    dir_cache: optional dict mapping directory -> {'mtime', 'dirs', 'files'}
+    (child names, files filtered by `suffixes`). Directories whose mtime still matches their entry are not
+    listed again. Entries are refreshed in place, and entries for vanished
+    directories are dropped once the walk completes.
+    """
+    import os
+    import time
+
+    suffixes = tuple(s.lower() for s in suffixes)
+    stack = [str(root)]
+    seen = set()
+    while stack:
+        d = stack.pop()
+        entry = None
+        mtime = None
+        if dir_cache is not None:
+            try:
+                mtime = os.stat(d).st_mtime_ns
+            except OSError:
+                continue
+            entry = dir_cache.get(d)
+            if entry is not None and entry.get('mtime') != mtime:
+                entry = None
+        if entry is None:
+            subdirs, files = [], []
+            try:
+                with os.scandir(d) as it:
+                    for e in it:
+                        if e.name.startswith('.'):
+                            continue
+                        try:
+                            if e.is_dir():
+                                subdirs.append(e.name)
+                                continue
+                        except OSError:
+                            continue
+                        if os.path.splitext(e.name)[1].lower() in suffixes:
+                            files.append(e.name)
+            except OSError:
+                continue
+            entry = {'mtime': mtime, 'dirs': sorted(subdirs), 'files': sorted(files)}
+            if dir_cache is not None:
+                # a directory modified just now may still change within the
+                # same mtime tick; leave it unverified so the next walk re-lists it
+                if time.time_ns() - mtime < 2_000_000_000:
+                    entry['mtime'] = None
+                dir_cache[d] = entry
+        seen.add(d)
+        for name in entry['files']:
+            yield os.path.join(d, name), os.path.splitext(name)[1].lower()
+        stack.extend(os.path.join(d, name) for name in reversed(entry['dirs']))
+    if dir_cache is not None:
+        for d in [d for d in dir_cache if d not in seen]:
+            del dir_cache[d]
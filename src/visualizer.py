@@ -1,15 +1,171 @@
+import functools
+
+try:
+    from . import instrument
+    from .cleaning import parse_times
+    from .utils import match_columns, project_record
+except ImportError:  # running as a script from src/
+    import instrument
+    from cleaning import parse_times
+    from utils import match_columns, project_record
+
+# plotted points per horizontal pixel of the axes; min/max emits two per bucket
+_POINTS_PER_PIXEL = 2
+_MIN_TARGET_POINTS = 200
+
+
+@functools.lru_cache(maxsize=None)
+def _pyplot():
+    """matplotlib.pyplot, imported on the first plot rather than at startup."""
+    import matplotlib.pyplot as plt
+    return plt
+
+
+@functools.lru_cache(maxsize=None)
+def _tk_canvas():
+    """(FigureCanvasTkAgg, NavigationToolbar2Tk), imported on first embed."""
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+    return FigureCanvasTkAgg, NavigationToolbar2Tk
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of n_out representative points.
+
+    x must be numeric and sorted. The first and last points are always kept;
+    every bucket in between keeps the point forming the largest triangle with
+    the previously kept point and the average of the next bucket.
+    """
+    import numpy as np
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    out = np.empty(n_out, dtype=np.intp)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            nxt = slice(edges[i + 1], edges[i + 2])
+            avg_x, avg_y = x[nxt].mean(), y[nxt].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax()) if hi > lo else lo
+        out[i + 1] = a
+    return out
+
+
+def minmax_indices(y, n_buckets):
+    """Per-bucket min/max envelope: sorted indices of at most 2 * n_buckets + 2 points.
+
+    Keeps the extremes of each bucket (so spikes survive) plus both endpoints.
+    """
+    import numpy as np
+    n = len(y)
+    if n <= 2 * n_buckets or n_buckets < 1:
+        return np.arange(n)
+    y = np.asarray(y, dtype='float64')
+    size = n // n_buckets
+    body = y[:size * n_buckets].reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    picks = [offsets + body.argmin(axis=1), offsets + body.argmax(axis=1), [0, n - 1]]
+    tail = y[size * n_buckets:]
+    if len(tail):
+        start = size * n_buckets
+        picks.append([start + int(tail.argmin()), start + int(tail.argmax())])
+    return np.unique(np.concatenate(picks).astype(np.intp))
+
+
+def decimate(x, y, n_points, method='minmax'):
+    """Return (x, y) reduced to roughly n_points points with the given method.
+
+    method is 'minmax', 'lttb' or None (no decimation). x must be sorted;
+    datetime64 x values are supported.
+    """
+    import numpy as np
+    if method is None or len(x) <= n_points:
+        return x, y
+    if method == 'lttb':
+        xs = np.asarray(x)
+        if xs.dtype.kind == 'M':
+            xs = xs.astype('datetime64[ns]').astype('int64')
+        idx = lttb_indices(xs, y, n_points)
+    elif method == 'minmax':
+        idx = minmax_indices(y, max(n_points // 2, 1))
+    else:
+        raise ValueError(f"Unknown decimation method: {method!r}")
+    return x[idx], y[idx]
+
+
+class _DecimatedPlot:
+    """Keeps the full series behind each plotted line and re-decimates the
+    visible window whenever the x limits change (pan/zoom) or the canvas is
+    resized, so zooming in still shows full detail."""
+
+    def __init__(self, ax, method):
+        self.ax = ax
+        self.method = method
+        self.series = []  # (line, x, y, x as matplotlib float units)
+        self._connected = False
+
+    def target_points(self):
+        width = self.ax.bbox.width if self.ax.bbox is not None else 0
+        return max(int(width * _POINTS_PER_PIXEL), _MIN_TARGET_POINTS)
+
+    def plot(self, x, y, label):
+        import numpy as np
+        x, y = np.asarray(x), np.asarray(y)
+        px, py = decimate(x, y, self.target_points(), self.method)
+        line, = self.ax.plot(px, py, label=label)
+        if len(px) < len(x):
+            self.series.append((line, x, y, self.ax.convert_xunits(x)))
+        return line
+
+    def connect(self):
+        """Hook zoom/resize events; call once the figure's final canvas exists."""
+        if not self.series or self._connected:
+            return
+        self._connected = True
+        self.ax.callbacks.connect('xlim_changed', self.update)
+        try:
+            self.ax.figure.canvas.mpl_connect('resize_event', lambda _event: self.update(self.ax))
+        except Exception:
+            pass
+
+    def update(self, ax):
+        import numpy as np
+        lo, hi = ax.get_xlim()
+        target = self.target_points()
+        for line, x, y, xnum in self.series:
+            # one point either side keeps the line running off the edges
+            start = max(int(np.searchsorted(xnum, lo, side='left')) - 1, 0)
+            stop = min(int(np.searchsorted(xnum, hi, side='right')) + 1, len(x))
+            px, py = decimate(x[start:stop], y[start:stop], target, self.method)
+            line.set_data(px, py)
+        ax.figure.canvas.draw_idle()
+
+
 class Visualizer:
     """Visualizer that can accept data at construction time or when calling
     display methods. Handles both pandas.DataFrame and organizer-style
     dict-of-records (device_id -> list[dict]) inputs.
+
+    decimation: 'minmax' (default), 'lttb' or None. Long series are reduced
+    to about two points per pixel of plot width before drawing and
+    re-decimated on zoom.
     """
 
-    def __init__(self, data=None):
+    def __init__(self, data=None, decimation='minmax'):
         self.data = data
+        self.decimation = decimation
 
-    def display_spreadsheet(self, data=None, output_path='output.csv'):
+    def display_spreadsheet(self, data=None, output_path='output.csv', columns=None):
         """Save data to a CSV file. Accepts a DataFrame or a dict produced by
-        Organizer.organize_by_device()."""
+        Organizer.organize_by_device(). columns: optional dotted paths to
+        export (see utils.match_columns); 'device_id' is kept for dicts."""
         import pandas as pd
 
         data = data if data is not None else self.data
@@ -19,15 +175,24 @@ class Visualizer:
 
         # If data is a dict mapping device -> list[records], flatten it
         if isinstance(data, dict):
-            rows = []
+            frames = []
             for device, records in data.items():
+                if hasattr(records, 'to_frame'):
+                    # columnar DeviceRecords: convert whole columns at once
+                    frame = records.to_frame(columns=None if columns is None else list(columns) + ['device_id'])
+                    if 'device_id' not in frame.columns:
+                        frame['device_id'] = device
+                    frames.append(frame)
+                    continue
+                rows = []
                 for r in records:
-                    row = dict(r)  # copy
+                    row = dict(r) if columns is None else project_record(r, columns)
                     # add a device column if not present
                     if 'device_id' not in row:
-                        row['device_id'] = device
+                        row['device_id'] = r.get('device_id', device)
                     rows.append(row)
-            df = pd.DataFrame(rows)
+                frames.append(pd.DataFrame(rows))
+            df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
         else:
             # Assume it's DataFrame-like
             try:
@@ -36,18 +201,27 @@ class Visualizer:
                 print("Unsupported data format for display_spreadsheet().")
                 return
 
-        df.to_csv(output_path, index=False)
+        if columns is not None:
+            keep = list(columns) + (['device_id'] if isinstance(data, dict) else [])
+            df = df[match_columns(df.columns, keep)]
+        with instrument.active().span('export', records=len(df)):
+            df.to_csv(output_path, index=False)
         print(f"Data has been written to {output_path}")
 
     def display_graph(self, data=None):
         """Plot time-series data. Expects either a dict of device -> list[records]
         where each record has 'time' and 'value' keys, or a DataFrame with
-        columns ['device_id','time','value'].'"""
+        columns ['device_id','time','value'].' Dict values may also be
+        (times, values) array pairs, which are plotted as-is."""
+        # timed as the 'render' stage when an instrument.Stats is active
+        with instrument.active().span('render'):
+            self._display_graph(data)
+
+    def _display_graph(self, data):
         try:
-            import matplotlib.pyplot as plt
-            import pandas as pd
+            plt = _pyplot()
         except Exception:
-            print("matplotlib and pandas are required for display_graph().")
+            print("matplotlib is required for display_graph().")
             return
 
         data = data if data is not None else self.data
@@ -59,12 +233,21 @@ class Visualizer:
         device_frames = {}
         if isinstance(data, dict):
             for device, records in data.items():
+                if isinstance(records, tuple) and len(records) == 2:
+                    # pre-extracted (times, values) arrays, already clean and sorted
+                    device_frames[device] = records
+                    continue
                 try:
-                    df = pd.DataFrame(records)
+                    if hasattr(records, 'to_frame'):
+                        df = records.to_frame()
+                    else:
+                        import pandas as pd
+                        df = pd.DataFrame(records)
                 except Exception:
                     continue
                 device_frames[device] = df
         else:
+            import pandas as pd
             df = pd.DataFrame(data)
             if 'device_id' in df.columns:
                 for device, group in df.groupby('device_id'):
@@ -79,7 +262,6 @@ class Visualizer:
 
         # Start with a fresh figure to avoid retaining previous plots
         try:
-            import matplotlib.pyplot as plt
             plt.close('all')
             fig = plt.figure(figsize=(8, 4))
             ax = fig.add_subplot(1, 1, 1)
@@ -87,20 +269,23 @@ class Visualizer:
             print('Failed to initialize matplotlib figure.')
             return
 
+        plotter = _DecimatedPlot(ax, self.decimation)
         for device, df in device_frames.items():
+            if isinstance(df, tuple):
+                plotter.plot(df[0], df[1], label=str(device))
+                continue
             if 'time' in df.columns and 'value' in df.columns:
                 # Normalize time -> tz-naive UTC datetimes and ensure numeric values
                 try:
                     import pandas as _pd
-                    from pandas.api.types import is_datetime64_any_dtype, is_datetime64tz_dtype
-                    # Convert timezone-aware datetimes to UTC and make them naive
-                    try:
-                        if is_datetime64tz_dtype(df['time']):
-                            df['time'] = df['time'].dt.tz_convert('UTC').dt.tz_localize(None)
-                        elif not is_datetime64_any_dtype(df['time']):
-                            df['time'] = _pd.to_datetime(df['time'], errors='coerce')
-                    except Exception:
-                        df['time'] = _pd.to_datetime(df['time'], errors='coerce')
+                    from pandas.api.types import is_datetime64_any_dtype
+                    # Times parsed at load are only converted; others are
+                    # parsed once (see cleaning.parse_times). Either way they
+                    # end up tz-naive UTC.
+                    if not is_datetime64_any_dtype(df['time']):
+                        df['time'] = parse_times(df['time'])
+                    if isinstance(df['time'].dtype, _pd.DatetimeTZDtype):
+                        df['time'] = df['time'].dt.tz_convert('UTC').dt.tz_localize(None)
 
                     # Coerce values to numeric where possible
                     df['value'] = _pd.to_numeric(df['value'], errors='coerce')
@@ -113,7 +298,7 @@ class Visualizer:
                     # If conversion fails, skip plotting this device
                     print(f"Skipping device {device}: failed to parse time/value for plotting")
                     continue
-                ax.plot(df['time'].values, df['value'].values, label=str(device))
+                plotter.plot(df['time'].values, df['value'].values, label=str(device))
             else:
                 print(f"Skipping device {device}: missing 'time' or 'value' columns.")
 
@@ -125,14 +310,15 @@ class Visualizer:
         # figure in a new Toplevel window so the plot appears reliably.
         try:
             import tkinter as _tk
-            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
             root = getattr(_tk, '_default_root', None)
             if root is not None:
+                FigureCanvasTkAgg, NavigationToolbar2Tk = _tk_canvas()
                 fig = plt.gcf()
                 win = _tk.Toplevel(root)
                 win.title('Plot')
                 canvas = FigureCanvasTkAgg(fig, master=win)
                 canvas.draw()
+                plotter.connect()
                 canvas.get_tk_widget().pack(fill=_tk.BOTH, expand=True)
                 try:
                     toolbar = NavigationToolbar2Tk(canvas, win)
@@ -146,4 +332,5 @@ class Visualizer:
             # Not running inside Tk or embedding failed; fall back to show()
             pass
 
+        plotter.connect()
         plt.show()
\ No newline at end of file
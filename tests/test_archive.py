@@ -0,0 +1,77 @@
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+from src import archive as archives
+from src.organizer import Organizer
+from tests.test_organizer import _write_uplinks
+
+
+class TestArchiveSources(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.tmp, 'raw')
+        self.cache_dir = os.path.join(self.tmp, 'cache')
+        _write_uplinks(self.data_dir, 'a84041bbbf5946fc', 5)
+        _write_uplinks(self.data_dir, '24e124713d392240', 3)
+        self.tgz = os.path.join(self.tmp, 'LoRaWAN.tgz')
+        with tarfile.open(self.tgz, 'w:gz') as tf:
+            tf.add(self.data_dir, arcname='.')
+        self.zip = os.path.join(self.tmp, 'LoRaWAN.zip')
+        with zipfile.ZipFile(self.zip, 'w') as zf:
+            for root, _dirs, files in os.walk(self.data_dir):
+                for name in files:
+                    path = os.path.join(root, name)
+                    zf.write(path, os.path.relpath(path, self.data_dir))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _counts(self, organizer):
+        return {k: organizer.device_summary(k)['count'] for k in organizer._device_file_index}
+
+    def test_scan_and_load_match_extracted_tree(self):
+        loose = Organizer()
+        loose.scan_dataset(self.data_dir)
+        expected = loose.load_device_full('a84041bbbf5946fc').column('fcnt').tolist()
+        for path in (self.tgz, self.zip):
+            organizer = Organizer()
+            organizer.scan_dataset(path)
+            self.assertEqual(self._counts(organizer), self._counts(loose))
+            files = organizer._device_file_index['a84041bbbf5946fc']
+            self.assertTrue(all(f.startswith(path + archives.SEP) for f in files))
+            records = organizer.load_device_full('a84041bbbf5946fc')
+            self.assertEqual(sorted(records.column('fcnt').tolist()), sorted(expected))
+            self.assertTrue(records[0]['_source_file'].startswith(path + archives.SEP))
+
+    def test_load_all_streams_archive(self):
+        for cache_dir in (None, self.cache_dir):
+            df = Organizer(cache_dir=cache_dir).load_all_from_dir(self.tgz)
+            self.assertEqual(len(df), 8)
+            self.assertEqual(sorted(df['fCnt'].tolist()), sorted([0, 1, 2, 3, 4, 0, 1, 2]))
+
+    def test_persisted_offsets_skip_restreaming(self):
+        Organizer(cache_dir=self.cache_dir).scan_dataset(self.tgz)
+        archives._OFFSETS.clear()
+        with mock.patch.object(archives, 'iter_members', side_effect=AssertionError('re-streamed')):
+            organizer = Organizer(cache_dir=self.cache_dir)
+            organizer.scan_dataset(self.tgz)
+            records = organizer.load_device_full('24e124713d392240')
+        self.assertEqual(len(records), 3)
+
+    def test_read_members_by_offset(self):
+        members = list(archives.member_offsets(self.tgz))
+        wanted = [m for m in members if '24e124713d392240' in m]
+        got = dict(archives.read_members(self.tgz, reversed(wanted)))
+        self.assertEqual(set(got), set(wanted))
+        with tarfile.open(self.tgz) as tf:
+            for m in wanted:
+                self.assertEqual(got[m], tf.extractfile(m).read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import pandas as pd
+from src.cache import ParseCache
+from src.organizer import Organizer
+from tests.test_organizer import _write_uplinks
+
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.tmp, 'raw')
+        self.cache_dir = os.path.join(self.tmp, 'cache')
+        self.paths = _write_uplinks(self.data_dir, 'a84041bbbf5946fc', 6)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_warm_load_matches_cold_load(self):
+        cold = Organizer(cache_dir=self.cache_dir).load_all_from_dir(self.data_dir)
+        self.assertTrue(os.path.exists(os.path.join(self.cache_dir, ParseCache.FRAME_NAME)))
+        warm = Organizer(cache_dir=self.cache_dir).load_all_from_dir(self.data_dir)
+        pd.testing.assert_frame_equal(cold, warm)
+
+    def test_only_modified_and_new_files_are_stale(self):
+        Organizer(cache_dir=self.cache_dir).load_all_from_dir(self.data_dir)
+        new_paths = _write_uplinks(self.data_dir, 'a84041bbbf5946fc', 2, start=6)
+        # bump the mtime explicitly; some filesystems have coarse timestamps
+        later = time.time() + 10
+        os.utime(self.paths[0], (later, later))
+
+        cache = ParseCache(self.cache_dir)
+        fresh, stale = cache.partition(self.paths + new_paths)
+        self.assertEqual(sorted(stale), sorted([self.paths[0]] + new_paths))
+        self.assertEqual(len(fresh), 5)
+
+        df = Organizer(cache_dir=self.cache_dir).load_all_from_dir(self.data_dir)
+        self.assertEqual(len(df), 8)
+        self.assertEqual(df['_source_file'].nunique(), 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype
+from src.chirpstack import apply_uplink_types, best_gateway, flatten_uplinks, normalize_records
+
+
+def _uplink(fcnt, rx_info, **extra):
+    rec = {
+        'deduplicationId': f'id-{fcnt}',
+        'time': f'2026-01-01T00:00:{fcnt:02d}.500+00:00',
+        'deviceInfo': {'deviceName': 'T/H Sensor', 'devEui': '7894e8000005874b', 'tags': {}},
+        'devAddr': '00424d60',
+        'dr': 3,
+        'fCnt': fcnt,
+        'fPort': 1,
+        'object': {'temperature': 20.5 + fcnt, 'eventType': 'PERIODIC_REPORT'},
+        'rxInfo': rx_info,
+        'txInfo': {'frequency': 903900000, 'modulation': {'lora': {'spreadingFactor': 7}}},
+    }
+    rec.update(extra)
+    return rec
+
+
+class TestChirpStackFlattener(unittest.TestCase):
+
+    def setUp(self):
+        self.records = [
+            _uplink(1, [{'gatewayId': 'gw1', 'rssi': -110, 'snr': 3.8,
+                         'location': {'latitude': 61.35, 'longitude': -117.64}}]),
+            _uplink(2, [{'gatewayId': 'gw1', 'rssi': -100, 'snr': 1.0},
+                        {'gatewayId': 'gw2', 'rssi': -90, 'snr': 7.5}]),
+            # a status event: same envelope, no frame counters or rxInfo
+            {'deduplicationId': 'id-3', 'time': '2026-01-01T00:00:03+00:00',
+             'deviceInfo': {'deviceName': 'T/H Sensor', 'devEui': '7894e8000005874b'},
+             'batteryLevel': 87.5},
+        ]
+
+    def test_fixed_column_types(self):
+        df = flatten_uplinks(self.records)
+        self.assertTrue(is_datetime64_any_dtype(df['time'].dtype))
+        self.assertEqual(str(df['time'].dt.tz), 'UTC')
+        self.assertEqual(str(df['fCnt'].dtype), 'Int32')
+        self.assertEqual(str(df['dr'].dtype), 'Int32')
+        self.assertEqual(str(df['rxInfo.rssi'].dtype), 'float32')
+        self.assertEqual(str(df['rxInfo.snr'].dtype), 'float32')
+        self.assertIsInstance(df['rxInfo.gatewayId'].dtype, pd.CategoricalDtype)
+        self.assertIsInstance(df['deviceInfo.devEui'].dtype, pd.CategoricalDtype)
+        self.assertEqual(str(df['txInfo.frequency'].dtype), 'Int64')
+        self.assertEqual(df['object.temperature'].dtype, 'float64')
+        self.assertEqual(df.columns[0], 'time')
+        self.assertNotIn('rxInfo', df.columns)
+        self.assertNotIn('deviceInfo.tags', df.columns)
+        self.assertTrue(pd.isna(df['fCnt'][2]))
+
+    def test_best_gateway_is_expanded(self):
+        df = flatten_uplinks(self.records)
+        self.assertEqual(list(df['rxInfo.gatewayId'].astype(object)[:2]), ['gw1', 'gw2'])
+        self.assertEqual(list(df['rxInfo.rssi'][:2]), [-110.0, -90.0])
+        self.assertEqual(list(df['rxInfo.count'][:2]), [1, 2])
+        self.assertAlmostEqual(df['rxInfo.location.latitude'][0], 61.35)
+        self.assertIsNone(best_gateway([]))
+
+    def test_projection_materializes_only_requested_fields(self):
+        df = flatten_uplinks(self.records, columns=['time', 'rxInfo.rssi', 'object', 'missing.path'])
+        self.assertEqual(list(df.columns), ['time', 'rxInfo.rssi', 'object.eventType', 'object.temperature'])
+        # projected columns match the full flattener's, best gateway included
+        full = flatten_uplinks(self.records)
+        pd.testing.assert_series_equal(df['rxInfo.rssi'], full['rxInfo.rssi'])
+        pd.testing.assert_series_equal(df['time'], full['time'])
+
+    def test_untyped_batches_type_after_concat(self):
+        parts = [flatten_uplinks(self.records[:1], typed=False),
+                 flatten_uplinks(self.records[1:], typed=False)]
+        df = apply_uplink_types(pd.concat(parts, ignore_index=True))
+        pd.testing.assert_frame_equal(df[flatten_uplinks(self.records).columns],
+                                      flatten_uplinks(self.records))
+
+    def test_other_records_use_json_normalize(self):
+        rows = [{'device_id': 'a', 'reading': {'value': 1}}]
+        self.assertEqual(list(normalize_records(rows).columns), ['device_id', 'reading.value'])
+
+    def test_mixed_records_keep_their_order(self):
+        rows = [self.records[0], {'device_id': 'a', 'reading': {'value': 1}}, self.records[1]]
+        df = normalize_records(rows)
+        self.assertEqual(df['fCnt'].tolist()[::2], [1, 2])
+        self.assertEqual(df['reading.value'].tolist()[1], 1)
+        self.assertEqual(str(df['rxInfo.rssi'].dtype), 'float32')
+        self.assertNotIn('rxInfo', df.columns)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import numpy as np
+import pandas as pd
+from src.cleaning import clean_frame, cleaning_plan, parse_times, parse_utc_iso
+
+
+class TestCleaningPlan(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'rxInfo.nsTime': ['2026-01-01T05:00:00Z', '2026-01-01T05:00:01Z', None],
+            'time': ['2026-01-23T16:36:42.332+00:00', '2026-01-23T16:36:43+00:00', None],
+            'deviceInfo.devEui': ['a84041bbbf5946fc', 'a84041bbbf5946fc', None],
+            'object.temperature': [20.5, 21.0, None],
+        }, index=[5, 6, 7])
+
+    def test_plan_is_compiled_once_per_schema(self):
+        plan = cleaning_plan(tuple(self.df.columns))
+        self.assertIs(cleaning_plan(tuple(self.df.columns)), plan)
+        self.assertEqual(plan.device_col, 'deviceinfo_deveui')
+        # the exact 'time' column wins over rxinfo_nstime, whatever the order
+        self.assertEqual(plan.time_cols, ['time'])
+
+    def test_clean_frame(self):
+        out = clean_frame(self.df)
+        self.assertEqual(list(out.columns[:4]), ['rxinfo_nstime', 'time', 'deviceinfo_deveui', 'object_temperature'])
+        self.assertEqual(out['time'][0], pd.Timestamp('2026-01-23T16:36:42.332Z'))
+        self.assertEqual(str(out['time'].dt.tz), 'UTC')
+        self.assertEqual(out['device_id'].tolist(), ['a84041bbbf5946fc'] * 2)
+        self.assertEqual(list(out.index), [0, 1])
+        # the input frame is left untouched
+        self.assertEqual(list(self.df.columns)[1], 'time')
+        self.assertEqual(len(self.df), 3)
+
+    def test_time_is_filled_from_other_time_columns(self):
+        df = pd.DataFrame({'time': ['2026-01-01T00:00:00+00:00', None],
+                           'Timestamp': [None, '2026-01-02 00:00:00'],
+                           'DeviceID': ['a', 'b']})
+        out = clean_frame(df)
+        self.assertEqual(out['time'].tolist(), [pd.Timestamp('2026-01-01', tz='UTC'),
+                                               pd.Timestamp('2026-01-02', tz='UTC')])
+
+
+class TestParseTimes(unittest.TestCase):
+
+    def test_chirpstack_variants_take_the_fast_path(self):
+        values = ['2026-01-23T16:36:42.332+00:00', '2026-01-23T16:36:42.332817Z',
+                  '2026-01-23T16:36:42.332817123+00:00', None]
+        fast = parse_utc_iso(values)
+        self.assertEqual(fast.dtype, np.dtype('datetime64[ns]'))
+        self.assertEqual(str(fast[1]), '2026-01-23T16:36:42.332817000')
+        self.assertTrue(np.isnat(fast[3]))
+        expected = pd.to_datetime(pd.Series(values), format='ISO8601', utc=True)
+        pd.testing.assert_series_equal(parse_times(pd.Series(values, dtype=object)), expected)
+
+    def test_other_offsets_fall_back_to_pandas(self):
+        values = pd.Series(['2026-01-23T18:36:42+02:00', 'not a time'])
+        self.assertIsNone(parse_utc_iso(values.tolist()))
+        parsed = parse_times(values)
+        self.assertEqual(parsed[0], pd.Timestamp('2026-01-23T16:36:42Z'))
+        self.assertTrue(pd.isna(parsed[1]))
+
+    def test_parsed_columns_are_not_parsed_again(self):
+        times = pd.Series(pd.to_datetime(['2026-01-01T00:00:00Z']))
+        self.assertIs(parse_times(times), times)
+
+
+if __name__ == '__main__':
+    unittest.main()
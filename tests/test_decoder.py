@@ -0,0 +1,50 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src import decoder
+
+
+class TestDecoder(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.json_path = os.path.join(self.tmp, 'a.json')
+        self.ndjson_path = os.path.join(self.tmp, 'b.ndjson')
+        with open(self.json_path, 'w', encoding='utf-8') as fh:
+            fh.write('{"time": "2026-01-01T00:00:00+00:00", "object": {"t": 21.5}, "name": "Sensör"}')
+        with open(self.ndjson_path, 'w', encoding='utf-8') as fh:
+            fh.write('{"a": 1}\n\n{"a": 2}\n')
+        self.previous = decoder.backend
+
+    def tearDown(self):
+        decoder.set_backend(self.previous)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_backends_agree(self):
+        results = []
+        for name in decoder.available_backends():
+            decoder.set_backend(name)
+            results.append((decoder.load_file(self.json_path), decoder.load_ndjson(self.ndjson_path)))
+        self.assertIn('json', decoder.available_backends())
+        for got in results:
+            self.assertEqual(got, results[-1])
+        self.assertEqual(results[0][0]['name'], 'Sensör')
+        self.assertEqual(results[0][1], [{'a': 1}, {'a': 2}])
+
+    def test_unknown_backend_is_rejected(self):
+        with self.assertRaises(ValueError):
+            decoder.set_backend('no-such-backend')
+        self.assertEqual(decoder.backend, self.previous)
+
+    def test_invalid_json_raises_value_error(self):
+        with open(self.json_path, 'w', encoding='utf-8') as fh:
+            fh.write('{"a": ')
+        for name in decoder.available_backends():
+            decoder.set_backend(name)
+            with self.assertRaises(ValueError):
+                decoder.load_file(self.json_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from src import index as index_module
+from src.organizer import Organizer
+from tests.test_organizer import _write_uplinks
+
+
+class TestDatasetIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.tmp, 'raw')
+        self.cache_dir = os.path.join(self.tmp, 'cache')
+        _write_uplinks(self.data_dir, 'a84041bbbf5946fc', 5)
+        _write_uplinks(self.data_dir, '24e124713d392240', 3)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_to_epoch_reads_chirpstack_times(self):
+        # nanosecond fractions with a 'Z' suffix, as ChirpStack writes them
+        self.assertEqual(index_module.to_epoch('2026-01-23T16:36:42.332817123Z'), 1769186202.332817)
+        self.assertEqual(index_module.to_epoch('2026-01-23T16:36:42.5+00:00'), 1769186202.5)
+        self.assertEqual(index_module.to_epoch('2026-01-23T16:36:42Z'), 1769186202.0)
+        self.assertIsNone(index_module.to_epoch('not a time'))
+
+    def test_scan_records_device_summaries(self):
+        organizer = Organizer(cache_dir=self.cache_dir)
+        scanned = organizer.scan_dataset(self.data_dir)
+        self.assertEqual(set(scanned), {'a84041bbbf5946fc', '24e124713d392240'})
+        summary = organizer.device_summary('a84041bbbf5946fc')
+        self.assertEqual(summary['count'], 5)
+        self.assertEqual(len(summary['files']), 5)
+        self.assertLess(summary['first'], summary['last'])
+        self.assertEqual(summary['folder'], os.path.join(self.data_dir, 'Sensor', 'a84041bbbf5946fc'))
+
+    def test_rescan_only_parses_new_files(self):
+        Organizer(cache_dir=self.cache_dir).scan_dataset(self.data_dir)
+        new_path = _write_uplinks(self.data_dir, 'a84041bbbf5946fc', 1, start=5)[0]
+
+        real_summarize = index_module.fast_summarize_file
+        with mock.patch.object(index_module, 'fast_summarize_file', side_effect=real_summarize) as spy:
+            organizer = Organizer(cache_dir=self.cache_dir)
+            organizer.scan_dataset(self.data_dir)
+        self.assertEqual([c.args[0] for c in spy.call_args_list], [new_path])
+        self.assertEqual(organizer.device_summary('a84041bbbf5946fc')['count'], 6)
+        self.assertEqual(len(organizer._device_file_index['a84041bbbf5946fc']), 6)
+
+    def test_removed_files_are_dropped(self):
+        organizer = Organizer(cache_dir=self.cache_dir)
+        organizer.scan_dataset(self.data_dir)
+        removed = organizer._device_file_index['24e124713d392240'][0]
+        os.remove(removed)
+        organizer = Organizer(cache_dir=self.cache_dir)
+        organizer.scan_dataset(self.data_dir)
+        self.assertNotIn(removed, organizer._device_file_index['24e124713d392240'])
+        self.assertEqual(organizer.device_summary('24e124713d392240')['count'], 2)
+
+    def test_fast_path_matches_full_parse(self):
+        path = _write_uplinks(self.data_dir, 'a84041bbbf5946fc', 1, start=7)[0]
+        dev_id, count, tmin, tmax = index_module.fast_summarize_file(path)
+        sample, full_count, full_tmin, full_tmax = index_module.summarize_file(path)
+        self.assertEqual(dev_id, 'a84041bbbf5946fc')
+        self.assertEqual((count, tmin, tmax), (full_count, full_tmin, full_tmax))
+
+    def test_fast_path_misses_fall_back_to_full_parse(self):
+        path = os.path.join(self.data_dir, 'flat', 'rows.json')
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'w', encoding='utf-8') as fh:
+            fh.write('[{"device_id": "abc", "time": "2026-01-01T00:00:00+00:00"}]')
+        self.assertIsNone(index_module.fast_summarize_file(path))
+        scanned = Organizer().scan_dataset(self.data_dir)
+        self.assertIn('abc', scanned)
+
+
+if __name__ == '__main__':
+    unittest.main()
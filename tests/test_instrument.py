@@ -0,0 +1,110 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from src import instrument
+from src.organizer import Organizer
+from tests.test_organizer import _write_uplinks
+
+
+class TestStats(unittest.TestCase):
+
+    def test_spans_and_counters(self):
+        stats = instrument.Stats()
+        with stats.span('read', files=2) as counts:
+            counts['bytes'] = 100
+        stats.add('read', 0.5, files=1, failed=1)
+        summary = stats.summary()['read']
+        self.assertEqual(summary['calls'], 2)
+        self.assertEqual((summary['files'], summary['bytes'], summary['failed']), (3, 100, 1))
+        self.assertGreaterEqual(summary['seconds'], 0.5)
+        # only spans become trace events
+        trace = stats.to_chrome_trace()['traceEvents']
+        self.assertEqual([(e['name'], e['ph'], e['args']) for e in trace],
+                         [('read', 'X', {'files': 2, 'bytes': 100})])
+
+    def test_active_recorder_is_per_block(self):
+        stats = instrument.Stats()
+        instrument.active().add('walk', files=1)  # no recorder: ignored
+        with instrument.recording(stats):
+            self.assertEqual(list(instrument.timed_iter('walk', 'abc')), ['a', 'b', 'c'])
+        self.assertEqual(stats.summary()['walk']['files'], 3)
+
+    def test_diff_and_format(self):
+        stats = instrument.Stats()
+        stats.add('read', 1.0, files=10)
+        before = stats.summary()
+        stats.add('read', 0.25, files=5, bytes=2000000)
+        done = instrument.diff_summary(stats.summary(), before)
+        self.assertEqual(done['read']['files'], 5)
+        self.assertEqual(instrument.format_summary(done), 'read 0.25s (5 files, 2.0 MB)')
+
+
+class TestOrganizerStats(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        _write_uplinks(self.tmp, 'a84041bbbf5946fc', 6)
+        with open(os.path.join(self.tmp, 'Sensor', 'broken.json'), 'w') as fh:
+            fh.write('{not json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_load_all_records_stages(self):
+        for workers in (None, 2):
+            organizer = Organizer()
+            organizer.load_all_from_dir(self.tmp, workers=workers, chunksize=4)
+            summary = organizer.stats_summary()
+            self.assertEqual(summary['walk']['files'], 7)
+            self.assertEqual(summary['read']['files'], 7)
+            self.assertEqual(summary['read']['failed'], 1)
+            self.assertEqual(summary['decode']['records'], 6)
+            self.assertEqual(summary['normalize']['records'], 6)
+            self.assertEqual(summary['load_all']['calls'], 1)
+
+    def test_dump_chrome_trace(self):
+        organizer = Organizer()
+        organizer.scan_dataset(self.tmp)
+        organizer.load_device_full('a84041bbbf5946fc')
+        path = os.path.join(self.tmp, 'trace.json')
+        organizer.dump_stats(path, fmt='chrome')
+        with open(path) as fh:
+            names = {e['name'] for e in json.load(fh)['traceEvents']}
+        self.assertTrue({'scan', 'load_device', 'normalize', 'clean', 'store'} <= names)
+        self.assertEqual(organizer.stats_summary()['clean']['records'], 6)
+
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+
+class TestStartupBudget(unittest.TestCase):
+
+    def test_profile_imports(self):
+        rows = instrument.profile_imports(['organizer'], SRC)
+        top = [r for r in rows if r['depth'] == 0]
+        self.assertEqual(top[-1]['module'], 'organizer')
+        self.assertNotIn('site', {r['module'] for r in rows})
+        self.assertTrue(all(r['cumulative_us'] >= r['self_us'] >= 0 for r in rows))
+        self.assertIn('organizer', instrument.format_import_profile(rows, top=3))
+        with self.assertRaises(RuntimeError):
+            instrument.profile_imports(['no_such_module_here'], SRC)
+
+    def test_listing_devices_defers_heavy_imports(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        _write_uplinks(tmp, 'a84041bbbf5946fc', 3)
+        code = (f"import sys; sys.path.insert(0, {SRC!r})\n"
+                "import gui, main, organizer, visualizer\n"
+                "for _ in range(2):  # cold, then from the saved index\n"
+                f"    assert organizer.Organizer(cache_dir={os.path.join(tmp, 'cache')!r}).scan_dataset({tmp!r})\n"
+                "print(sorted(m for m in ('pandas', 'numpy', 'matplotlib') if m in sys.modules))\n")
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        self.assertEqual(out.stdout.strip(), '[]')
+
+
+if __name__ == '__main__':
+    unittest.main()
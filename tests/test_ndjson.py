@@ -0,0 +1,92 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from src import ndjson
+from src.index import to_epoch
+from src.organizer import Organizer
+
+DEVICE = 'a84041bbbf5946fc'
+
+
+def _write_export(path, count, blank_every=7):
+    """Write a ChirpStack-style NDJSON export with the odd blank line."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as fh:
+        for i in range(count):
+            rec = {
+                'time': f'2026-01-01T00:{i // 60:02d}:{i % 60:02d}.000+00:00',
+                'deviceInfo': {'deviceName': 'export', 'devEui': DEVICE},
+                'fCnt': i,
+            }
+            fh.write(json.dumps(rec) + '\n')
+            if i % blank_every == 0:
+                fh.write('\n')
+
+
+class TestNDJSONReader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.tmp, 'raw')
+        self.cache_dir = os.path.join(self.tmp, 'cache')
+        self.path = os.path.join(self.data_dir, 'export', 'uplinks.ndjson')
+        _write_export(self.path, 50)
+        ndjson._MEMO.clear()
+
+    def tearDown(self):
+        ndjson.set_cache_dir(None)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_growing_export_is_reindexed(self):
+        Organizer(cache_dir=self.cache_dir).scan_dataset(self.data_dir)
+        _write_export(self.path, 80)
+        organizer = Organizer(cache_dir=self.cache_dir)
+        organizer.scan_dataset(self.data_dir)
+        self.assertEqual(organizer.device_summary(DEVICE)['count'], 80)
+        # the window lies past the first scan's tmax
+        records = organizer.load_device_full(DEVICE, since='2026-01-01T00:01:00+00:00')
+        self.assertEqual(records.column('fcnt').tolist(), list(range(60, 80)))
+
+    def test_index_counts_records_and_times(self):
+        idx = ndjson.line_index(self.path)
+        self.assertEqual(len(idx), 50)
+        self.assertEqual(idx.tmin, to_epoch('2026-01-01T00:00:00+00:00'))
+        self.assertEqual(idx.tmax, to_epoch('2026-01-01T00:00:49+00:00'))
+        fcnts = [r['fCnt'] for r in ndjson.iter_records(self.path)]
+        self.assertEqual(fcnts, list(range(50)))
+
+    def test_time_window_and_sampled_reads_use_the_index(self):
+        since = to_epoch('2026-01-01T00:00:20+00:00')
+        until = to_epoch('2026-01-01T00:00:29+00:00')
+        with mock.patch.object(ndjson, 'BLOCK', 8):
+            ndjson._MEMO.clear()
+            fcnts = [r['fCnt'] for r in ndjson.iter_records(self.path, since=since, until=until)]
+            sampled = [r['fCnt'] for r in ndjson.iter_records(self.path, step=10)]
+        # only the blocks overlapping the window are decoded
+        self.assertEqual(fcnts, list(range(16, 32)))
+        self.assertEqual(sampled, [0, 10, 20, 30, 40])
+
+    def test_index_is_persisted_and_invalidated(self):
+        organizer = Organizer(cache_dir=self.cache_dir)
+        organizer.scan_dataset(self.data_dir)
+        self.assertEqual(organizer.device_summary(DEVICE)['count'], 50)
+        ndjson._MEMO.clear()
+        with mock.patch.object(ndjson, '_build', side_effect=AssertionError('rebuilt')):
+            self.assertEqual(len(ndjson.line_index(self.path)), 50)
+        _write_export(self.path, 60)
+        self.assertEqual(len(ndjson.line_index(self.path)), 60)
+
+    def test_device_load_filters_window_exactly(self):
+        organizer = Organizer()
+        organizer.scan_dataset(self.data_dir)
+        records = list(organizer.iter_records(DEVICE, since='2026-01-01T00:00:05+00:00',
+                                              until='2026-01-01T00:00:07+00:00'))
+        self.assertEqual([r['fCnt'] for r in records], [5, 6, 7])
+        self.assertEqual(len(organizer.load_device_full(DEVICE)), 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,34 @@
+import json
+import os
+import shutil
+import tempfile
 import unittest
+from unittest import mock
 import pandas as pd
+from src import organizer as organizer_module
 from src.organizer import Organizer
 
+
+def _write_uplinks(base, dev_eui, count, start=0):
+    """Write `count` one-uplink-per-file ChirpStack-style JSONs for a device."""
+    folder = os.path.join(base, 'Sensor', dev_eui)
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i in range(start, start + count):
+        rec = {
+            'deduplicationId': f'{dev_eui}-{i:04d}',
+            'time': f'2026-01-01T00:{i // 60:02d}:{i % 60:02d}.000+00:00',
+            'deviceInfo': {'deviceName': f'dev {dev_eui}', 'devEui': dev_eui},
+            'fCnt': i,
+            'object': {'temperature': 20.0 + i},
+            'rxInfo': [{'gatewayId': 'gw1', 'rssi': -70 - i, 'snr': 9.5}],
+        }
+        path = os.path.join(folder, f'{i:04d}.json')
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(rec, fh)
+        paths.append(path)
+    return paths
+
 class TestOrganizer(unittest.TestCase):
 
     def setUp(self):
@@ -26,6 +53,16 @@ class TestOrganizer(unittest.TestCase):
         self.assertIsInstance(organized_data, pd.DataFrame)
         self.assertTrue('Device' in organized_data.columns)
 
+    def test_organize_merges_colliding_columns(self):
+        # two device profiles spelling one field differently clean to the
+        # same column name
+        df = pd.DataFrame({'devEui': ['a', 'b'], 'time': ['2026-01-01T00:00:00Z', '2026-01-01T00:01:00Z'],
+                           'object.Bat': [3.3, None], 'object.BAT': [None, 3.6]})
+        self.organizer.clean_data(df)
+        organized = self.organizer.organize_by_device()
+        self.assertEqual(organized['a'][0]['object_bat'], 3.3)
+        self.assertEqual(organized['b'][0]['object_bat'], 3.6)
+
     def test_save_processed_data(self):
         data = self.organizer.load_data(self.raw_data_path)
         cleaned_data = self.organizer.clean_data(data)
@@ -33,5 +70,158 @@ class TestOrganizer(unittest.TestCase):
         processed_data = pd.read_csv(self.processed_data_path)
         self.assertEqual(cleaned_data.shape[0], processed_data.shape[0])
 
+
+class TestOrganizerDirectoryLoads(unittest.TestCase):
+
+    def setUp(self):
+        self.organizer = Organizer()
+        self.tmp = tempfile.mkdtemp()
+        _write_uplinks(self.tmp, 'a84041bbbf5946fc', 12)
+        _write_uplinks(self.tmp, '24e124713d392240', 7)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_load_all_from_dir_parallel_matches_serial(self):
+        serial = self.organizer.load_all_from_dir(self.tmp, chunksize=5)
+        parallel = Organizer().load_all_from_dir(self.tmp, workers=2, chunksize=5)
+        self.assertEqual(serial.shape, (19, parallel.shape[1]))
+        pd.testing.assert_frame_equal(serial, parallel)
+        self.assertEqual(serial['_source_file'].nunique(), 19)
+
+    def test_normalize_failure_drops_only_the_bad_file(self):
+        files = sorted(_write_uplinks(self.tmp, '0000000000000bad', 3, start=40))
+        real = organizer_module.normalize_records
+
+        def normalize(records, **kwargs):
+            if any(r['fCnt'] == 41 for r in records):
+                raise ValueError('bad record')
+            return real(records, **kwargs)
+
+        with mock.patch.object(organizer_module, 'normalize_records', side_effect=normalize):
+            df, loaded = organizer_module._parse_file_chunk(files)
+        self.assertEqual(loaded, [files[0], files[2]])
+        self.assertEqual(df['fCnt'].tolist(), [40, 42])
+        self.assertEqual(df['_source_file'].tolist(), loaded)
+
+    def test_mixed_batches_keep_the_uplink_schema(self):
+        # a non-ChirpStack file batched with uplinks must not change their columns
+        with open(os.path.join(self.tmp, 'Sensor', 'other.json'), 'w', encoding='utf-8') as fh:
+            json.dump({'device_id': 'x', 'reading': {'value': 1}}, fh)
+        frames = [Organizer().load_all_from_dir(self.tmp, chunksize=n) for n in (256, 3)]
+        pd.testing.assert_frame_equal(frames[0], frames[1])
+        self.assertIn('rxInfo.rssi', frames[0].columns)
+        self.assertNotIn('rxInfo', frames[0].columns)
+        self.assertEqual(frames[0]['reading.value'].notna().sum(), 1)
+
+    def test_iter_records_streams_projected_window(self):
+        self.organizer.scan_dataset(self.tmp)
+        records = list(self.organizer.iter_records(
+            'a84041bbbf5946fc', columns=['time', 'object.temperature', 'rxInfo.rssi'],
+            since='2026-01-01T00:00:03+00:00', until='2026-01-01T00:00:05+00:00'))
+        self.assertEqual([r['object.temperature'] for r in records], [23.0, 24.0, 25.0])
+        self.assertEqual(records[0]['rxInfo.rssi'], -73)
+        self.assertEqual(set(records[0]), {'time', 'object.temperature', 'rxInfo.rssi', '_source_file'})
+
+    def test_iter_records_chunks(self):
+        self.organizer.scan_dataset(self.tmp)
+        chunks = list(self.organizer.iter_records('a84041bbbf5946fc', chunksize=5))
+        self.assertEqual([len(c) for c in chunks], [5, 5, 2])
+        self.assertIn('deviceInfo.devEui', chunks[0].columns)
+
+    def test_iter_scan_streams_devices(self):
+        cache_dir = os.path.join(self.tmp, '.cache')
+        for expected in (None, 19):
+            steps = list(Organizer(cache_dir=cache_dir).iter_scan(self.tmp, every=5))
+            self.assertEqual([s.files for s in steps], [5, 10, 15, 19, 19])
+            self.assertEqual({s.expected for s in steps}, {expected})
+            self.assertEqual([s.done for s in steps], [False] * 4 + [True])
+            # every device is announced once before the final map
+            streamed = [k for s in steps[:-1] for k in s.devices]
+            self.assertEqual(sorted(streamed), sorted(steps[-1].devices))
+            # devices arrive with their sample records
+            self.assertTrue(all(samples and 'deviceInfo' in samples[0] for samples in steps[0].devices.values()))
+
+    def test_load_device_full_returns_cleaned_records(self):
+        self.organizer.scan_dataset(self.tmp)
+        records = self.organizer.load_device_full('24e124713d392240')
+        self.assertEqual(len(records), 7)
+        self.assertEqual(records[0]['device_id'], '24e124713d392240')
+
+    def test_load_device_full_fallback_returns_device_records(self):
+        self.organizer.scan_dataset(self.tmp)
+        with mock.patch.object(organizer_module, '_clean', side_effect=ValueError('cleaning failed')):
+            records = self.organizer.load_device_full('24e124713d392240')
+        self.assertIsInstance(records, organizer_module.DeviceRecords)
+        self.assertEqual(records.column('fCnt').tolist(), list(range(7)))
+
+    def test_load_device_full_time_window_skips_files(self):
+        for cache_dir in (None, os.path.join(self.tmp, '.cache')):
+            organizer = Organizer(cache_dir=cache_dir)
+            organizer.scan_dataset(self.tmp)
+            organizer._loaded_files = []
+            records = organizer.load_device_full('a84041bbbf5946fc', since='2026-01-01T00:00:09+00:00',
+                                                 until='2026-01-01T00:00:10+00:00')
+            self.assertEqual(records.column('fcnt').tolist(), [9, 10])
+            # files outside the window were pruned by the scan index, never opened
+            self.assertEqual(len(organizer._loaded_files), 2)
+
+    def test_load_device_full_projects_columns(self):
+        for cache_dir in (None, os.path.join(self.tmp, '.cache')):
+            organizer = Organizer(cache_dir=cache_dir)
+            organizer.scan_dataset(self.tmp)
+            organizer.load_device_full('24e124713d392240')  # fills the cache with every field
+            records = organizer.load_device_full('24e124713d392240', columns=['time', 'object_temperature'])
+            self.assertEqual(set(records.to_frame().columns), {'time', 'object_temperature', '_source_file'})
+            self.assertEqual(records.column('object_temperature').tolist(), [20.0 + i for i in range(7)])
+
+    def test_device_loads_batch_cache_saves(self):
+        cache_dir = os.path.join(self.tmp, '.cache')
+        organizer = Organizer(cache_dir=cache_dir)
+        organizer.scan_dataset(self.tmp)
+        saves = []
+        save = organizer._parse_cache.save
+        organizer._parse_cache.save = lambda: (saves.append(1), save())
+        organizer.load_device_full('a84041bbbf5946fc')
+        organizer.load_device_full('24e124713d392240')
+        self.assertEqual(saves, [])
+        organizer.flush_cache()
+        self.assertEqual(saves, [1])
+        # a new session finds every parsed file cached
+        fresh, stale = Organizer(cache_dir=cache_dir)._parse_cache.partition(sorted(set(organizer._loaded_files)))
+        self.assertEqual((len(fresh), stale), (19, []))
+
+    def test_projection_finds_fields_missing_from_the_scan_sample(self):
+        # the scan samples the device's first file, which has no humidity
+        folder = os.path.join(self.tmp, 'Sensor', '24e124713d392240')
+        for name in sorted(os.listdir(folder))[1:]:
+            path = os.path.join(folder, name)
+            with open(path, encoding='utf-8') as fh:
+                rec = json.load(fh)
+            rec['object']['Humidity'] = 50.0 + rec['fCnt']
+            with open(path, 'w', encoding='utf-8') as fh:
+                json.dump(rec, fh)
+        for cache_dir in (None, os.path.join(self.tmp, '.cache')):
+            organizer = Organizer(cache_dir=cache_dir)
+            organizer.scan_dataset(self.tmp)
+            records = organizer.load_device_full('24e124713d392240', columns=['time', 'object_humidity'])
+            self.assertEqual(records.column('object_humidity').tolist()[1:], [50.0 + i for i in range(1, 7)])
+
+    def test_windowed_projection_without_time(self):
+        for cache_dir in (None, os.path.join(self.tmp, '.cache')):
+            organizer = Organizer(cache_dir=cache_dir)
+            organizer.scan_dataset(self.tmp)
+            records = organizer.load_device_full('a84041bbbf5946fc', since='2026-01-01T00:00:09+00:00',
+                                                 until='2026-01-01T00:00:10+00:00',
+                                                 columns=['object.temperature'])
+            self.assertEqual(records.column('object_temperature').tolist(), [29.0, 30.0])
+            self.assertNotIn('time', records.columns)
+            # nothing in the window still gives a DeviceRecords
+            empty = organizer.load_device_full('a84041bbbf5946fc', since='2027-01-01T00:00:00+00:00',
+                                               columns=['object.temperature'])
+            self.assertEqual(len(empty), 0)
+            self.assertTrue(hasattr(empty, 'to_frame'))
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
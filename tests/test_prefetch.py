@@ -0,0 +1,78 @@
+import threading
+import unittest
+from src.prefetch import Prefetcher
+
+
+class TestPrefetcher(unittest.TestCase):
+
+    def setUp(self):
+        self.gate = threading.Event()
+        self.started = threading.Event()
+        self.order = []
+
+        def load(key):
+            self.started.set()
+            self.gate.wait(5)
+            self.order.append(key)
+            return key.upper()
+
+        self.prefetch = Prefetcher(load, workers=1)
+
+    def tearDown(self):
+        self.gate.set()
+        self.prefetch.shutdown()
+
+    def test_most_urgent_first(self):
+        first = self.prefetch.request('busy', priority=5)  # occupies the only worker
+        self.started.wait(5)
+        low = self.prefetch.request('low', priority=2)
+        mid = self.prefetch.request('mid', priority=1)
+        urgent = self.prefetch.request('low', priority=-1)  # bumps the queued key
+        self.assertIs(urgent, low)
+        self.gate.set()
+        self.assertEqual([f.result(5) for f in (first, low, mid)], ['BUSY', 'LOW', 'MID'])
+        self.assertEqual(self.order, ['busy', 'low', 'mid'])
+
+    def test_requests_share_one_load(self):
+        fut = self.prefetch.request('a')
+        self.assertIs(self.prefetch.request('a', priority=3), fut)
+        self.gate.set()
+        self.assertEqual(fut.result(5), 'A')
+        self.assertTrue(self.prefetch.done('a'))
+        self.prefetch.forget('a')
+        self.assertFalse(self.prefetch.known('a'))
+        self.assertEqual(self.order, ['a'])
+
+    def test_discard_cancels_queued(self):
+        running = self.prefetch.request('busy')
+        self.started.wait(5)
+        queued = self.prefetch.request('stale')
+        self.prefetch.discard(lambda key: key in ('busy', 'stale'))
+        self.assertTrue(queued.cancelled())
+        self.gate.set()
+        self.assertEqual(running.result(5), 'BUSY')
+        self.assertEqual(self.order, ['busy'])
+
+    def test_on_idle_after_queue_drains(self):
+        idle = threading.Event()
+        calls = []
+
+        def on_idle():
+            calls.append(list(self.order))
+            idle.set()
+
+        prefetch = Prefetcher(self.prefetch._load, workers=1, on_idle=on_idle)
+        try:
+            first = prefetch.request('a')
+            self.started.wait(5)
+            prefetch.request('b')
+            self.gate.set()
+            self.assertTrue(idle.wait(5))
+            self.assertEqual(first.result(5), 'A')
+            self.assertEqual(calls, [['a', 'b']])
+        finally:
+            prefetch.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+from src.search import SearchIndex
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = SearchIndex()
+        self.index.add('Sensor — EM300 — a84041bbbf5946fc', 'a84041bbbf5946fc', 'EM300-TH')
+        self.index.add('Gateway — 0016c001f0000001', '0016c001f0000001', None)
+        self.index.add('Sensor — WS101 — 24e124000000abcd', '24e124000000abcd', 'WS101 button')
+
+    def brute(self, query):
+        q = query.strip().lower()
+        return [i for i, t in enumerate(self.index._texts) if q in t]
+
+    def test_query_matches_substrings(self):
+        for query in ('', ' ', 'S', 'sensor', 'bf59', 'A84041', 'em300-th', 'button', 'zzz', 'r — W'):
+            self.assertEqual(self.index.query(query), self.brute(query), query)
+        self.assertEqual(self.index.query('sensor'), [0, 2])
+        self.assertEqual(self.index.query('ws101 b'), [2])
+
+    def test_incremental_queries_and_updates(self):
+        # typing narrows the previous results
+        for query in ('s', 'se', 'sen', 'sens', 'sensor', 'sensor — e'):
+            self.assertEqual(self.index.query(query), self.brute(query), query)
+        # new and relabelled items are found by the next query
+        self.assertEqual(self.index.add('Sensor — AM319', 'aa00'), 3)
+        self.assertEqual(self.index.query('sensor'), [0, 2, 3])
+        self.index.update(1, 'Sensor — UG65', '0016c001f0000001')
+        self.index.update(1, 'Gateway — UG65', '0016c001f0000001')
+        self.index.update(1, 'Sensor — UG65', '0016c001f0000001')
+        self.assertEqual(self.index.query('sensor'), [0, 1, 2, 3])
+        self.assertEqual(self.index.query('gateway'), [])
+        self.assertTrue(self.index.matches(1, 'ug6'))
+        self.assertFalse(self.index.matches(0, 'ug6'))
+
+
+if __name__ == '__main__':
+    unittest.main()
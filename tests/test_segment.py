@@ -0,0 +1,114 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from src import segment
+from src.index import to_epoch
+from src.organizer import Organizer
+from tests.test_organizer import _write_uplinks
+
+DEVICE = 'a84041bbbf5946fc'
+
+
+class TestSegments(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.tmp, 'raw')
+        self.folder = os.path.join(self.data_dir, 'Sensor', DEVICE)
+        _write_uplinks(self.data_dir, DEVICE, 5)
+        _write_uplinks(self.data_dir, '24e124713d392240', 3)
+        self.seg_path = os.path.join(self.folder, segment.SEGMENT_NAME)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _load(self):
+        organizer = Organizer()
+        organizer.scan_dataset(self.data_dir)
+        return organizer, organizer.load_device_full(DEVICE)
+
+    def test_compacted_folder_loads_from_segment(self):
+        _organizer, before = self._load()
+        self.assertEqual(Organizer().compact(self.data_dir), 8)
+        organizer, after = self._load()
+        self.assertEqual(organizer._device_file_index[DEVICE], [self.seg_path])
+        self.assertEqual(organizer.device_summary(DEVICE)['count'], 5)
+        self.assertEqual(after.column('fcnt').tolist(), before.column('fcnt').tolist())
+        self.assertEqual(after[0]['_source_file'], self.seg_path)
+        df = Organizer().load_all_from_dir(self.data_dir)
+        self.assertEqual(len(df), 8)
+
+    def test_prune_removes_packed_files(self):
+        Organizer().compact(self.data_dir, prune=True)
+        self.assertEqual(os.listdir(self.folder), [segment.SEGMENT_NAME])
+        _organizer, records = self._load()
+        self.assertEqual(len(records), 5)
+
+    def test_new_uplinks_are_appended(self):
+        segment.compact_folder(self.folder)
+        size = os.path.getsize(self.seg_path)
+        with open(self.seg_path, 'rb') as fh:
+            head = fh.read(size // 2)
+        _write_uplinks(self.data_dir, DEVICE, 2, start=5)
+        self.assertEqual(segment.compact_folder(self.folder), 2)
+        footer = segment.read_footer(self.seg_path)
+        self.assertEqual(footer['count'], 7)
+        self.assertEqual(len(footer['sources']), 7)
+        with open(self.seg_path, 'rb') as fh:
+            self.assertEqual(fh.read(size // 2), head)
+        self.assertEqual(segment.compact_folder(self.folder), 0)
+
+    def test_out_of_order_uplinks_rewrite_in_time_order(self):
+        shutil.rmtree(self.folder)
+        _write_uplinks(self.data_dir, DEVICE, 2, start=3)
+        segment.compact_folder(self.folder)
+        _write_uplinks(self.data_dir, DEVICE, 2)
+        segment.compact_folder(self.folder)
+        fcnts = [r['fCnt'] for r in segment.iter_segment_records(self.seg_path)]
+        self.assertEqual(fcnts, [0, 1, 3, 4])
+
+    def test_failed_rewrite_keeps_the_old_segment(self):
+        shutil.rmtree(self.folder)
+        _write_uplinks(self.data_dir, DEVICE, 2, start=3)
+        segment.compact_folder(self.folder)
+        with open(self.seg_path, 'rb') as fh:
+            before = fh.read()
+        late = [(to_epoch('2026-01-01T00:00:00+00:00'), {'fCnt': 0})]
+        with mock.patch.object(segment.decoder, 'dumps', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                segment.write_records(self.seg_path, late)
+        with open(self.seg_path, 'rb') as fh:
+            self.assertEqual(fh.read(), before)
+        self.assertEqual(sorted(os.listdir(self.folder)), ['0003.json', '0004.json', segment.SEGMENT_NAME])
+
+    def test_edited_file_is_loose_until_compacted_again(self):
+        segment.compact_folder(self.folder)
+        path = os.path.join(self.folder, '0002.json')
+        with open(path, encoding='utf-8') as fh:
+            rec = json.load(fh)
+        rec['object']['temperature'] = 99.0
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(rec, fh)
+        os.utime(path, ns=(0, 0))  # a different mtime even on coarse clocks
+        _organizer, records = self._load()
+        self.assertIn(99.0, records.column('object_temperature').tolist())
+        self.assertEqual(segment.compact_folder(self.folder), 1)
+        self.assertEqual(segment.compact_folder(self.folder), 0)
+        temps = [r['object']['temperature'] for r in segment.iter_segment_records(self.seg_path)]
+        self.assertEqual(temps, [20.0, 21.0, 99.0, 23.0, 24.0])
+        _organizer, records = self._load()
+        self.assertEqual(records.column('object_temperature').tolist(), temps)
+
+    def test_time_window_reads_a_byte_range(self):
+        segment.compact_folder(self.folder)
+        since = to_epoch('2026-01-01T00:00:01+00:00')
+        until = to_epoch('2026-01-01T00:00:03+00:00')
+        fcnts = [r['fCnt'] for r in segment.iter_segment_records(self.seg_path, since=since, until=until)]
+        self.assertEqual(fcnts, [1, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import math
+import unittest
+import numpy as np
+import pandas as pd
+from src.store import DeviceRecords, extract_series, record_schema
+
+
+class TestDeviceRecords(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'time': pd.to_datetime(['2026-01-01T00:00:00Z', None, '2026-01-01T00:02:00Z'], utc=True),
+            'fcnt': [1, 2, 3],
+            'rssi': [-70.5, np.nan, -80.0],
+            'gatewayid': ['gw1', 'gw1', None],
+            'rxinfo': [[{'rssi': -70}], [], [{'rssi': -80}]],
+            'device_id': ['a', 'a', 'a'],
+        })
+        self.records = DeviceRecords.from_frame(self.df)
+
+    def test_rows_match_to_dict(self):
+        expected = self.df.to_dict(orient='records')
+        self.assertEqual(len(self.records), 3)
+        for got, want in zip(self.records, expected):
+            self.assertEqual(set(got), set(want))
+            for key in want:
+                if isinstance(want[key], float) and math.isnan(want[key]):
+                    self.assertTrue(math.isnan(got[key]))
+                elif want[key] is pd.NaT:
+                    self.assertIs(got[key], pd.NaT)
+                else:
+                    self.assertEqual(got[key], want[key])
+        self.assertEqual(self.records[-1]['fcnt'], 3)
+        self.assertEqual(len(self.records[1:]), 2)
+
+    def test_colliding_names_are_merged(self):
+        # 'object.Bat' and 'object.BAT' of two device profiles, once cleaned
+        df = pd.DataFrame([[3.3, np.nan, 'a'], [np.nan, 3.6, 'a']],
+                          columns=['object_bat', 'object_bat', 'device_id'])
+        records = DeviceRecords.from_frame(df)
+        self.assertEqual(records.columns, ['object_bat', 'device_id'])
+        self.assertEqual([r['object_bat'] for r in records], [3.3, 3.6])
+
+    def test_repeated_strings_are_categorical(self):
+        kind, (codes, categories) = self.records._columns['gatewayid']
+        self.assertEqual(kind, 'cat')
+        self.assertEqual(list(codes), [0, 0, -1])
+        self.assertEqual(list(categories), ['gw1'])
+        self.assertEqual(self.records._columns['rxinfo'][0], 'obj')
+
+    def test_column_and_frame_round_trip(self):
+        self.assertEqual(self.records.column('time').dtype, np.dtype('datetime64[ns]'))
+        frame = self.records.to_frame()
+        self.assertEqual(str(frame['time'].dtype), 'datetime64[ns, UTC]')
+        self.assertEqual(frame['fcnt'].tolist(), [1, 2, 3])
+        self.assertEqual(frame['gatewayid'].astype(object).tolist()[:2], ['gw1', 'gw1'])
+
+    def test_schema_catalog(self):
+        schema = self.records.schema
+        self.assertEqual(schema['fcnt'], {'type': 'int', 'count': 3})
+        self.assertEqual(schema['rssi'], {'type': 'float', 'count': 2})
+        self.assertEqual(schema['time'], {'type': 'datetime', 'count': 2})
+        self.assertEqual(schema['gatewayid'], {'type': 'str', 'count': 2})
+        self.assertEqual(schema['rxinfo.rssi'], {'type': 'int', 'count': 2})
+        self.assertNotIn('rxinfo', schema)
+        self.assertIs(self.records.schema, schema)
+        rows = self.df.to_dict(orient='records')
+        self.assertEqual(set(record_schema(rows)), set(schema))
+
+
+class TestExtractSeries(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'time': pd.to_datetime(['2026-01-01T00:02:00Z', '2026-01-01T00:00:00Z', None], utc=True),
+            'object_temperature': [21.5, 20.0, 22.0],
+            'rxinfo': [[{'rssi': -80}], [{'rssi': -70}], [{'rssi': -75}]],
+        })
+
+    def test_columnar_and_row_paths_agree(self):
+        records = DeviceRecords.from_frame(self.df)
+        for key in ('object.temperature', 'rxinfo.rssi'):
+            times, values = extract_series(records, key)
+            row_times, row_values = extract_series(self.df.to_dict(orient='records'), key)
+            np.testing.assert_array_equal(times, row_times)
+            np.testing.assert_array_equal(values, row_values)
+        times, values = extract_series(records, 'rxinfo.rssi')
+        self.assertEqual(values.tolist(), [-70.0, -80.0])
+        self.assertEqual(times.dtype, np.dtype('datetime64[ns]'))
+
+    def test_missing_measurement_is_empty(self):
+        times, values = extract_series(DeviceRecords.from_frame(self.df), 'object.humidity')
+        self.assertEqual(len(times), 0)
+        self.assertEqual(len(values), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
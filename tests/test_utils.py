@@ -0,0 +1,65 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from src.utils import match_columns, project_record, walk_data_files
+
+
+class TestWalkDataFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        for rel in ('a/1.json', 'a/2.CSV', 'a/b/3.ndjson', 'a/b/4.jsonl', 'a/b/skip.txt', '.hidden/5.json'):
+            path = os.path.join(self.tmp, rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as fh:
+                fh.write('{}')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_classifies_files_by_suffix(self):
+        found = {os.path.relpath(p, self.tmp): suffix for p, suffix in walk_data_files(self.tmp)}
+        self.assertEqual(found, {
+            os.path.join('a', '1.json'): '.json',
+            os.path.join('a', '2.CSV'): '.csv',
+            os.path.join('a', 'b', '3.ndjson'): '.ndjson',
+            os.path.join('a', 'b', '4.jsonl'): '.jsonl',
+        })
+
+    def test_lists_each_directory_once(self):
+        with mock.patch('os.scandir', side_effect=os.scandir) as spy:
+            list(walk_data_files(self.tmp))
+        self.assertEqual(spy.call_count, 3)
+
+    def test_dir_cache_skips_unchanged_directories(self):
+        cache = {}
+        list(walk_data_files(self.tmp, dir_cache=cache))
+        # pretend the listings are old enough to be trusted
+        for d, entry in cache.items():
+            entry['mtime'] = os.stat(d).st_mtime_ns
+        with mock.patch('os.scandir', side_effect=os.scandir) as spy:
+            again = list(walk_data_files(self.tmp, dir_cache=cache))
+        self.assertEqual(spy.call_count, 0)
+        self.assertEqual(len(again), 4)
+
+
+class TestColumnSelection(unittest.TestCase):
+
+    def test_cleaned_names_select_dotted_columns(self):
+        available = ['time', 'object.accumulationCount', 'object.temperature', '_source_file']
+        self.assertEqual(match_columns(available, ['object_accumulationcount']),
+                         ['object.accumulationCount', '_source_file'])
+        self.assertEqual(match_columns(['time', 'object_temperature'], ['object.temperature']),
+                         ['object_temperature'])
+
+    def test_project_record_by_cleaned_name(self):
+        record = {'time': 't', 'object': {'accumulationCount': 4}, '_source_file': 'f.json'}
+        self.assertEqual(project_record(record, ['time', 'object_accumulationcount', 'object.missing']),
+                         {'time': 't', 'object_accumulationcount': 4, 'object.missing': None,
+                          '_source_file': 'f.json'})
+
+
+if __name__ == '__main__':
+    unittest.main()
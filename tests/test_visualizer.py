@@ -1,6 +1,9 @@
+import os
+import tempfile
 import unittest
+import numpy as np
 import pandas as pd
-from src.visualizer import Visualizer
+from src.visualizer import Visualizer, decimate, lttb_indices, minmax_indices
 
 class TestVisualizer(unittest.TestCase):
 
@@ -21,6 +24,16 @@ class TestVisualizer(unittest.TestCase):
             result = False
         self.assertTrue(result)
 
+    def test_display_spreadsheet_exports_selected_columns(self):
+        data = {'dev1': [{'time': '2026-01-01T00:00:00+00:00', 'object': {'distance': 1.5},
+                          'data': 'AQID', '_source_file': 'a.json'}]}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'out.csv')
+            self.visualizer.display_spreadsheet(data, output_path=path, columns=['time', 'object.distance'])
+            df = pd.read_csv(path)
+        self.assertEqual(list(df.columns), ['time', 'object.distance', 'device_id', '_source_file'])
+        self.assertEqual(df['device_id'][0], 'dev1')
+
     def test_display_graph(self):
         # Test if the display_graph method works correctly
         try:
@@ -30,5 +43,46 @@ class TestVisualizer(unittest.TestCase):
             result = False
         self.assertTrue(result)
 
+
+class TestDecimation(unittest.TestCase):
+
+    def setUp(self):
+        self.n = 10000
+        self.x = np.arange(self.n).astype('datetime64[s]').astype('datetime64[ns]')
+        self.y = np.sin(np.arange(self.n) / 100.0)
+        self.y[4321] = 50.0  # a spike that must survive decimation
+
+    def test_lttb_keeps_endpoints_and_count(self):
+        idx = lttb_indices(np.arange(self.n), self.y, 500)
+        self.assertEqual(len(idx), 500)
+        self.assertEqual((idx[0], idx[-1]), (0, self.n - 1))
+        self.assertTrue(np.all(np.diff(idx) > 0))
+        self.assertIn(4321, idx)
+
+    def test_minmax_keeps_extremes(self):
+        idx = minmax_indices(self.y, 100)
+        self.assertLessEqual(len(idx), 202)
+        self.assertIn(4321, idx)
+        self.assertIn(int(self.y.argmin()), idx)
+        self.assertEqual((idx[0], idx[-1]), (0, self.n - 1))
+
+    def test_short_series_are_unchanged(self):
+        x, y = decimate(self.x[:50], self.y[:50], 200, 'lttb')
+        self.assertEqual(len(x), 50)
+        x, y = decimate(self.x, self.y, 200, None)
+        self.assertEqual(len(x), self.n)
+
+    def test_graph_redecimates_on_zoom(self):
+        import matplotlib.pyplot as plt
+        Visualizer().display_graph({'dev': (self.x, self.y)})
+        ax = plt.gcf().axes[0]
+        line = ax.lines[0]
+        self.assertLess(len(line.get_xdata()), self.n)
+        ax.set_xlim(ax.convert_xunits(self.x[100]), ax.convert_xunits(self.x[200]))
+        # the visible window is small enough to be drawn at full resolution
+        self.assertEqual(len(line.get_xdata()), 103)
+        plt.close('all')
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file